@@ -0,0 +1,154 @@
+# benchmarks/fixtures.py
+import bisect
+import json
+from typing import Any, Dict, List, Tuple
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "XRPUSDT", "DOGEUSDT")
+DEFAULT_FILLS_PER_ORDER = 4
+# Every Nth transaction-log row is a funding settlement rather than a trade
+SETTLEMENT_EVERY = 25
+
+
+class SyntheticFills:
+    """
+    A deterministic stream of Bybit v5 fills spread evenly over a time range.
+    Rows are generated on demand from their index, so a million fills cost no
+    memory until a stand-in server pages through them.
+    """
+
+    def __init__(self, count: int, start_ms: int, end_ms: int, fills_per_order: int = DEFAULT_FILLS_PER_ORDER):
+        """
+        Args:
+            count: Number of transaction-log rows.
+            start_ms: Time of the first row.
+            end_ms: Time after the last row.
+            fills_per_order: Consecutive fills that belong to the same order.
+        """
+        self.count = count
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.fills_per_order = max(1, fills_per_order)
+        self._step = max(1, (end_ms - start_ms) // max(1, count))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def timestamp(self, index: int) -> int:
+        return self.start_ms + index * self._step
+
+    def index_range(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        """
+        Returns the [lo, hi) row indices with a timestamp between start_ms and end_ms (inclusive).
+        """
+        lo = max(0, -(-(start_ms - self.start_ms) // self._step))
+        hi = max(0, (end_ms - self.start_ms) // self._step + 1)
+        return min(lo, self.count), min(hi, self.count)
+
+    def transaction_row(self, index: int) -> Dict[str, Any]:
+        """
+        Returns row `index` of /v5/account/transaction-log.
+        """
+        order = index // self.fills_per_order
+        symbol = SYMBOLS[order % len(SYMBOLS)]
+        side = "Sell" if order % 2 else "Buy"
+        qty = 0.001 * (1 + (order * 7) % 10)
+        price = 1000.0 + order % 500
+        fee = qty * price * 0.00055
+        # Order PnL between -100 and 99, split evenly across its fills
+        pnl = ((order * 37) % 200 - 100) / self.fills_per_order
+        row_type = "SETTLEMENT" if index % SETTLEMENT_EVERY == SETTLEMENT_EVERY - 1 else "TRADE"
+        return {
+            "id": str(index),
+            "symbol": symbol,
+            "category": "linear",
+            "side": side,
+            "transactionTime": str(self.timestamp(index)),
+            "type": row_type,
+            "qty": f"{qty:.3f}",
+            "size": "0",
+            "currency": "USDT",
+            "tradePrice": f"{price:.2f}",
+            "funding": "0",
+            "fee": f"{fee:.8f}",
+            "cashFlow": f"{pnl:.8f}",
+            "change": f"{pnl - fee:.8f}",
+            "cashBalance": "10000",
+            "feeRate": "0.00055",
+            "bonusChange": "",
+            "tradeId": f"trade-{index}",
+            "orderId": f"bench-{order:09d}",
+            "orderLinkId": "",
+        }
+
+    def execution_row(self, index: int) -> Dict[str, Any]:
+        """
+        Returns fill `index` in the shape of /v5/execution/list and the private execution stream.
+        """
+        return transaction_to_execution(self.transaction_row(index), last_fill=(index + 1) % self.fills_per_order == 0)
+
+
+class RecordedFills:
+    """
+    Transaction-log rows recorded from a real account, in the same interface as SyntheticFills.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = sorted(rows, key=lambda row: int(row.get("transactionTime") or 0))
+        self._times = [int(row.get("transactionTime") or 0) for row in self.rows]
+        self.count = len(self.rows)
+        self.start_ms = self._times[0] if self._times else 0
+        self.end_ms = self._times[-1] + 1 if self._times else 0
+
+    @classmethod
+    def load(cls, path: str) -> "RecordedFills":
+        """
+        Loads rows from a JSON list, a saved API response ({"result": {"list": [...]}}) or a JSONL file.
+        """
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(data, dict):
+            data = data.get("result", data).get("list", [])
+        return cls(data)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def timestamp(self, index: int) -> int:
+        return self._times[index]
+
+    def index_range(self, start_ms: int, end_ms: int) -> Tuple[int, int]:
+        return bisect.bisect_left(self._times, start_ms), bisect.bisect_right(self._times, end_ms)
+
+    def transaction_row(self, index: int) -> Dict[str, Any]:
+        return self.rows[index]
+
+    def execution_row(self, index: int) -> Dict[str, Any]:
+        row = self.rows[index]
+        following = self.rows[index + 1] if index + 1 < self.count else {}
+        return transaction_to_execution(row, last_fill=following.get("orderId") != row.get("orderId"))
+
+
+def transaction_to_execution(row: Dict[str, Any], last_fill: bool) -> Dict[str, Any]:
+    """
+    Maps a transaction-log row onto an execution, the inverse of live_sync.execution_to_transaction.
+    """
+    fee = float(row.get("fee") or 0)
+    return {
+        "category": row.get("category", "linear"),
+        "symbol": row.get("symbol"),
+        "orderId": row.get("orderId"),
+        "orderLinkId": row.get("orderLinkId", ""),
+        "side": row.get("side"),
+        "execId": row.get("tradeId") or row.get("id"),
+        "execPrice": row.get("tradePrice"),
+        "execQty": row.get("qty"),
+        "execFee": row.get("fee"),
+        "execPnl": f"{float(row.get('change') or 0) + fee:.8f}",
+        "execType": "Trade" if row.get("type") == "TRADE" else row.get("type"),
+        "execTime": row.get("transactionTime"),
+        "leavesQty": "0" if last_fill else "1",
+    }
@@ -0,0 +1,446 @@
+# benchmarks/mock_servers.py
+import json
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Bybit accepts transaction-log and execution queries spanning at most 7 days
+BYBIT_MAX_RANGE_MS = 7 * 24 * 60 * 60 * 1000
+BYBIT_TRANSACTION_LOG_PAGE = 50
+BYBIT_EXECUTION_PAGE = 100
+NOTION_MAX_PAGE_SIZE = 100
+
+Response = Tuple[int, Dict[str, str], Any]
+
+
+class StubServer(ABC):
+    """
+    A local HTTP server standing in for a remote API.
+    Every request can be delayed by a fixed latency, and a per-second request
+    cap makes the server answer with the API's own rate-limit response.
+    Subclasses implement `handle` and `rate_limited_response`.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, rate_limit: int = 0):
+        """
+        Args:
+            latency_ms: Delay added to every response.
+            rate_limit: Requests allowed per second; 0 means unlimited.
+        """
+        self.latency = latency_ms / 1000
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                parsed = urlparse(self.path)
+                # Repeated parameters (e.g. Notion's filter_properties) arrive as lists
+                query = {k: v[0] if len(v) == 1 else v for k, v in parse_qs(parsed.query).items()}
+                status, headers, payload = stub._dispatch(self.command, parsed.path, query, body)
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _dispatch(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Response:
+        if self.latency:
+            time.sleep(self.latency)
+        reset_at = self._admit()
+        with self._lock:
+            self.requests += 1
+            if reset_at:
+                self.rate_limited += 1
+        if reset_at:
+            return self.rate_limited_response(reset_at)
+        return self.handle(method, path, query, body)
+
+    def _admit(self) -> Optional[float]:
+        """
+        Counts the request in the current one-second window.
+
+        Returns:
+            None if the request is allowed, else the wall-clock time the window resets.
+        """
+        if not self.rate_limit:
+            return None
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= 1.0:
+                self._window_start = float(int(now))
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > self.rate_limit:
+                return self._window_start + 1.0
+        return None
+
+    def remaining(self) -> int:
+        with self._lock:
+            return max(0, self.rate_limit - self._window_count) if self.rate_limit else 1000
+
+    @abstractmethod
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Response:
+        """
+        Answers an admitted request with (status, headers, JSON payload).
+        """
+        pass
+
+    @abstractmethod
+    def rate_limited_response(self, reset_at: float) -> Response:
+        """
+        Returns the API's own rate-limit response for a request over the per-second cap.
+        """
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "rate_limited": self.rate_limited}
+
+
+class BybitStub(StubServer):
+    """
+    Serves the Bybit v5 endpoints the sync uses from a fixture of fills,
+    with cursor pagination, the 7-day range limit and X-Bapi-Limit headers.
+    """
+
+    def __init__(self, fills, latency_ms: float = 0.0, rate_limit: int = 0,
+                 page_size: int = BYBIT_TRANSACTION_LOG_PAGE):
+        """
+        Args:
+            fills: A SyntheticFills or RecordedFills fixture.
+            latency_ms: Delay added to every response.
+            rate_limit: Requests allowed per second; 0 means unlimited.
+            page_size: Maximum transaction-log rows per page.
+        """
+        super().__init__(latency_ms, rate_limit)
+        self.fills = fills
+        self.page_size = page_size
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Response:
+        if path == "/v5/account/transaction-log":
+            return self._page(query, self.fills.transaction_row, self.page_size)
+        if path == "/v5/execution/list":
+            return self._page(query, self.fills.execution_row, BYBIT_EXECUTION_PAGE)
+        if path == "/v5/user/query-sub-members":
+            return self._ok({"subMembers": []})
+        return 404, {}, {"retCode": 10001, "retMsg": f"Unknown endpoint {path}"}
+
+    def _page(self, query: Dict[str, str], row, max_page: int) -> Response:
+        end_ms = int(query.get("endTime") or self.fills.end_ms)
+        start_ms = int(query.get("startTime") or end_ms - BYBIT_MAX_RANGE_MS)
+        if end_ms - start_ms > BYBIT_MAX_RANGE_MS:
+            return 200, self._limit_headers(), {"retCode": 10001, "retMsg": "The time range cannot exceed 7 days"}
+
+        lo, hi = self.fills.index_range(start_ms, end_ms)
+        offset = int(query.get("cursor") or 0)
+        size = min(int(query.get("limit") or max_page), max_page)
+        first, last = lo + offset, min(hi, lo + offset + size)
+        next_cursor = str(offset + size) if last < hi else ""
+        return self._ok({"list": [row(i) for i in range(first, last)], "nextPageCursor": next_cursor})
+
+    def _ok(self, result: Dict[str, Any]) -> Response:
+        return 200, self._limit_headers(), {"retCode": 0, "retMsg": "OK", "result": result, "time": int(time.time() * 1000)}
+
+    def _limit_headers(self) -> Dict[str, str]:
+        if not self.rate_limit:
+            return {}
+        return {
+            "X-Bapi-Limit": str(self.rate_limit),
+            "X-Bapi-Limit-Status": str(self.remaining()),
+            "X-Bapi-Limit-Reset-Timestamp": str(int((int(time.time()) + 1) * 1000)),
+        }
+
+    def rate_limited_response(self, reset_at: float) -> Response:
+        headers = {
+            "X-Bapi-Limit": str(self.rate_limit),
+            "X-Bapi-Limit-Status": "0",
+            "X-Bapi-Limit-Reset-Timestamp": str(int(reset_at * 1000)),
+        }
+        return 200, headers, {"retCode": 10006, "retMsg": "Too many visits!"}
+
+
+class NotionStub(StubServer):
+    """
+    An in-memory Notion database: schema retrieval, filtered and sorted
+    queries with cursor pagination, and page creates and updates.
+    """
+
+    def __init__(self, property_types: Dict[str, str], latency_ms: float = 0.0, rate_limit: int = 0):
+        """
+        Args:
+            property_types: Database schema as {property name: Notion type}.
+            latency_ms: Delay added to every response.
+            rate_limit: Requests allowed per second; 0 means unlimited.
+        """
+        super().__init__(latency_ms, rate_limit)
+        self.property_types = property_types
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.created = 0
+        self.updated = 0
+        self._version = 0
+        # Filtered and sorted page lists, reused while a query pages through them
+        self._query_cache: Dict[str, Tuple[int, List[Dict[str, Any]]]] = {}
+
+    def add_page(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Inserts a page directly, e.g. to seed the database before a benchmark.
+        """
+        now = _now_iso()
+        page = {
+            "object": "page", "id": str(uuid.uuid4()), "created_time": now, "last_edited_time": now,
+            "archived": False, "properties": self._render(properties),
+        }
+        with self._lock:
+            self.pages[page["id"]] = page
+            self._version += 1
+        return page
+
+    def rows(self, key: str = "Transaction ID") -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the plain value of every property of every page, keyed by the `key` property.
+        """
+        with self._lock:
+            pages = list(self.pages.values())
+        return {
+            _plain_text(page["properties"].get(key)): {
+                name: _plain_value(prop) for name, prop in page["properties"].items()
+            }
+            for page in pages
+        }
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Response:
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["v1", "databases"] and len(parts) == 3 and method == "GET":
+            return 200, {}, self._schema(parts[2])
+        if parts[:2] == ["v1", "databases"] and parts[3:] == ["query"]:
+            return 200, {}, self._query(body, query.get("filter_properties"))
+        if parts == ["v1", "pages"] and method == "POST":
+            with self._lock:
+                self.created += 1
+            return 200, {}, self.add_page(body.get("properties", {}))
+        if parts[:2] == ["v1", "pages"] and len(parts) == 3 and method == "PATCH":
+            return self._update(parts[2], body.get("properties", {}))
+        return 404, {}, {"object": "error", "status": 404, "code": "object_not_found", "message": path}
+
+    def rate_limited_response(self, reset_at: float) -> Response:
+        retry_after = max(1, int(reset_at - time.time() + 0.999))
+        return 429, {"Retry-After": str(retry_after)}, {
+            "object": "error", "status": 429, "code": "rate_limited", "message": "Rate limited",
+        }
+
+    def _schema(self, database_id: str) -> Dict[str, Any]:
+        properties = {
+            name: {"id": f"p{i}", "name": name, "type": prop_type, prop_type: {}}
+            for i, (name, prop_type) in enumerate(self.property_types.items())
+        }
+        return {"object": "database", "id": database_id, "properties": properties}
+
+    def _update(self, page_id: str, properties: Dict[str, Any]) -> Response:
+        with self._lock:
+            page = self.pages.get(page_id)
+            if page is None:
+                return 404, {}, {"object": "error", "status": 404, "code": "object_not_found", "message": page_id}
+            page["properties"].update(self._render(properties))
+            page["last_edited_time"] = _now_iso()
+            self.updated += 1
+            self._version += 1
+        return 200, {}, page
+
+    def _query(self, body: Dict[str, Any], property_ids: Optional[Any] = None) -> Dict[str, Any]:
+        key = json.dumps([body.get("filter"), body.get("sorts")], sort_keys=True)
+        with self._lock:
+            cached = self._query_cache.get(key)
+            if cached is None or cached[0] != self._version:
+                matches = [page for page in self.pages.values() if _matches(page, body.get("filter"))]
+                for sort in reversed(body.get("sorts") or []):
+                    matches.sort(key=lambda page: _sort_value(page, sort.get("property")),
+                                 reverse=sort.get("direction") == "descending")
+                cached = self._query_cache[key] = (self._version, matches)
+        matches = cached[1]
+        offset = int(body.get("start_cursor") or 0)
+        size = min(int(body.get("page_size") or NOTION_MAX_PAGE_SIZE), NOTION_MAX_PAGE_SIZE)
+        more = offset + size < len(matches)
+        results = matches[offset:offset + size]
+        if property_ids:
+            results = [self._project(page, property_ids) for page in results]
+        return {
+            "object": "list", "results": results,
+            "has_more": more, "next_cursor": str(offset + size) if more else None,
+        }
+
+    def _project(self, page: Dict[str, Any], property_ids: Any) -> Dict[str, Any]:
+        """
+        Returns the page with only the requested properties, like `filter_properties`.
+        """
+        ids = {property_ids} if isinstance(property_ids, str) else set(property_ids)
+        names = {name for i, name in enumerate(self.property_types) if f"p{i}" in ids}
+        return {**page, "properties": {name: prop for name, prop in page["properties"].items() if name in names}}
+
+    def _render(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        rendered = {}
+        for name, value in properties.items():
+            prop_type = self.property_types.get(name) or next(iter(value), None)
+            prop = {"id": name, "type": prop_type, **value}
+            if prop_type in ("rich_text", "title"):
+                prop[prop_type] = [
+                    {**part, "type": "text", "plain_text": part.get("text", {}).get("content", "")}
+                    for part in value.get(prop_type, [])
+                ]
+            elif prop_type == "date" and value.get("date"):
+                # Notion echoes datetimes back with millisecond precision
+                start = _parse_time(value["date"]["start"])
+                prop["date"] = {**value["date"], "start": start.isoformat(timespec="milliseconds")}
+            rendered[name] = prop
+        return rendered
+
+
+class DiscordStub(StubServer):
+    """
+    A Discord webhook that accepts messages and reports its rate-limit bucket in headers.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, rate_limit: int = 0):
+        super().__init__(latency_ms, rate_limit)
+        self.messages = 0
+        self.embeds = 0
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]) -> Response:
+        with self._lock:
+            self.messages += 1
+            self.embeds += len(body.get("embeds", []))
+        headers = {}
+        if self.rate_limit:
+            headers = {"X-RateLimit-Remaining": str(self.remaining()), "X-RateLimit-Reset-After": "1"}
+        return 204, headers, None
+
+    def rate_limited_response(self, reset_at: float) -> Response:
+        return 429, {}, {"message": "You are being rate limited.", "retry_after": max(0.0, reset_at - time.time())}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "messages": self.messages, "embeds": self.embeds}
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _plain_text(prop: Optional[Dict[str, Any]]) -> str:
+    if not prop:
+        return ""
+    parts = prop.get("rich_text") or prop.get("title") or []
+    return "".join(part.get("plain_text", "") for part in parts)
+
+
+def _plain_value(prop: Dict[str, Any]) -> Any:
+    if prop["type"] in ("rich_text", "title"):
+        return _plain_text(prop)
+    if prop["type"] == "select":
+        return (prop["select"] or {}).get("name")
+    if prop["type"] == "date":
+        return (prop["date"] or {}).get("start")
+    return prop.get(prop["type"])
+
+
+def _sort_value(page: Dict[str, Any], name: Optional[str]) -> Any:
+    prop = page["properties"].get(name) or {}
+    if prop.get("type") == "date":
+        return (prop.get("date") or {}).get("start") or ""
+    if prop.get("type") == "number":
+        return prop.get("number") or 0
+    return _plain_text(prop)
+
+
+def _matches(page: Dict[str, Any], query_filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluates the subset of Notion filters the sync and reports use.
+    """
+    if not query_filter:
+        return True
+    if "and" in query_filter:
+        return all(_matches(page, f) for f in query_filter["and"])
+    if "or" in query_filter:
+        return any(_matches(page, f) for f in query_filter["or"])
+    if query_filter.get("timestamp") == "last_edited_time":
+        return _compare(page["last_edited_time"], query_filter["last_edited_time"])
+
+    prop = page["properties"].get(query_filter.get("property")) or {}
+    if "rich_text" in query_filter:
+        condition = query_filter["rich_text"]
+        text = _plain_text(prop)
+        if "equals" in condition:
+            return text == condition["equals"]
+        if "is_not_empty" in condition:
+            return bool(text)
+        if "is_empty" in condition:
+            return not text
+    if "date" in query_filter:
+        start = (prop.get("date") or {}).get("start")
+        return start is not None and _compare(start, query_filter["date"])
+    if "number" in query_filter:
+        value = prop.get("number")
+        return value is not None and _compare(value, query_filter["number"])
+    return True
+
+
+def _compare(value: Any, condition: Dict[str, Any]) -> bool:
+    if isinstance(value, str):
+        value = _parse_time(value)
+    for op, bound in condition.items():
+        if isinstance(bound, str):
+            bound = _parse_time(bound)
+        if op in ("on_or_after", "greater_than_or_equal_to") and not value >= bound:
+            return False
+        if op in ("on_or_before", "less_than_or_equal_to") and not value <= bound:
+            return False
+        if op in ("after", "greater_than") and not value > bound:
+            return False
+        if op in ("before", "less_than") and not value < bound:
+            return False
+        if op == "equals" and value != bound:
+            return False
+    return True
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
@@ -0,0 +1,267 @@
+# benchmarks/run.py
+"""
+Offline benchmarks for the sync, the report and the monitor.
+
+Bybit, Notion and Discord are replaced by local stand-in servers fed with
+synthetic (or recorded) fills, so runs need no network access or API keys.
+
+    python -m benchmarks.run --scenario all --fills 1k 100k
+    python -m benchmarks.run --scenario sync --fills 1M --bybit-latency-ms 20 --bybit-rate-limit 10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The sync settings must load without a .env; the stand-in servers never check credentials.
+for _name in ("BYBIT_API_KEY", "BYBIT_API_SECRET", "NOTION_TOKEN", "NOTION_DB_ID"):
+    os.environ.setdefault(_name, "benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fixtures import DEFAULT_FILLS_PER_ORDER, RecordedFills, SyntheticFills  # noqa: E402
+from benchmarks.mock_servers import BybitStub, DiscordStub, NotionStub  # noqa: E402
+from src.adapters.bybit import BybitAdapter  # noqa: E402
+from src.clients.notion import NUMBER_PRECISION, NotionClient  # noqa: E402
+from src.clients.record_cache import NotionRecordCache  # noqa: E402
+from src.clients.state_store import SyncStateStore  # noqa: E402
+from src.config import settings  # noqa: E402
+from src.services.aggregator import OrderAggregator  # noqa: E402
+from src.services.reporter import ReporterService  # noqa: E402
+from src.services.sync import ACCOUNT_NAME, SyncService  # noqa: E402
+from src.utils.logger import log, setup_logger  # noqa: E402
+from src.utils.metrics import metrics  # noqa: E402
+from src.utils.rate_limiter import RateLimiter  # noqa: E402
+
+SCENARIOS = ("sync", "report", "monitor", "stream-check")
+NOTION_SCHEMA = {
+    "Name": "title", "Symbol": "select", "Side": "select", "Size": "number", "Entry/Exit Price": "number",
+    "Fee": "number", "PnL": "number", "Timestamp": "date", "Subaccount": "rich_text", "Transaction ID": "rich_text",
+}
+DATABASE_ID = "benchmark-database"
+# Client-side pace when the stand-in server is not rate limited
+UNLIMITED_RPS = 10000.0
+# Fills per execution stream message
+FILLS_PER_MESSAGE = 10
+SEED_CHUNK = 50000
+
+
+def parse_count(value: str) -> int:
+    """Parses fill counts such as 1000, 100k or 1M."""
+    multipliers = {"k": 1000, "m": 1000000}
+    suffix = value[-1].lower()
+    if suffix in multipliers:
+        return int(float(value[:-1]) * multipliers[suffix])
+    return int(value)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the sync, report and monitor against local stand-in servers.")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--fills", nargs="+", type=parse_count, default=[1000],
+                        help="Fill counts to run, e.g. 1k 100k 1M.")
+    parser.add_argument("--fills-per-order", type=int, default=DEFAULT_FILLS_PER_ORDER)
+    parser.add_argument("--fixture", help="Replay recorded transaction-log rows (JSON or JSONL) instead of synthetic fills.")
+    parser.add_argument("--bybit-latency-ms", type=float, default=0.0)
+    parser.add_argument("--bybit-rate-limit", type=int, default=0, help="Bybit requests per second; 0 is unlimited.")
+    parser.add_argument("--notion-latency-ms", type=float, default=0.0)
+    parser.add_argument("--notion-rate-limit", type=int, default=0, help="Notion requests per second; 0 is unlimited.")
+    parser.add_argument("--discord-latency-ms", type=float, default=0.0)
+    parser.add_argument("--discord-rate-limit", type=int, default=0, help="Discord messages per second; 0 is unlimited.")
+    parser.add_argument("--workers", type=int, default=settings["sync_max_workers"], help="Concurrent sync windows.")
+    parser.add_argument("--stream", action="store_true", help="Benchmark the streaming sync.")
+    parser.add_argument("--output", help="Write the results and metrics as JSON to this file.")
+    parser.add_argument("--work-dir", help="Directory for the logs, reports and local stores of the runs "
+                                           "(default: a new temporary directory).")
+    parser.add_argument("--verbose", action="store_true", help="Keep INFO logging (slower for large runs).")
+    return parser.parse_args()
+
+
+def build_fills(args: argparse.Namespace, count: int):
+    if args.fixture:
+        return RecordedFills.load(args.fixture)
+    # Spread the fills over the range a first sync backfills: 2026-01-01 until now
+    start_ms = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    end_ms = int(time.time() * 1000) - 60 * 1000
+    return SyntheticFills(count, start_ms, end_ms, fills_per_order=args.fills_per_order)
+
+
+def notion_client(notion: NotionStub, args: argparse.Namespace, state_store: SyncStateStore = None) -> NotionClient:
+    return NotionClient(token="benchmark", database_id=DATABASE_ID, state_store=state_store, base_url=notion.url,
+                        requests_per_second=args.notion_rate_limit or UNLIMITED_RPS)
+
+
+def bench_sync(args: argparse.Namespace, fills) -> Dict[str, Any]:
+    """Backfills every fill into an empty Notion database with SyncService.run_sync."""
+    result, _ = run_sync(args, fills, streaming=args.stream)
+    return result
+
+
+def check_stream(args: argparse.Namespace, fills) -> Dict[str, Any]:
+    """
+    Backfills the same fills in batch and in stream mode and compares the Notion
+    rows they leave behind. Any difference is reported as `mismatched` and fails the run.
+    """
+    batch, batch_rows = run_sync(args, fills, streaming=False)
+    stream, stream_rows = run_sync(args, fills, streaming=True)
+    mismatched = sorted(
+        transaction_id for transaction_id in batch_rows.keys() | stream_rows.keys()
+        if _rounded(batch_rows.get(transaction_id)) != _rounded(stream_rows.get(transaction_id))
+    )
+    for transaction_id in mismatched[:10]:
+        log.error(f"Order {transaction_id}: batch {batch_rows.get(transaction_id)} != stream {stream_rows.get(transaction_id)}")
+    return {
+        "seconds": batch["seconds"] + stream["seconds"], "rows": len(batch_rows),
+        "stream_updates": stream["notion_updates"], "mismatched": len(mismatched),
+    }
+
+
+def run_sync(args: argparse.Namespace, fills, streaming: bool) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Runs one backfill and returns its results and the Notion rows it wrote, by Transaction ID."""
+    bybit = BybitStub(fills, args.bybit_latency_ms, args.bybit_rate_limit).start()
+    notion = NotionStub(NOTION_SCHEMA, args.notion_latency_ms, args.notion_rate_limit).start()
+    rps = args.bybit_rate_limit or UNLIMITED_RPS
+    adapter = BybitAdapter("benchmark", "benchmark", rate_limiter=RateLimiter(rps, rps), base_url=bybit.url)
+    state_store = SyncStateStore(os.path.join(tempfile.mkdtemp(dir=args.work_dir), "sync_state.db"))
+    try:
+        service = SyncService(adapter, notion_client(notion, args, state_store),
+                              max_workers=args.workers, state_store=state_store)
+        started = time.perf_counter()
+        service.run_sync(streaming=streaming)
+        elapsed = time.perf_counter() - started
+    finally:
+        adapter.close()
+        state_store.close()
+        bybit.stop()
+        notion.stop()
+    return {
+        "seconds": elapsed, "fills_per_second": len(fills) / elapsed, "pages_written": notion.created + notion.updated,
+        "notion_updates": notion.updated, "bybit": bybit.stats(), "notion": notion.stats(),
+    }, notion.rows()
+
+
+def bench_report(args: argparse.Namespace, fills) -> Dict[str, Any]:
+    """Generates the PnL report from a seeded Notion database, cold and then incrementally."""
+    notion = NotionStub(NOTION_SCHEMA, args.notion_latency_ms, args.notion_rate_limit).start()
+    try:
+        pages = seed_notion(notion, fills)
+        client = notion_client(notion, args)
+        cache = NotionRecordCache(client, path=os.path.join(tempfile.mkdtemp(dir=args.work_dir), "records.parquet"))
+        reporter = ReporterService(notion_client=client, record_cache=cache)
+        cold = timed(lambda: reporter.generate_pnl_report(output_format="csv"))
+        warm = timed(lambda: reporter.generate_pnl_report(output_format="csv"))
+    finally:
+        notion.stop()
+    return {
+        "seconds": cold, "warm_seconds": warm, "pages": pages,
+        "pages_per_second": pages / cold if cold else 0.0, "notion": notion.stats(),
+    }
+
+
+def bench_monitor(args: argparse.Namespace, fills) -> Dict[str, Any]:
+    """Pushes every fill through the monitor's execution callback and waits for the notifications."""
+    from src.monitor.ws_manager import BybitMonitor
+
+    discord = DiscordStub(args.discord_latency_ms, args.discord_rate_limit).start()
+    settings["discord_webhook_url"] = f"{discord.url}/webhook"
+    settings["monitor_live_sync"] = False
+    try:
+        monitor = BybitMonitor()
+        started = time.perf_counter()
+        batch = []
+        for index in range(len(fills)):
+            batch.append(fills.execution_row(index))
+            if len(batch) == FILLS_PER_MESSAGE:
+                monitor._on_execution_update({"topic": "execution", "data": batch})
+                batch = []
+        if batch:
+            monitor._on_execution_update({"topic": "execution", "data": batch})
+        callbacks = time.perf_counter() - started
+        monitor.dispatcher.close(timeout=3600)
+        monitor.notifier.close(timeout=3600)
+        elapsed = time.perf_counter() - started
+        queue_stats = monitor.dispatcher.stats()
+    finally:
+        discord.stop()
+    return {
+        "seconds": elapsed, "callback_seconds": callbacks, "fills_per_second": len(fills) / elapsed,
+        "callback_fills_per_second": len(fills) / callbacks if callbacks else 0.0,
+        "dropped": queue_stats["dropped"], "max_lag_ms": queue_stats["max_lag_ms"], "discord": discord.stats(),
+    }
+
+
+def seed_notion(notion: NotionStub, fills) -> int:
+    """Writes the records a sync of `fills` would produce straight into the stand-in database."""
+    aggregator = OrderAggregator(subaccount=ACCOUNT_NAME)
+    pages = 0
+    for start in range(0, len(fills), SEED_CHUNK):
+        aggregator.add(fills.transaction_row(i) for i in range(start, min(start + SEED_CHUNK, len(fills))))
+        # Orders never span chunks by more than one order, so everything older than the last fill is complete
+        for record in aggregator.pop_settled(fills.timestamp(min(start + SEED_CHUNK, len(fills)) - 1)):
+            notion.add_page(NotionClient._map_to_notion_properties(record))
+            pages += 1
+    for record in aggregator.pop_all():
+        notion.add_page(NotionClient._map_to_notion_properties(record))
+        pages += 1
+    return pages
+
+
+def _rounded(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Rounds the numbers of a row like the Notion content hash, since summation order may differ."""
+    if row is None:
+        return None
+    return {name: round(value, NUMBER_PRECISION) if isinstance(value, float) else value for name, value in row.items()}
+
+
+def timed(func: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+BENCHMARKS = {"sync": bench_sync, "report": bench_report, "monitor": bench_monitor, "stream-check": check_stream}
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    # The logger and the reports write to the working directory, so keep them out of the tree
+    args.work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="bybit-notion-bench-"))
+    os.makedirs(args.work_dir, exist_ok=True)
+    os.chdir(args.work_dir)
+    setup_logger()  # Reopens sync.log in the work directory
+    if not args.verbose:
+        log.setLevel(logging.WARNING)
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+
+    results: List[Dict[str, Any]] = []
+    for count in args.fills:
+        fills = build_fills(args, count)
+        for scenario in scenarios:
+            metrics.reset()
+            result = {"scenario": scenario, "fills": len(fills), **BENCHMARKS[scenario](args, fills)}
+            result["metrics"] = metrics.summary()
+            results.append(result)
+            print(f"{scenario:<8} {len(fills):>9} fills  {result['seconds']:>9.2f}s  " + ", ".join(
+                f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                for key, value in result.items()
+                if key not in ("scenario", "fills", "seconds", "metrics")
+            ), flush=True)
+        if args.fixture:
+            break  # A recorded fixture has a fixed size
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if any(result.get("mismatched") for result in results):
+        sys.exit("Stream and batch syncs wrote different Notion rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# src/adapters/async_base.py
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+class AsyncExchangeAdapter(ABC):
+    """
+    Abstract base class for asyncio exchange API adapters.
+    It mirrors BaseExchangeAdapter with coroutines, so several accounts, the
+    Notion writer and the monitor can share one event loop instead of threads.
+    """
+
+    def __init__(self, api_key: str, api_secret: str):
+        """
+        Initializes the adapter with API credentials.
+
+        Args:
+            api_key: The API key for the exchange.
+            api_secret: The API secret for the exchange.
+        """
+        self._api_key = api_key
+        self._api_secret = api_secret
+
+    @abstractmethod
+    async def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Sends a request to the exchange API, handling rate limits and errors.
+        """
+        pass
+
+    @abstractmethod
+    async def fetch_executions(self, category: str, start_time: int, end_time: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Fetches execution records (trades).
+
+        Args:
+            category: The category of the product (e.g., 'linear', 'spot').
+            start_time: The start timestamp in milliseconds.
+            end_time: The end timestamp in milliseconds.
+            limit: The number of records to fetch per page.
+
+        Returns:
+            A list of execution records.
+        """
+        pass
+
+    async def fetch_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
+        """
+        Fetches the account transaction log (e.g., fees, funding).
+
+        Args:
+            account_type: The account type (e.g., 'UNIFIED', 'CONTRACT').
+            category: The product category.
+            start_time: The start timestamp in milliseconds.
+            end_time: The end timestamp in milliseconds.
+
+        Returns:
+            A list of transaction log entries.
+        """
+        transactions = []
+        async for page in self.iter_transaction_log(account_type, category, start_time, end_time):
+            transactions.extend(page)
+        return transactions
+
+    @abstractmethod
+    def iter_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields the account transaction log one page at a time.
+
+        Args:
+            account_type: The account type (e.g., 'UNIFIED', 'CONTRACT').
+            category: The product category.
+            start_time: The start timestamp in milliseconds.
+            end_time: The end timestamp in milliseconds.
+
+        Yields:
+            Lists of transaction log entries.
+        """
+        pass
+
+    @abstractmethod
+    async def get_positions(self, category: str, settleCoin: str = "USDT") -> List[Dict[str, Any]]:
+        """
+        Fetches current positions for the account.
+        """
+        pass
+
+    @abstractmethod
+    async def fetch_subaccounts(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the list of subaccounts associated with the main account.
+
+        Returns:
+            A list of subaccount details. Returns an empty list if not applicable.
+        """
+        pass
+
+    async def aclose(self):
+        """
+        Releases the adapter's connections.
+        """
+        pass
@@ -1,6 +1,6 @@
 # src/adapters/base.py
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 class BaseExchangeAdapter(ABC):
     """
@@ -69,6 +69,44 @@ class BaseExchangeAdapter(ABC):
         """
         pass
 
+    def iter_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the account transaction log one page at a time.
+        Adapters that paginate should override this to stream pages as they arrive;
+        the default yields the whole window as a single page.
+
+        Args:
+            account_type: The account type (e.g., 'UNIFIED', 'CONTRACT').
+            category: The product category.
+            start_time: The start timestamp in milliseconds.
+            end_time: The end timestamp in milliseconds.
+
+        Yields:
+            Lists of transaction log entries.
+        """
+        yield self.fetch_transaction_log(account_type, category, start_time, end_time)
+
+    def iter_transaction_log_pages(self, account_type: str, category: str, start_time: int, end_time: int,
+                                   cursor: Optional[str] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Yields the account transaction log page by page, each with the cursor of the
+        next page, so an interrupted fetch can be resumed from the last page it reached.
+        Adapters with cursor pagination should override this; the default yields
+        the pages of iter_transaction_log without cursors, so they cannot be resumed mid-window.
+
+        Args:
+            account_type: The account type (e.g., 'UNIFIED', 'CONTRACT').
+            category: The product category.
+            start_time: The start timestamp in milliseconds.
+            end_time: The end timestamp in milliseconds.
+            cursor: Cursor of the page to start from, as yielded by an earlier call.
+
+        Yields:
+            Tuples of (transaction log entries, cursor of the next page or None).
+        """
+        for page in self.iter_transaction_log(account_type, category, start_time, end_time):
+            yield page, None
+
     @abstractmethod
     def fetch_subaccounts(self) -> List[Dict[str, Any]]:
         """
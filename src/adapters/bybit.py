@@ -2,21 +2,219 @@
 import time
 import hmac
 import hashlib
-import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import requests
-from requests.exceptions import RequestException
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException, Timeout
 
 from .base import BaseExchangeAdapter
 from ..utils.exceptions import ApiException
 from ..utils.logger import log
+from ..utils.metrics import metrics
+from ..utils.rate_limiter import RateLimiter, TokenBucket, jittered_backoff
 
 # Bybit API v5 configuration
 BYBIT_BASE_URL = "https://api.bybit.com"
-# Rate limit: 120 requests/minute per UID. We will use a conservative delay.
-# 60s / 120req = 0.5s/req
-REQUEST_SLEEP_INTERVAL = 0.55  # A bit over 500ms for safety
+RECV_WINDOW = "5000"  # Recommended by Bybit
+# Bybit limits each endpoint per UID over a one-second window and reports the
+# remaining quota in the X-Bapi-Limit-* response headers. Until the first response
+# tells us the real limit, we start from a conservative budget.
+DEFAULT_REQUESTS_PER_SECOND = 5
+DEFAULT_BURST = 5
+LIMIT_WINDOW_SECONDS = 1.0
+# retCodes Bybit returns when a request is throttled
+RATE_LIMIT_RET_CODES = (10002, 10006)
+MAX_RATE_LIMIT_RETRIES = 5
+
+# HTTP connection pooling and transient-error retries
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+RETRY_BACKOFF_BASE = 0.5  # seconds, doubled on every attempt
+RETRY_BACKOFF_MAX = 8.0  # seconds
+REQUEST_TIMEOUT = 30  # seconds
+
+
+# The execution list returns at most 100 records per page
+EXECUTION_PAGE_LIMIT = 100
+
+
+def execution_params(category: str, start_time: Optional[int], end_time: Optional[int], limit: int) -> Dict[str, Any]:
+    """
+    Builds the query parameters of /v5/execution/list.
+    """
+    params: Dict[str, Any] = {"category": category, "limit": min(limit, EXECUTION_PAGE_LIMIT)}
+    if start_time:
+        params["startTime"] = start_time
+    if end_time:
+        params["endTime"] = end_time
+    return params
+
+
+class BybitSigner:
+    """
+    Builds the query strings and HMAC-SHA256 signature headers of Bybit API v5
+    requests, for both the blocking and the async adapter.
+    """
+
+    def __init__(self, api_key: str, api_secret: str):
+        self.api_key = api_key
+        # The HMAC key schedule only depends on the secret; copy it for every signature.
+        self._hmac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha256)
+        self._sign_suffix = api_key + RECV_WINDOW
+
+    def session_headers(self) -> Dict[str, str]:
+        """
+        Returns the headers sent unchanged with every request.
+        """
+        return {
+            'X-BAPI-API-KEY': self.api_key,
+            'X-BAPI-RECV-WINDOW': RECV_WINDOW,
+            'Content-Type': 'application/json'
+        }
+
+    @staticmethod
+    def query_string(params: Optional[Dict[str, Any]]) -> str:
+        """
+        Encodes request parameters the way Bybit signs them.
+        """
+        if not params:
+            return ""
+        # Bybit requires sorted keys for the query string
+        return "&".join([f"{k}={v}" for k, v in sorted(params.items())])
+
+    def sign(self, query_string: str, timestamp: int) -> str:
+        """
+        Generates the HMAC-SHA256 signature for a Bybit API v5 request.
+        """
+        mac = self._hmac.copy()
+        mac.update((str(timestamp) + self._sign_suffix + query_string).encode('utf-8'))
+        return mac.hexdigest()
+
+    def signed_headers(self, query_string: str) -> Dict[str, str]:
+        """
+        Returns the signature headers of one attempt. The signature covers the
+        timestamp, so it is regenerated on every attempt.
+        """
+        timestamp = int(time.time() * 1000)
+        return {
+            'X-BAPI-SIGN': self.sign(query_string, timestamp),
+            'X-BAPI-TIMESTAMP': str(timestamp),
+        }
+
+
+class BybitRetryState:
+    """
+    The retry decisions of one Bybit request, shared by the blocking and the
+    async adapter, which only differ in how they send the request and wait.
+    Dropped connections and 5xx responses are retried with jittered exponential
+    backoff; throttled requests wait until Bybit says the quota resets.
+    """
+
+    def __init__(self, endpoint: str, bucket: TokenBucket, max_retries: int):
+        """
+        Args:
+            endpoint: The requested path, used in logs, metrics and errors.
+            bucket: The endpoint's token bucket, synced from every response.
+            max_retries: Retries for 5xx responses and dropped connections.
+        """
+        self.endpoint = endpoint
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.rate_limit_retries = 0
+        self.transient_retries = 0
+
+    def on_transport_error(self, error: Exception) -> float:
+        """
+        Returns the delay before retrying a request that never got a response.
+
+        Raises:
+            ApiException: Once the retries run out.
+        """
+        if self.transient_retries >= self.max_retries:
+            raise ApiException(f"HTTP Request failed after {self.transient_retries} retries: {error}")
+        return self._backoff(f"{type(error).__name__} on {self.endpoint}")
+
+    def on_response(self, response: Any) -> Tuple[Optional[Dict[str, Any]], float]:
+        """
+        Syncs the rate limit with the response headers and checks the response.
+
+        Args:
+            response: A requests or httpx response.
+
+        Returns:
+            (data, 0) for a successful response, or (None, delay) if the request
+            should be sent again after waiting `delay` seconds.
+
+        Raises:
+            ApiException: For errors that are not retried, or once the retries run out.
+        """
+        _update_rate_limit(self.bucket, response.headers)
+
+        if response.status_code >= 500 and self.transient_retries < self.max_retries:
+            return None, self._backoff(f"HTTP {response.status_code} on {self.endpoint}")
+        if response.status_code >= 400:
+            raise ApiException(f"HTTP Request failed: {response.status_code} error for {self.endpoint}: {response.text}")
+        try:
+            data = response.json()
+        except ValueError:
+            raise ApiException(f"Failed to decode JSON response from {self.endpoint}. Response text: {response.text}")
+
+        # Bybit-specific error handling in the response body
+        if data.get("retCode") == 0:
+            return data, 0.0
+
+        if data.get("retCode") not in RATE_LIMIT_RET_CODES:
+            raise ApiException(f"Bybit API Error: {data.get('retMsg')} (Code: {data.get('retCode')})")
+
+        if self.rate_limit_retries >= MAX_RATE_LIMIT_RETRIES:
+            raise ApiException(f"Bybit API rate limit still exceeded on {self.endpoint} after {MAX_RATE_LIMIT_RETRIES} retries.")
+        self.rate_limit_retries += 1
+        metrics.inc("rate_limit_hits_total", client="bybit", endpoint=self.endpoint)
+
+        # Back off exactly until Bybit says the quota resets; the next acquire waits for it
+        reset_ms = _header_int(response.headers, "X-Bapi-Limit-Reset-Timestamp")
+        reset_at = reset_ms / 1000 if reset_ms else time.time() + LIMIT_WINDOW_SECONDS
+        log.warning(f"Rate limit hit on {self.endpoint}. Waiting {max(0.0, reset_at - time.time()):.2f}s for the quota to reset...")
+        self.bucket.block_until(reset_at)
+        return None, 0.0
+
+    def _backoff(self, reason: str) -> float:
+        """
+        Returns a jittered, exponentially growing delay for the next transient retry.
+        """
+        self.transient_retries += 1
+        delay = jittered_backoff(self.transient_retries, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+        log.warning(f"{reason}. Retrying in {delay:.2f}s (attempt {self.transient_retries})...")
+        metrics.inc("retry_backoff_seconds_total", delay, client="bybit")
+        return delay
+
+
+def _header_int(headers: Any, name: str) -> Optional[int]:
+    """
+    Reads an integer response header, returning None if it is missing or malformed.
+    """
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _update_rate_limit(bucket: TokenBucket, headers: Any):
+    """
+    Syncs the endpoint's token bucket with the X-Bapi-Limit-* response headers.
+    """
+    remaining = _header_int(headers, "X-Bapi-Limit-Status")
+    limit = _header_int(headers, "X-Bapi-Limit")
+    if remaining is None and limit is None:
+        return
+    bucket.update(remaining=remaining, limit=limit, window_seconds=LIMIT_WINDOW_SECONDS)
+
+    if remaining == 0:
+        reset_ms = _header_int(headers, "X-Bapi-Limit-Reset-Timestamp")
+        if reset_ms:
+            bucket.block_until(reset_ms / 1000)
 
 
 class BybitAdapter(BaseExchangeAdapter):
@@ -26,109 +224,139 @@ class BybitAdapter(BaseExchangeAdapter):
     including authentication, pagination, and error handling.
     """
 
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_url: str = BYBIT_BASE_URL,
+    ):
+        """
+        Args:
+            api_key: The Bybit API key.
+            api_secret: The Bybit API secret.
+            rate_limiter: An optional limiter shared with other adapters using the same UID.
+            pool_size: Number of keep-alive connections kept open to Bybit.
+            max_retries: Retries for 5xx responses and dropped connections.
+            base_url: API root, e.g. the testnet or a local stand-in server.
+        """
         super().__init__(api_key, api_secret)
-        self.last_request_time = 0
+        self._base_url = base_url.rstrip("/")
+        self._rate_limiter = rate_limiter or RateLimiter(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+        self._max_retries = max_retries
+
+        # One pooled session for the adapter's lifetime, so paginated loops reuse
+        # the same TLS connections instead of handshaking on every page.
+        self._session = requests.Session()
+        http_adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("https://", http_adapter)
+        self._session.mount("http://", http_adapter)
+        self._signer = BybitSigner(self._api_key, self._api_secret)
+        self._session.headers.update(self._signer.session_headers())
+
+    def close(self):
+        """
+        Closes the pooled HTTP connections.
+        """
+        self._session.close()
 
     def _sign(self, params: str, timestamp: int) -> str:
         """
         Generates the HMAC-SHA256 signature for a Bybit API v5 request.
         """
-        to_sign = str(timestamp) + self._api_key + "5000" + params
-        return hmac.new(self._api_secret.encode('utf-8'), to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        return self._signer.sign(params, timestamp)
 
     def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Sends a signed request to the Bybit API, handling rate limiting and errors.
+        5xx responses and dropped connections are retried with jittered exponential backoff.
         """
-        # Rate limiting
-        time_since_last_request = time.time() - self.last_request_time
-        if time_since_last_request < REQUEST_SLEEP_INTERVAL:
-            time.sleep(REQUEST_SLEEP_INTERVAL - time_since_last_request)
-        
-        self.last_request_time = time.time()
-        
-        timestamp = int(self.last_request_time * 1000)
-        
-        query_string = ""
-        if params:
-            # Bybit requires sorted keys for the query string
-            query_string = "&".join([f"{k}={v}" for k, v in sorted(params.items())])
-
-        signature = self._sign(query_string, timestamp)
-
-        headers = {
-            'X-BAPI-API-KEY': self._api_key,
-            'X-BAPI-SIGN': signature,
-            'X-BAPI-TIMESTAMP': str(timestamp),
-            'X-BAPI-RECV-WINDOW': '5000', # Recommended by Bybit
-            'Content-Type': 'application/json'
-        }
-        
-        url = f"{BYBIT_BASE_URL}{endpoint}?{query_string}"
-        
-        try:
-            response = requests.request(method.upper(), url, headers=headers)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-            
-            data = response.json()
+        query_string = self._signer.query_string(params)
+        url = f"{self._base_url}{endpoint}?{query_string}"
+        bucket = self._rate_limiter.bucket(endpoint)
+        retries = BybitRetryState(endpoint, bucket, self._max_retries)
+
+        while True:
+            metrics.inc("rate_limit_wait_seconds_total", bucket.acquire(), client="bybit", endpoint=endpoint)
+            headers = self._signer.signed_headers(query_string)
+            try:
+                with metrics.timer("request_seconds", client="bybit", endpoint=endpoint):
+                    response = self._session.request(method.upper(), url, headers=headers, timeout=REQUEST_TIMEOUT)
+            except (ConnectionError, Timeout) as e:
+                time.sleep(retries.on_transport_error(e))
+                continue
+            except RequestException as e:
+                raise ApiException(f"HTTP Request failed: {e}")
 
-            # Bybit-specific error handling in the response body
-            if data.get("retCode") != 0:
-                # Handle rate limit error (10002)
-                if data.get("retCode") == 10002:
-                    log.warning("Rate limit hit. Retrying after a short delay...")
-                    time.sleep(1) # Extra delay
-                    return self._request(method, endpoint, params)
-                raise ApiException(f"Bybit API Error: {data.get('retMsg')} (Code: {data.get('retCode')})")
-            
-            return data
-
-        except RequestException as e:
-            raise ApiException(f"HTTP Request failed: {e}")
-        except json.JSONDecodeError:
-            raise ApiException(f"Failed to decode JSON response from {url}. Response text: {response.text}")
+            data, delay = retries.on_response(response)
+            if data is not None:
+                return data
+            time.sleep(delay)
 
-    def _paginated_fetch(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _paginated_iter(self, endpoint: str, params: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
         """
-        Helper function to handle pagination for Bybit API endpoints.
+        Generator that follows Bybit's cursor pagination and yields each page as it arrives.
+        """
+        for page, _ in self._paginated_pages(endpoint, params):
+            yield page
+
+    def _paginated_pages(self, endpoint: str, params: Dict[str, Any],
+                         cursor: Optional[str] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Follows Bybit's cursor pagination, optionally starting from a saved cursor,
+        and yields each page together with the cursor of the page after it
+        (None after the last page).
         """
-        all_results = []
         params['limit'] = params.get('limit', 1000) # Bybit max limit for many endpoints
-        
+        if cursor:
+            params['cursor'] = cursor
+
         while True:
             response_data = self._request("GET", endpoint, params)
             results = response_data.get("result", {}).get("list", [])
-            
+
             if not results:
                 break
-                
-            all_results.extend(results)
-            
-            next_page_cursor = response_data.get("result", {}).get("nextPageCursor")
+
+            metrics.inc("pages_total", client="bybit", endpoint=endpoint)
+            metrics.inc("records_fetched_total", len(results), client="bybit", endpoint=endpoint)
+            next_page_cursor = response_data.get("result", {}).get("nextPageCursor") or None
+            yield results, next_page_cursor
+
             if not next_page_cursor:
                 break # No more pages
-            
+
             params['cursor'] = next_page_cursor
-            
+
+    def _paginated_fetch(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Helper function to handle pagination for Bybit API endpoints.
+        """
+        all_results = []
+        for page in self._paginated_iter(endpoint, params):
+            all_results.extend(page)
         return all_results
 
     def fetch_executions(self, category: str, start_time: int, end_time: int, limit: int = 1000) -> List[Dict[str, Any]]:
         """
-        Fetches execution records (trades) with pagination.
-        Note: Bybit's execution list doesn't use startTime/endTime, it's cursor-based for the last 7 days.
-        We will fetch all and filter locally if needed, though the request implies fetching everything recent.
+        Fetches execution records (trades) between start_time and end_time with pagination.
+        Bybit accepts ranges of up to 7 days; without a range it returns the last 7 days.
         """
         endpoint = "/v5/execution/list"
-        params = {"category": category, "limit": limit}
-        # The prompt mentions startTime/endTime, but v5 execution list is based on the last 7 days via cursor.
-        # We will fetch all available in the 7-day window. The sync service will handle filtering.
-        return self._paginated_fetch(endpoint, params)
+        return self._paginated_fetch(endpoint, execution_params(category, start_time, end_time, limit))
 
     def fetch_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> List[Dict[str, Any]]:
         """
         Fetches the account transaction log with pagination.
         """
+        return [tx for page in self.iter_transaction_log(account_type, category, start_time, end_time) for tx in page]
+
+    def iter_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the account transaction log one page at a time.
+        """
         endpoint = "/v5/account/transaction-log"
         params = {
             "accountType": account_type,
@@ -136,7 +364,22 @@ class BybitAdapter(BaseExchangeAdapter):
             "startTime": start_time,
             "endTime": end_time
         }
-        return self._paginated_fetch(endpoint, params)
+        return self._paginated_iter(endpoint, params)
+
+    def iter_transaction_log_pages(self, account_type: str, category: str, start_time: int, end_time: int,
+                                   cursor: Optional[str] = None) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Yields the account transaction log page by page, each with the cursor of the
+        next page, starting from `cursor` if given.
+        """
+        endpoint = "/v5/account/transaction-log"
+        params = {
+            "accountType": account_type,
+            "category": category,
+            "startTime": start_time,
+            "endTime": end_time
+        }
+        return self._paginated_pages(endpoint, params, cursor)
 
     def fetch_subaccounts(self) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,159 @@
+# src/adapters/bybit_async.py
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from .async_base import AsyncExchangeAdapter
+from .bybit import (
+    BYBIT_BASE_URL, DEFAULT_BURST, DEFAULT_MAX_RETRIES, DEFAULT_POOL_SIZE, DEFAULT_REQUESTS_PER_SECOND,
+    REQUEST_TIMEOUT, BybitRetryState, BybitSigner, execution_params,
+)
+from ..utils.exceptions import ApiException
+from ..utils.logger import log
+from ..utils.metrics import metrics
+from ..utils.rate_limiter import RateLimiter
+
+
+class AsyncBybitAdapter(AsyncExchangeAdapter):
+    """
+    Bybit API v5 adapter built on httpx.AsyncClient.
+    Behaves like BybitAdapter (signing, per-endpoint token buckets synced from the
+    X-Bapi-Limit-* headers, jittered retries) but waits on the event loop, so
+    many requests can be in flight from a single thread.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        base_url: str = BYBIT_BASE_URL,
+    ):
+        """
+        Args:
+            api_key: The Bybit API key.
+            api_secret: The Bybit API secret.
+            rate_limiter: An optional limiter shared with other adapters using the same UID,
+                including blocking BybitAdapter instances.
+            pool_size: Maximum number of connections kept open to Bybit.
+            max_retries: Retries for 5xx responses and dropped connections.
+            base_url: API root, e.g. the testnet or a local stand-in server.
+        """
+        super().__init__(api_key, api_secret)
+        self._rate_limiter = rate_limiter or RateLimiter(DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST)
+        self._max_retries = max_retries
+        self._signer = BybitSigner(self._api_key, self._api_secret)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=self._signer.session_headers(),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    async def aclose(self):
+        """
+        Closes the pooled HTTP connections.
+        """
+        await self._client.aclose()
+
+    async def _request(self, method: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Sends a signed request to the Bybit API, retrying like BybitAdapter._request.
+        """
+        query_string = self._signer.query_string(params)
+        url = f"{endpoint}?{query_string}"
+        bucket = self._rate_limiter.bucket(endpoint)
+        retries = BybitRetryState(endpoint, bucket, self._max_retries)
+
+        while True:
+            metrics.inc("rate_limit_wait_seconds_total", await bucket.acquire_async(), client="bybit", endpoint=endpoint)
+            headers = self._signer.signed_headers(query_string)
+            try:
+                with metrics.timer("request_seconds", client="bybit", endpoint=endpoint):
+                    response = await self._client.request(method.upper(), url, headers=headers)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                await asyncio.sleep(retries.on_transport_error(e))
+                continue
+            except httpx.HTTPError as e:
+                raise ApiException(f"HTTP Request failed: {e}")
+
+            data, delay = retries.on_response(response)
+            if data is not None:
+                return data
+            await asyncio.sleep(delay)
+
+    async def _paginated_iter(self, endpoint: str, params: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Async generator that follows Bybit's cursor pagination and yields each page as it arrives.
+        """
+        params['limit'] = params.get('limit', 1000) # Bybit max limit for many endpoints
+
+        while True:
+            response_data = await self._request("GET", endpoint, params)
+            results = response_data.get("result", {}).get("list", [])
+
+            if not results:
+                break
+
+            metrics.inc("pages_total", client="bybit", endpoint=endpoint)
+            metrics.inc("records_fetched_total", len(results), client="bybit", endpoint=endpoint)
+            yield results
+
+            next_page_cursor = response_data.get("result", {}).get("nextPageCursor")
+            if not next_page_cursor:
+                break # No more pages
+
+            params['cursor'] = next_page_cursor
+
+    async def _paginated_fetch(self, endpoint: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        all_results = []
+        async for page in self._paginated_iter(endpoint, params):
+            all_results.extend(page)
+        return all_results
+
+    async def fetch_executions(self, category: str, start_time: int, end_time: int, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Fetches execution records (trades) between start_time and end_time with pagination,
+        like BybitAdapter.fetch_executions.
+        """
+        endpoint = "/v5/execution/list"
+        return await self._paginated_fetch(endpoint, execution_params(category, start_time, end_time, limit))
+
+    def iter_transaction_log(self, account_type: str, category: str, start_time: int, end_time: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields the account transaction log one page at a time.
+        """
+        endpoint = "/v5/account/transaction-log"
+        params = {
+            "accountType": account_type,
+            "category": category,
+            "startTime": start_time,
+            "endTime": end_time
+        }
+        return self._paginated_iter(endpoint, params)
+
+    async def fetch_subaccounts(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the list of subaccounts. Requires Master API key with relevant permissions.
+        """
+        endpoint = "/v5/user/query-sub-members"
+        try:
+            response_data = await self._request("GET", endpoint, {"limit": 100}) # Max limit is 100
+            return response_data.get("result", {}).get("subMembers", [])
+        except ApiException as e:
+            log.warning(f"Could not fetch subaccounts. API key may lack permissions. Error: {e}")
+            return []
+
+    async def get_positions(self, category: str, settleCoin: str = "USDT") -> List[Dict[str, Any]]:
+        """
+        Fetches current positions for the account.
+        """
+        endpoint = "/v5/position/list"
+        params = {
+            "category": category,
+            "settleCoin": settleCoin
+        }
+        return await self._paginated_fetch(endpoint, params)
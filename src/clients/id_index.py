@@ -0,0 +1,36 @@
+# src/clients/id_index.py
+import hashlib
+from typing import Dict, Optional, Tuple
+
+
+class TransactionIdIndex:
+    """
+    A compact in-memory map from Transaction ID to (page_id, content_hash).
+    IDs are keyed by their 64-bit BLAKE2b digest instead of the string itself,
+    which keeps the index small even for very large databases. With 64-bit
+    digests, a lookup against a million stored IDs has roughly a 1 in 10^13
+    chance of a false positive, so no exact confirmation round-trip is needed.
+    """
+
+    def __init__(self):
+        self._pages: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    @staticmethod
+    def _hash(transaction_id: str) -> int:
+        digest = hashlib.blake2b(transaction_id.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def __contains__(self, transaction_id: str) -> bool:
+        return self._hash(transaction_id) in self._pages
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, transaction_id: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """
+        Returns the (page_id, content_hash) stored for the ID, or None if it is unknown.
+        """
+        return self._pages.get(self._hash(transaction_id))
+
+    def set(self, transaction_id: str, page_id: Optional[str], content_hash: Optional[str]):
+        self._pages[self._hash(transaction_id)] = (page_id, content_hash)
@@ -1,16 +1,49 @@
 # src/clients/notion.py
+import hashlib
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import httpx
 from notion_client import Client
-from notion_client.errors import APIResponseError
+from notion_client.errors import APIResponseError, HTTPResponseError, RequestTimeoutError
 
+from ..models import OrderRecord
 from ..utils.exceptions import NotionApiException
 from ..utils.logger import log
+from ..utils.metrics import metrics
+from ..utils.rate_limiter import TokenBucket, jittered_backoff
+from .id_index import TransactionIdIndex
+from .state_store import SyncStateStore
 
 # Notion API has a rate limit of an average of 3 requests per second.
-NOTION_REQUEST_DELAY = 0.4  # seconds, slightly more than 1/3
+NOTION_REQUESTS_PER_SECOND = 3.0
+NOTION_BURST = 3
+# After a 429 the pace is halved, then recovers a little with every successful call.
+NOTION_MIN_REQUESTS_PER_SECOND = 0.5
+NOTION_RATE_RECOVERY = 0.05
+NOTION_WRITE_WORKERS = 3
+NOTION_MAX_RETRIES = 5
+RETRY_BACKOFF_BASE = 1.0  # seconds, doubled on every attempt
+RETRY_BACKOFF_MAX = 30.0  # seconds
+DEFAULT_RETRY_AFTER = 1.0  # seconds, used when a 429 has no Retry-After header
+RETRYABLE_ERROR_CODES = ("rate_limited", "internal_server_error", "service_unavailable", "conflict_error")
+# Errors of a call that NotionClient.retry_delay decides about. HTTPResponseError
+# (the base of APIResponseError) is raised for error responses without a JSON
+# body, e.g. a 502 from a gateway in front of the API.
+RETRIED_EXCEPTIONS = (HTTPResponseError, RequestTimeoutError, httpx.TransportError)
+TRANSACTION_ID_PROPERTY = "Transaction ID"
+TIMESTAMP_PROPERTY = "Timestamp"
+SUBACCOUNT_PROPERTY = "Subaccount"
+# Properties written for every record; their values make up a record's content hash.
+RECORD_PROPERTIES = (
+    "Symbol", "Side", "Size", "Entry/Exit Price", "Fee", "PnL", "Timestamp", "Subaccount", TRANSACTION_ID_PROPERTY,
+)
+NUMBER_PRECISION = 8  # Decimal places compared when hashing number properties
+# Bump when the content hash or the seeded columns change, so stores are re-seeded.
+STATE_INDEX_VERSION = "2"
 
 class NotionClient:
     """
@@ -18,32 +51,134 @@ class NotionClient:
     Handles querying the database for the last sync time and creating new records.
     """
 
-    def __init__(self, token: str, database_id: str):
+    def __init__(self, token: str, database_id: str, state_store: Optional[SyncStateStore] = None,
+                 base_url: Optional[str] = None, requests_per_second: float = NOTION_REQUESTS_PER_SECOND):
         """
         Initializes the Notion client.
 
         Args:
             token: The Notion integration token.
             database_id: The ID of the Notion database to sync with.
+            state_store: Optional local store used for deduplication instead of querying Notion.
+            base_url: Optional API root, e.g. a local stand-in server.
+            requests_per_second: Request pace; calls slow down from it after a 429 and recover back to it.
         """
-        self.client = Client(auth=token)
+        self.base_url = base_url
+        self.client = Client(auth=token, **({"base_url": base_url} if base_url else {}))
         self.database_id = database_id
+        self.state_store = state_store
+        self._id_index: Optional[TransactionIdIndex] = None  # Built on first use when there is no state store
+        self._property_ids: Dict[str, str] = {}
+        # Several sync services may share this client; the dedup index is built only once.
+        self._index_lock = threading.Lock()
+        # Shared by every call (and every writer thread) made through this client
+        self.requests_per_second = requests_per_second
+        self.rate_limiter = TokenBucket(requests_per_second, max(NOTION_BURST, requests_per_second))
 
-    def get_last_sync_timestamp(self, timestamp_col_name: str = "Timestamp") -> Optional[int]:
+    def _call(self, endpoint: Callable[..., Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        """
+        Calls a Notion endpoint within the client's rate budget, retrying as `retry_delay` decides.
+        Raises HTTPResponseError for non-retryable errors or once retries run out.
+        """
+        name = getattr(endpoint, "__qualname__", "notion")
+        attempt = 0
+        while True:
+            metrics.inc("rate_limit_wait_seconds_total", self.rate_limiter.acquire(), client="notion", endpoint=name)
+            try:
+                with metrics.timer("request_seconds", client="notion", endpoint=name):
+                    result = endpoint(**kwargs)
+            except RETRIED_EXCEPTIONS as e:
+                attempt += 1
+                time.sleep(self.retry_delay(e, attempt))
+                continue
+            self.on_call_succeeded()
+            return result
+
+    def retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Decides how a failed call is retried; used by this client and by AsyncNotionWriter.
+        Rate-limited calls pause the shared rate budget for the Retry-After delay
+        and slow the pace down, so the next token is only handed out after it;
+        other transient errors are retried with jittered exponential backoff.
+
+        Args:
+            error: One of RETRIED_EXCEPTIONS raised by the call.
+            attempt: The number of the retry about to be made, starting at 1.
+
+        Returns:
+            The number of seconds to wait before retrying.
+
+        Raises:
+            HTTPResponseError: The error itself, if it is not retryable or retries ran out.
+            NotionApiException: If timeouts or dropped connections ran out of retries.
+        """
+        if isinstance(error, APIResponseError):
+            if error.code not in RETRYABLE_ERROR_CODES or attempt > NOTION_MAX_RETRIES:
+                raise error
+            if error.code == "rate_limited":
+                self._on_rate_limited(getattr(error, "headers", None) or {})
+                return 0.0
+            return self._backoff_delay(attempt, error.code)
+        if isinstance(error, HTTPResponseError):
+            # Only server-side failures are worth retrying
+            if error.status < 500 or attempt > NOTION_MAX_RETRIES:
+                raise error
+            return self._backoff_delay(attempt, f"HTTP {error.status}")
+        if attempt > NOTION_MAX_RETRIES:
+            raise NotionApiException(f"Notion request failed after {attempt - 1} retries: {error}")
+        return self._backoff_delay(attempt, type(error).__name__)
+
+    def on_call_succeeded(self):
+        """
+        Lets the request rate recover a little after a 429 slowed it down.
+        """
+        if self.rate_limiter.rate < self.requests_per_second:
+            self.rate_limiter.set_rate(min(self.requests_per_second, self.rate_limiter.rate + NOTION_RATE_RECOVERY))
+
+    def _on_rate_limited(self, headers: Any):
+        """
+        Pauses all calls for the Retry-After delay and halves the request rate.
+        """
+        try:
+            retry_after = float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+        except (TypeError, ValueError):
+            retry_after = DEFAULT_RETRY_AFTER
+        new_rate = max(NOTION_MIN_REQUESTS_PER_SECOND, self.rate_limiter.rate / 2)
+        metrics.inc("rate_limit_hits_total", client="notion")
+        log.warning(f"Notion rate limit hit. Waiting {retry_after:.1f}s and slowing to {new_rate:.2f} req/s...")
+        self.rate_limiter.set_rate(new_rate)
+        self.rate_limiter.block_until(time.time() + retry_after)
+
+    @staticmethod
+    def _backoff_delay(attempt: int, reason: str) -> float:
+        delay = jittered_backoff(attempt, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX)
+        log.warning(f"Notion request failed ({reason}). Retrying in {delay:.2f}s (attempt {attempt})...")
+        metrics.inc("retry_backoff_seconds_total", delay, client="notion")
+        return delay
+
+    def get_last_sync_timestamp(self, timestamp_col_name: str = "Timestamp",
+                                subaccount: Optional[str] = None) -> Optional[int]:
         """
         Retrieves the timestamp of the most recent entry in the Notion database.
 
         Args:
             timestamp_col_name: The name of the 'Date' column in Notion.
+            subaccount: If given, only entries with this Subaccount value are considered.
 
         Returns:
             The timestamp of the last record in milliseconds, or None if the DB is empty.
         """
+        query = {}
+        if subaccount:
+            query["filter"] = self.record_filter(subaccount=subaccount)
         try:
-            response = self.client.databases.query(
+            response = self._call(
+                self.client.databases.query,
                 database_id=self.database_id,
                 sorts=[{"property": timestamp_col_name, "direction": "descending"}],
                 page_size=1,
+                filter_properties=[self._get_property_id(timestamp_col_name)],
+                **query,
             )
             if not response["results"]:
                 return None
@@ -57,7 +192,7 @@ class NotionClient:
             dt = datetime.fromisoformat(last_entry_date_str)
             return int(dt.timestamp() * 1000)
 
-        except APIResponseError as e:
+        except HTTPResponseError as e:
             raise NotionApiException(f"Failed to query Notion database: {e}")
 
     def query_all_records(self) -> List[Dict[str, Any]]:
@@ -67,121 +202,391 @@ class NotionClient:
         Returns:
             A list of all records (pages) from the database.
         """
-        all_results = []
+        all_results = list(self._iter_pages())
+        log.info(f"Queried and retrieved {len(all_results)} total records from Notion.")
+        return all_results
+
+    def query_records(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      subaccount: Optional[str] = None,
+                      property_names: Iterable[str] = RECORD_PROPERTIES) -> List[Dict[str, Any]]:
+        """
+        Queries the records in a Timestamp range and/or of a single subaccount.
+        Notion applies the filters and returns only the requested properties,
+        so a narrow report transfers a fraction of the database.
+
+        Args:
+            start: Only records at or after this time.
+            end: Only records before this time.
+            subaccount: Only records with this Subaccount value.
+            property_names: Properties populated on each returned page.
+
+        Returns:
+            A list of matching records (pages).
+        """
+        query_filter = self.record_filter(start, end, subaccount)
+        results = list(self._iter_pages(query_filter=query_filter, property_names=property_names))
+        log.info(f"Queried and retrieved {len(results)} records matching {query_filter or 'no filter'} from Notion.")
+        return results
+
+    @staticmethod
+    def record_filter(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      subaccount: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Builds the Notion filter object for a Timestamp range and/or a subaccount.
+
+        Args:
+            start: Inclusive lower bound of the Timestamp.
+            end: Exclusive upper bound of the Timestamp.
+            subaccount: Exact Subaccount value.
+
+        Returns:
+            The filter, or None if no condition was given.
+        """
+        conditions = []
+        if start:
+            conditions.append({"property": TIMESTAMP_PROPERTY, "date": {"on_or_after": start.isoformat()}})
+        if end:
+            conditions.append({"property": TIMESTAMP_PROPERTY, "date": {"before": end.isoformat()}})
+        if subaccount:
+            conditions.append({"property": SUBACCOUNT_PROPERTY, "rich_text": {"equals": subaccount}})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"and": conditions}
+
+    def query_records_edited_since(self, since_iso: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Queries the records created or edited at or after the given time.
+        Notion rounds `last_edited_time` to the minute, so pages edited in the same
+        minute as `since_iso` are returned again; callers should dedupe by page ID.
+
+        Args:
+            since_iso: ISO 8601 timestamp. If None, every record is returned.
+
+        Returns:
+            A list of records (pages) with only the record properties populated.
+        """
+        query_filter = None
+        if since_iso:
+            query_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since_iso}}
+        results = list(self._iter_pages(query_filter=query_filter, property_names=RECORD_PROPERTIES))
+        log.info(f"Queried and retrieved {len(results)} records edited since {since_iso or 'the beginning'} from Notion.")
+        return results
+
+    def _iter_pages(self, query_filter: Optional[Dict[str, Any]] = None,
+                    property_names: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields every page matching the filter, handling pagination.
+
+        Args:
+            query_filter: Optional Notion filter object applied server-side.
+            property_names: If given, only these properties are returned for each page.
+        """
+        kwargs: Dict[str, Any] = {}
+        if query_filter:
+            kwargs["filter"] = query_filter
+        if property_names:
+            kwargs["filter_properties"] = [self._get_property_id(name) for name in property_names
+                                           if name in self._get_property_ids()]
+
         has_more = True
         start_cursor = None
         
         while has_more:
             try:
-                response = self.client.databases.query(
+                response = self._call(
+                    self.client.databases.query,
                     database_id=self.database_id,
                     start_cursor=start_cursor,
-                    page_size=100  # Max page size
+                    page_size=100,  # Max page size
+                    **kwargs
                 )
-                
-                all_results.extend(response["results"])
-                has_more = response["has_more"]
-                start_cursor = response.get("next_cursor")
-                
-                time.sleep(NOTION_REQUEST_DELAY)
-
-            except APIResponseError as e:
+            except HTTPResponseError as e:
                 raise NotionApiException(f"Failed to query Notion database: {e}")
-        
-        log.info(f"Queried and retrieved {len(all_results)} total records from Notion.")
-        return all_results
 
-    def create_records(self, records: List[Dict[str, Any]]):
+            yield from response["results"]
+            has_more = response["has_more"]
+            start_cursor = response.get("next_cursor")
+
+    def create_records(self, records: List[OrderRecord]) -> List[Dict[str, Any]]:
         """
         Creates new pages in the Notion database for each record.
-        Includes deduplication based on 'Transaction ID'.
+        Includes deduplication based on 'Transaction ID': records that already
+        exist are skipped, even if their contents changed.
+
+        Args:
+            records: The aggregated order records to write.
+
+        Returns:
+            One result per page written (see `_write_records`).
+        """
+        with metrics.timer("notion_write_seconds", operation="create_records"):
+            return self._write_records(records, update_existing=False)
+
+    def upsert_records(self, records: List[OrderRecord]) -> List[Dict[str, Any]]:
+        """
+        Creates or updates one page per record, keyed by 'Transaction ID'.
+        Existing pages are only updated when their content hash differs, so
+        re-syncing unchanged records costs no API calls.
 
         Args:
-            records: A list of dictionaries, where each dict represents a trade/transaction.
+            records: The aggregated order records to write.
+
+        Returns:
+            One result per page written (see `_write_records`).
+        """
+        with metrics.timer("notion_write_seconds", operation="upsert_records"):
+            return self._write_records(records, update_existing=True)
+
+    def _write_records(self, records: List[OrderRecord], update_existing: bool) -> List[Dict[str, Any]]:
+        """
+        Writes records on a small pool of writer threads that share the client's rate budget.
+
+        Returns:
+            One result per created or updated page, in input order: a dict with the
+            record's "id", the "page_id" (or None), the "action" ('created' or
+            'updated') and an "error" message (or None).
         """
         if not records:
-            return
+            return []
 
-        # Deduplication Step 1: Fetch recent IDs from Notion to avoid duplicates
-        # We fetch the last 100 records (enough for most overlapping sync windows)
-        existing_ids = set()
-        try:
-            response = self.client.databases.query(
-                database_id=self.database_id,
-                sorts=[{"property": "Timestamp", "direction": "descending"}],
-                page_size=100
-            )
-            for page in response.get("results", []):
-                try:
-                    # Extract Rich Text content safely
-                    id_prop = page["properties"].get("Transaction ID", {}).get("rich_text", [])
-                    if id_prop:
-                        existing_ids.add(id_prop[0]["plain_text"])
-                except (KeyError, IndexError):
-                    continue
-        except APIResponseError as e:
-            log.warning(f"Failed to fetch existing IDs for deduplication: {e}. Proceeding without deduplication.")
-        
-        # Deduplication Step 2: Filter input records
-        unique_records = [r for r in records if r.get("id") and r.get("id") not in existing_ids]
-        
-        duplicates_count = len(records) - len(unique_records)
-        if duplicates_count > 0:
-            log.info(f"Skipped {duplicates_count} duplicate records found in Notion.")
-        
-        if not unique_records:
-            log.info("No new unique records to create.")
-            return
+        writes = self.plan_writes(records, self.lookup_pages([r.id for r in records if r.id]),
+                                   update_existing)
+        if not writes:
+            return []
+
+        with ThreadPoolExecutor(max_workers=NOTION_WRITE_WORKERS) as executor:
+            results = list(executor.map(lambda write: self._write_record(*write), writes))
+        return self.finish_writes(records, writes, results)
+
+    def plan_writes(self, records: List[OrderRecord], existing: Dict[str, Tuple[Optional[str], Optional[str]]],
+                     update_existing: bool) -> List[Tuple[OrderRecord, Dict[str, Any], str, Optional[str]]]:
+        """
+        Decides which records need a page created or updated.
+
+        Args:
+            records: The records to write.
+            existing: (page_id, content_hash) of every record ID already in the database.
+            update_existing: If False, existing pages are never updated.
+
+        Returns:
+            (record, properties, content_hash, page_id) tuples, with page_id None for new pages.
+        """
+        to_create = []
+        to_update = []
+        skipped = 0
+        seen_ids = set()
+        for record in records:
+            transaction_id = record.id
+            if not transaction_id or transaction_id in seen_ids:
+                skipped += 1
+                continue
+            seen_ids.add(transaction_id)
 
-        for record in unique_records:
             properties = self._map_to_notion_properties(record)
-            try:
-                self.client.pages.create(
+            content_hash = self._content_hash(properties)
+            if transaction_id not in existing:
+                to_create.append((record, properties, content_hash, None))
+                continue
+
+            page_id, existing_hash = existing[transaction_id]
+            if update_existing and page_id and existing_hash != content_hash:
+                to_update.append((record, properties, content_hash, page_id))
+            else:
+                skipped += 1
+
+        if skipped > 0:
+            log.info(f"Skipped {skipped} records already up to date in Notion.")
+
+        writes = to_create + to_update
+        if not writes:
+            log.info("No new or changed records to write.")
+        return writes
+
+    def finish_writes(self, records: List[OrderRecord], writes: List[Tuple[OrderRecord, Dict[str, Any], str, Optional[str]]],
+                       results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Records the written pages in the dedup index and returns the results in input order.
+        """
+        index_rows = []
+        for (record, _, content_hash, _), result in zip(writes, results):
+            if result["error"]:
+                continue
+            index_rows.append((record.id, result["page_id"], record.subaccount, record.timestamp, content_hash))
+        if self.state_store:
+            self.state_store.mark_many_written(self.database_id, index_rows)
+        else:
+            for transaction_id, page_id, _, _, content_hash in index_rows:
+                self._id_index.set(transaction_id, page_id, content_hash)
+
+        failed = sum(1 for result in results if result["error"])
+        created = sum(1 for result in results if result["action"] == "created")
+        for result in results:
+            metrics.inc("notion_pages_written_total", action=result["action"], outcome="failed" if result["error"] else "ok")
+        log.info(f"Created {created} and updated {len(results) - created} Notion pages ({failed} failed).")
+        # Report results in input order
+        order = {record.id: i for i, record in enumerate(records) if record.id}
+        return sorted(results, key=lambda result: order[result["id"]])
+
+    def _write_record(self, record: OrderRecord, properties: Dict[str, Any], content_hash: str,
+                      page_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Creates a page, or updates `page_id` if given, and reports the outcome instead of raising.
+        """
+        action = "updated" if page_id else "created"
+        try:
+            if page_id:
+                page = self._call(self.client.pages.update, page_id=page_id, properties=properties)
+            else:
+                page = self._call(
+                    self.client.pages.create,
                     parent={"database_id": self.database_id},
                     properties=properties,
                 )
-                log.info(f"Successfully created record in Notion for symbol: {record.get('symbol')}")
-                # Adhere to rate limits
-                time.sleep(NOTION_REQUEST_DELAY)
-
-            except APIResponseError as e:
-                # Handle rate limit error
-                if e.code == "rate_limited":
-                    log.warning("Notion rate limit hit. Sleeping for 60 seconds...")
-                    time.sleep(60)
-                    # Retry the same record
-                    self.client.pages.create(
-                        parent={"database_id": self.database_id},
-                        properties=properties,
-                    )
-                else:
-                    raise NotionApiException(f"Failed to create Notion page for record {record}: {e}")
+        except (HTTPResponseError, NotionApiException) as e:
+            log.error(f"Failed to write Notion page for record {record}: {e}")
+            return {"id": record.id, "page_id": page_id, "action": action, "error": str(e)}
+
+        log.info(f"Successfully {action} record in Notion for symbol: {record.symbol}")
+        return {"id": record.id, "page_id": page.get("id"), "action": action, "error": None}
+
+    def lookup_pages(self, transaction_ids: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        Returns (page_id, content_hash) for every given ID that already exists in the database.
+        """
+        if self.state_store:
+            with self._index_lock:
+                self._seed_state_store()
+            return self.state_store.known_pages(self.database_id, transaction_ids)
+
+        with self._index_lock:
+            index = self._get_id_index()
+        existing = {}
+        for transaction_id in transaction_ids:
+            entry = index.get(transaction_id)
+            if entry is not None:
+                existing[transaction_id] = entry
+        return existing
+
+    def _get_property_ids(self) -> Dict[str, str]:
+        """
+        Returns a mapping of property name to property ID, loading the schema on first use.
+        """
+        if not self._property_ids:
+            try:
+                database = self._call(self.client.databases.retrieve, database_id=self.database_id)
+            except HTTPResponseError as e:
+                raise NotionApiException(f"Failed to retrieve Notion database schema: {e}")
+            self._property_ids = {prop_name: prop["id"] for prop_name, prop in database["properties"].items()}
+        return self._property_ids
+
+    def _get_property_id(self, name: str) -> str:
+        """
+        Returns the ID of a database property, as required by `filter_properties`.
+        """
+        property_ids = self._get_property_ids()
+        if name not in property_ids:
+            raise NotionApiException(f"Property '{name}' does not exist in the Notion database.")
+        return property_ids[name]
+
+    def _iter_indexed_pages(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yields (Transaction ID, page_id, content_hash) for every page in the database.
+        Only pages with a Transaction ID are queried, and only the record properties are returned.
+        """
+        self._get_property_id(TRANSACTION_ID_PROPERTY)  # Checks the ID column exists
+        pages = self._iter_pages(
+            query_filter={"property": TRANSACTION_ID_PROPERTY, "rich_text": {"is_not_empty": True}},
+            property_names=RECORD_PROPERTIES,
+        )
+        for page in pages:
+            try:
+                # Extract Rich Text content safely
+                id_prop = page["properties"].get(TRANSACTION_ID_PROPERTY, {}).get("rich_text", [])
+                if id_prop:
+                    yield id_prop[0]["plain_text"], page["id"], self._content_hash(page["properties"])
+            except (KeyError, IndexError):
+                continue
+
+    def _get_id_index(self) -> TransactionIdIndex:
+        """
+        Returns the in-memory index of every Transaction ID, building it on first use.
+        """
+        if self._id_index is None:
+            self._id_index = TransactionIdIndex()
+            for transaction_id, page_id, content_hash in self._iter_indexed_pages():
+                self._id_index.set(transaction_id, page_id, content_hash)
+            log.info(f"Built deduplication index with {len(self._id_index)} Transaction IDs from Notion.")
+        return self._id_index
+
+    def _seed_state_store(self):
+        """
+        Seeds the state store with every page already present in Notion, so a
+        freshly created store does not cause duplicates.
+        """
+        if self.state_store.get_meta(self.database_id, "seeded") == STATE_INDEX_VERSION:
+            return
+        count = self.state_store.mark_many_written(
+            self.database_id,
+            ((transaction_id, page_id, None, None, content_hash)
+             for transaction_id, page_id, content_hash in self._iter_indexed_pages()),
+        )
+        self.state_store.set_meta(self.database_id, "seeded", STATE_INDEX_VERSION)
+        log.info(f"Seeded local state store with {count} Transaction IDs from Notion.")
+
+    @staticmethod
+    def _content_hash(properties: Dict[str, Any]) -> str:
+        """
+        Hashes the record properties of either a page to be written or a page
+        returned by Notion, so the two can be compared for changes.
+        """
+        values = [f"{name}={NotionClient._canonical_value(properties.get(name))}" for name in RECORD_PROPERTIES]
+        return hashlib.blake2b("\x1f".join(values).encode('utf-8'), digest_size=8).hexdigest()
+
+    @staticmethod
+    def _canonical_value(prop: Optional[Dict[str, Any]]) -> str:
+        """
+        Reduces a property value to a canonical string, ignoring representation details
+        (e.g. select colors, date formatting) that differ between requests and responses.
+        """
+        if not prop:
+            return ""
+        if "number" in prop:
+            number = prop["number"]
+            return "" if number is None else f"{round(float(number), NUMBER_PRECISION) + 0.0:.{NUMBER_PRECISION}f}"
+        if "select" in prop:
+            return (prop["select"] or {}).get("name") or ""
+        if "date" in prop:
+            start = (prop["date"] or {}).get("start")
+            return str(int(datetime.fromisoformat(start).timestamp())) if start else ""
+        if "rich_text" in prop:
+            return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in prop["rich_text"])
+        return ""
 
     @staticmethod
-    def _map_to_notion_properties(record: Dict[str, Any]) -> Dict[str, Any]:
+    def _map_to_notion_properties(record: OrderRecord) -> Dict[str, Any]:
         """
-        Maps a standard record dictionary to the Notion API's property format.
+        Maps an order record to the Notion API's property format.
         This must be customized to match your database schema precisely.
 
         Schema: Symbol(Select), Side(Select), Size(Num), Entry/Exit Price(Num), 
                 Fee(Num), PnL(Num), Timestamp(Date), Subaccount(Text).
         """
         # Convert timestamp (ms) to ISO 8601 string
-        timestamp_iso = datetime.fromtimestamp(record.get("timestamp", 0) / 1000, tz=timezone.utc).isoformat()
+        timestamp_iso = datetime.fromtimestamp(record.timestamp / 1000, tz=timezone.utc).isoformat()
 
         properties = {
-            "Symbol": {"select": {"name": record.get("symbol")}},
-            "Side": {"select": {"name": record.get("side")}},
-            "Size": {"number": record.get("size")},
-            "Entry/Exit Price": {"number": record.get("price")},
-            "Fee": {"number": record.get("fee")},
-            "PnL": {"number": record.get("pnl")},
+            "Symbol": {"select": {"name": record.symbol}},
+            "Side": {"select": {"name": record.side}},
+            "Size": {"number": record.size},
+            "Entry/Exit Price": {"number": record.price},
+            "Fee": {"number": record.fee},
+            "PnL": {"number": record.pnl},
             "Timestamp": {"date": {"start": timestamp_iso}},
             "Subaccount": {
-                "rich_text": [{"type": "text", "text": {"content": record.get("subaccount", "Main Account")}}]
+                "rich_text": [{"type": "text", "text": {"content": record.subaccount or "Main Account"}}]
             },
             "Transaction ID": {
-                "rich_text": [{"type": "text", "text": {"content": record.get("id", "")}}]
+                "rich_text": [{"type": "text", "text": {"content": record.id or ""}}]
             },
         }
         # Notion API does not accept None for number fields.
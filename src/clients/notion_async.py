@@ -0,0 +1,108 @@
+# src/clients/notion_async.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError
+
+from ..models import OrderRecord
+from ..utils.exceptions import NotionApiException
+from ..utils.logger import log
+from ..utils.metrics import metrics
+from .notion import NOTION_WRITE_WORKERS, RETRIED_EXCEPTIONS, NotionClient
+
+
+class AsyncNotionWriter:
+    """
+    Writes records to Notion from an asyncio event loop.
+    Planning, hashing and dedup bookkeeping are delegated to a NotionClient, whose
+    token bucket is shared, so blocking and async calls draw from one rate budget.
+    Only the page writes themselves run on the event loop.
+    """
+
+    def __init__(self, notion_client: NotionClient, token: str,
+                 max_concurrent_writes: int = NOTION_WRITE_WORKERS):
+        """
+        Args:
+            notion_client: The client whose database, dedup index and rate budget are used.
+            token: The Notion integration token.
+            max_concurrent_writes: Maximum number of page writes in flight at once.
+        """
+        self.notion = notion_client
+        client_options = {"base_url": notion_client.base_url} if notion_client.base_url else {}
+        self.client = AsyncClient(auth=token, **client_options)
+        self.max_concurrent_writes = max_concurrent_writes
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def upsert_records(self, records: List[OrderRecord]) -> List[Dict[str, Any]]:
+        """
+        Creates or updates one page per record, keyed by 'Transaction ID',
+        like NotionClient.upsert_records.
+
+        Returns:
+            One result per page written (see `NotionClient.upsert_records`).
+        """
+        with metrics.timer("notion_write_seconds", operation="upsert_records"):
+            if not records:
+                return []
+
+            # The lookup may seed the dedup index from Notion on first use, which blocks.
+            existing = await asyncio.to_thread(
+                self.notion.lookup_pages, [r.id for r in records if r.id]
+            )
+            writes = self.notion.plan_writes(records, existing, update_existing=True)
+            if not writes:
+                return []
+
+            semaphore = asyncio.Semaphore(self.max_concurrent_writes)
+
+            async def write(record, properties, content_hash, page_id):
+                async with semaphore:
+                    return await self._write_record(record, properties, page_id)
+
+            results = await asyncio.gather(*(write(*w) for w in writes))
+            return self.notion.finish_writes(records, writes, list(results))
+
+    async def _write_record(self, record: OrderRecord, properties: Dict[str, Any],
+                            page_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Creates a page, or updates `page_id` if given, and reports the outcome instead of raising.
+        """
+        action = "updated" if page_id else "created"
+        try:
+            if page_id:
+                page = await self._call(self.client.pages.update, page_id=page_id, properties=properties)
+            else:
+                page = await self._call(
+                    self.client.pages.create,
+                    parent={"database_id": self.notion.database_id},
+                    properties=properties,
+                )
+        except (HTTPResponseError, NotionApiException) as e:
+            log.error(f"Failed to write Notion page for record {record}: {e}")
+            return {"id": record.id, "page_id": page_id, "action": action, "error": str(e)}
+
+        log.info(f"Successfully {action} record in Notion for symbol: {record.symbol}")
+        return {"id": record.id, "page_id": page.get("id"), "action": action, "error": None}
+
+    async def _call(self, endpoint: Callable[..., Awaitable[Dict[str, Any]]], **kwargs) -> Dict[str, Any]:
+        """
+        Calls a Notion endpoint within the shared rate budget, retrying like NotionClient._call.
+        """
+        bucket = self.notion.rate_limiter
+        name = getattr(endpoint, "__qualname__", "notion")
+        attempt = 0
+        while True:
+            metrics.inc("rate_limit_wait_seconds_total", await bucket.acquire_async(), client="notion", endpoint=name)
+            try:
+                with metrics.timer("request_seconds", client="notion", endpoint=name):
+                    result = await endpoint(**kwargs)
+            except RETRIED_EXCEPTIONS as e:
+                attempt += 1
+                # A 429 pauses the shared bucket, which the next `acquire_async` waits out without blocking the loop
+                await asyncio.sleep(self.notion.retry_delay(e, attempt))
+                continue
+            self.notion.on_call_succeeded()
+            return result
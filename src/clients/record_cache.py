@@ -0,0 +1,150 @@
+# src/clients/record_cache.py
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from ..utils.logger import log
+from .notion import NotionClient
+from .rollup_store import DailyRollupStore
+
+DEFAULT_CACHE_PATH = "notion_records.parquet"
+CACHE_COLUMNS = ["page_id", "last_edited_time", "Timestamp", "Symbol", "Side", "Size", "Fee", "PnL", "Subaccount"]
+
+
+class NotionRecordCache:
+    """
+    A local Parquet mirror of the Notion trade database.
+    Each refresh only fetches pages edited since the newest `last_edited_time`
+    already in the mirror, so reports can run against local columnar data
+    instead of paging through the whole database every time.
+
+    Pages deleted or archived in Notion are not reported by incremental
+    queries; use `refresh(full=True)` to rebuild the mirror from scratch.
+
+    Alongside the mirror, daily PnL rollups are kept in `<path>_daily.parquet`
+    and updated on every refresh, for the days the changed pages fall on.
+    """
+
+    def __init__(self, notion_client: NotionClient, path: str = DEFAULT_CACHE_PATH):
+        """
+        Args:
+            notion_client: Client used to fetch changed pages.
+            path: Location of the Parquet file.
+        """
+        self.notion = notion_client
+        self.path = path
+        self.rollups = DailyRollupStore(f"{os.path.splitext(path)[0]}_daily.parquet")
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns the mirrored records without contacting Notion.
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=CACHE_COLUMNS)
+        return pd.read_parquet(self.path)
+
+    def refresh(self, full: bool = False) -> pd.DataFrame:
+        """
+        Pulls pages edited since the last snapshot into the mirror and saves it.
+
+        Args:
+            full: If True, the mirror is rebuilt from every page in the database.
+
+        Returns:
+            The refreshed records.
+        """
+        cached = pd.DataFrame(columns=CACHE_COLUMNS) if full else self.load()
+        since = None if cached.empty else cached["last_edited_time"].max()
+
+        pages = self.notion.query_records_edited_since(since.isoformat() if since is not None else None)
+        fresh = self.parse_pages(pages)
+        if fresh.empty and not full:
+            log.info(f"Record cache {self.path} is up to date ({len(cached)} records).")
+            self._materialize(cached, None, since)
+            return cached
+
+        merged = fresh if cached.empty else pd.concat([cached, fresh], ignore_index=True)
+        merged = merged.drop_duplicates(subset="page_id", keep="last").sort_values("Timestamp", ignore_index=True)
+
+        # Write to a temporary file first so an interrupted run never leaves a corrupt mirror
+        tmp_path = f"{self.path}.tmp"
+        merged.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        log.info(f"Record cache {self.path} refreshed with {len(fresh)} changed records ({len(merged)} total).")
+
+        if full:
+            self.rollups.rebuild(merged, _watermark(merged))
+        else:
+            # Old versions of edited pages, so days they moved away from are recomputed
+            replaced = cached.loc[cached["page_id"].isin(fresh["page_id"])]
+            self._materialize(merged, pd.concat([replaced, fresh], ignore_index=True), since)
+        return merged
+
+    def _materialize(self, records: pd.DataFrame, changed: Optional[pd.DataFrame], since: Optional[pd.Timestamp]):
+        """
+        Brings the daily rollups up to date with the records. Only the days in
+        `changed` are recomputed if the rollups were materialized from the
+        mirror as it was before this refresh; otherwise they are rebuilt.
+        """
+        watermark = _watermark(records)
+        materialized = self.rollups.watermark()
+        if changed is None:
+            if materialized != watermark:
+                self.rollups.rebuild(records, watermark)
+        elif since is not None and materialized == since.isoformat():
+            self.rollups.update(records, changed, watermark)
+        else:
+            self.rollups.rebuild(records, watermark)
+
+    @staticmethod
+    def parse_pages(pages: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Converts Notion page objects into typed columns. Properties missing
+        from a page (e.g. left out by `filter_properties`) become nulls.
+        """
+        columns: Dict[str, List[Any]] = {name: [] for name in CACHE_COLUMNS}
+        for page in pages:
+            try:
+                properties = page["properties"]
+                columns["page_id"].append(page["id"])
+                columns["last_edited_time"].append(page["last_edited_time"])
+                columns["Timestamp"].append((properties["Timestamp"]["date"] or {}).get("start"))
+                columns["Symbol"].append(_select_name(properties.get("Symbol")))
+                columns["Side"].append(_select_name(properties.get("Side")))
+                columns["Size"].append(_number(properties.get("Size")))
+                columns["Fee"].append(_number(properties.get("Fee")))
+                columns["PnL"].append(_number(properties.get("PnL")))
+                columns["Subaccount"].append(_plain_text(properties.get("Subaccount")))
+            except (KeyError, TypeError) as e:
+                page_id = page.get('id', 'N/A')
+                log.warning(f"Skipping record {page_id} due to parsing error: {e}. Check if schema matches.")
+                # Drop whatever was appended for the broken page
+                length = min(len(values) for values in columns.values())
+                for values in columns.values():
+                    del values[length:]
+
+        df = pd.DataFrame(columns)
+        df["last_edited_time"] = pd.to_datetime(df["last_edited_time"], utc=True)
+        df["Timestamp"] = pd.to_datetime(df["Timestamp"], utc=True)
+        for name in ("Size", "Fee", "PnL"):
+            df[name] = df[name].astype("float64")
+        return df
+
+
+def _watermark(records: pd.DataFrame) -> Optional[str]:
+    return records["last_edited_time"].max().isoformat() if not records.empty else None
+
+
+def _number(prop: Optional[Dict[str, Any]]) -> Optional[float]:
+    return prop.get("number") if prop else None
+
+
+def _select_name(prop: Optional[Dict[str, Any]]) -> Optional[str]:
+    return (prop.get("select") or {}).get("name") if prop else None
+
+
+def _plain_text(prop: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not prop:
+        return None
+    return "".join(part.get("plain_text", "") for part in prop.get("rich_text", []))
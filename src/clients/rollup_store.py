@@ -0,0 +1,121 @@
+# src/clients/rollup_store.py
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..utils.logger import log
+
+ROLLUP_COLUMNS = ["Day", "Subaccount", "trades", "pnl", "fees", "wins"]
+# Parquet metadata key holding the record cache's last_edited_time the rollups reflect
+WATERMARK_KEY = b"materialized_through"
+NO_SUBACCOUNT = ""
+
+
+class DailyRollupStore:
+    """
+    Per-day, per-subaccount PnL totals materialized from the record cache.
+    Reports sum these instead of re-aggregating every record, and after a
+    refresh only the days touched by changed records are recomputed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Location of the Parquet file.
+        """
+        self.path = path
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns the materialized rollups, or an empty table if there are none.
+        """
+        rollups, _ = self._read()
+        return rollups
+
+    def watermark(self) -> Optional[str]:
+        """
+        Returns the record cache's `last_edited_time` the rollups were materialized through.
+        """
+        _, watermark = self._read()
+        return watermark
+
+    def rebuild(self, records: pd.DataFrame, watermark: Optional[str]) -> pd.DataFrame:
+        """
+        Recomputes every day from scratch.
+
+        Args:
+            records: Every record in the cache.
+            watermark: Newest `last_edited_time` in `records`.
+        """
+        rollups = self.aggregate(records)
+        self._write(rollups, watermark)
+        log.info(f"Materialized {len(rollups)} daily rollups from {len(records)} records.")
+        return rollups
+
+    def update(self, records: pd.DataFrame, changed: pd.DataFrame, watermark: Optional[str]) -> pd.DataFrame:
+        """
+        Recomputes only the days touched by changed records.
+
+        Args:
+            records: Every record in the cache after the refresh, sorted by Timestamp.
+            changed: The changed records, old and new versions, so days a record
+                moved away from are recomputed too.
+            watermark: Newest `last_edited_time` in `records`.
+        """
+        days = _day(changed["Timestamp"]).dropna().unique()
+        # Records are sorted, so each touched day is a contiguous slice found by binary search
+        timestamps = records["Timestamp"]
+        bounds = zip(timestamps.searchsorted(days, side="left"),
+                     timestamps.searchsorted(days + pd.Timedelta(days=1), side="left"))
+        touched = records.iloc[np.concatenate([np.arange(lo, hi) for lo, hi in bounds] or [np.array([], dtype=int)])]
+        rollups = self.load()
+        rollups = pd.concat(
+            [rollups.loc[~rollups["Day"].isin(days)], self.aggregate(touched)], ignore_index=True
+        ).sort_values(["Day", "Subaccount"], ignore_index=True)
+        self._write(rollups, watermark)
+        log.info(f"Recomputed {len(days)} day(s) of rollups from {len(touched)} records.")
+        return rollups
+
+    @staticmethod
+    def aggregate(records: pd.DataFrame) -> pd.DataFrame:
+        """
+        Sums the records with a PnL value per UTC day and subaccount.
+        """
+        df = records.loc[records["PnL"].notna() & records["Timestamp"].notna()]
+        if df.empty:
+            return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in zip(
+                ROLLUP_COLUMNS, ("datetime64[ns, UTC]", "object", "int64", "float64", "float64", "int64"))})
+        grouped = df.assign(
+            Day=_day(df["Timestamp"]),
+            Subaccount=df["Subaccount"].fillna(NO_SUBACCOUNT),
+            Fee=df["Fee"].fillna(0.0),
+            win=df["PnL"] > 0,
+        ).groupby(["Day", "Subaccount"], sort=True)
+        return grouped.agg(
+            trades=("PnL", "size"), pnl=("PnL", "sum"), fees=("Fee", "sum"), wins=("win", "sum")
+        ).reset_index()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return self.aggregate(pd.DataFrame(columns=["Timestamp", "Subaccount", "Fee", "PnL"])), None
+        table = pq.read_table(self.path)
+        watermark = (table.schema.metadata or {}).get(WATERMARK_KEY)
+        return table.to_pandas(), watermark.decode() if watermark else None
+
+    def _write(self, rollups: pd.DataFrame, watermark: Optional[str]):
+        table = pa.Table.from_pandas(rollups, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if watermark:
+            metadata[WATERMARK_KEY] = watermark.encode()
+        # Write to a temporary file first so an interrupted run never leaves a corrupt file
+        tmp_path = f"{self.path}.tmp"
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        os.replace(tmp_path, self.path)
+
+
+def _day(timestamps: pd.Series) -> pd.Series:
+    return timestamps.dt.floor("D")
@@ -0,0 +1,298 @@
+# src/clients/state_store.py
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    database_id   TEXT NOT NULL,
+    account       TEXT NOT NULL,
+    category      TEXT NOT NULL,
+    high_water_ms INTEGER NOT NULL,
+    PRIMARY KEY (database_id, account, category)
+);
+CREATE TABLE IF NOT EXISTS written_records (
+    database_id    TEXT NOT NULL,
+    transaction_id TEXT NOT NULL,
+    page_id        TEXT,
+    account        TEXT,
+    timestamp_ms   INTEGER,
+    content_hash   TEXT,
+    PRIMARY KEY (database_id, transaction_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    database_id TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       TEXT,
+    PRIMARY KEY (database_id, key)
+);
+CREATE TABLE IF NOT EXISTS backfill_runs (
+    database_id       TEXT NOT NULL,
+    account           TEXT NOT NULL,
+    endpoint          TEXT NOT NULL,
+    start_ms          INTEGER NOT NULL,
+    end_ms            INTEGER NOT NULL,
+    min_first_fill_ms INTEGER,
+    PRIMARY KEY (database_id, account, endpoint)
+);
+CREATE TABLE IF NOT EXISTS backfill_windows (
+    database_id  TEXT NOT NULL,
+    account      TEXT NOT NULL,
+    endpoint     TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    window_end   INTEGER NOT NULL,
+    cursor       TEXT,
+    pages        INTEGER NOT NULL DEFAULT 0,
+    complete     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (database_id, account, endpoint, window_start, window_end)
+);
+CREATE TABLE IF NOT EXISTS backfill_pages (
+    database_id  TEXT NOT NULL,
+    account      TEXT NOT NULL,
+    endpoint     TEXT NOT NULL,
+    window_start INTEGER NOT NULL,
+    window_end   INTEGER NOT NULL,
+    page_number  INTEGER NOT NULL,
+    records      TEXT NOT NULL,
+    PRIMARY KEY (database_id, account, endpoint, window_start, window_end, page_number)
+);
+"""
+
+# SQLite limits the number of host parameters in a single statement
+MAX_QUERY_PARAMS = 500
+
+
+class SyncStateStore:
+    """
+    A local SQLite store for sync state.
+    Keeps the per-account/category high-water mark and every Transaction ID
+    already written to Notion, so cursor and dedup lookups are local index
+    reads instead of Notion queries. It also holds the checkpoints of an
+    unfinished backfill. All state is scoped by Notion database ID.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite database file. It is created if missing.
+        """
+        self.path = path
+        # The store is shared by fetch and write threads, so access is serialized.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(written_records)")}
+            if "content_hash" not in columns:
+                # Stores created before upserts existed
+                self._conn.execute("ALTER TABLE written_records ADD COLUMN content_hash TEXT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_high_water_mark(self, database_id: str, account: str, category: str) -> Optional[int]:
+        """
+        Returns the timestamp (ms) of the newest record synced for the account/category, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water_ms FROM sync_cursors WHERE database_id = ? AND account = ? AND category = ?",
+                (database_id, account, category),
+            ).fetchone()
+        return row[0] if row else None
+
+    def advance_high_water_mark(self, database_id: str, account: str, category: str, timestamp_ms: int):
+        """
+        Moves the high-water mark forward to `timestamp_ms`. It never moves backwards.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO sync_cursors (database_id, account, category, high_water_ms) VALUES (?, ?, ?, ?)
+                ON CONFLICT (database_id, account, category)
+                DO UPDATE SET high_water_ms = MAX(high_water_ms, excluded.high_water_ms)
+                """,
+                (database_id, account, category, int(timestamp_ms)),
+            )
+
+    def known_pages(self, database_id: str, transaction_ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        Looks up which of `transaction_ids` were already written to the database.
+
+        Returns:
+            A dict mapping each known Transaction ID to its (page_id, content_hash).
+            Either value may be None if it was never recorded.
+        """
+        ids = list(transaction_ids)
+        known = {}
+        with self._lock:
+            for i in range(0, len(ids), MAX_QUERY_PARAMS):
+                batch = ids[i:i + MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT transaction_id, page_id, content_hash FROM written_records "
+                    f"WHERE database_id = ? AND transaction_id IN ({placeholders})",
+                    (database_id, *batch),
+                )
+                known.update((row[0], (row[1], row[2])) for row in rows)
+        return known
+
+    def mark_written(self, database_id: str, transaction_id: str, page_id: Optional[str] = None,
+                     account: Optional[str] = None, timestamp_ms: Optional[int] = None,
+                     content_hash: Optional[str] = None):
+        """
+        Records that a Transaction ID now exists in the Notion database.
+        """
+        self.mark_many_written(database_id, [(transaction_id, page_id, account, timestamp_ms, content_hash)])
+
+    def mark_many_written(self, database_id: str,
+                          rows: Iterable[Tuple[str, Optional[str], Optional[str], Optional[int], Optional[str]]]) -> int:
+        """
+        Records a batch of written pages in a single transaction.
+
+        Args:
+            database_id: The Notion database ID.
+            rows: Tuples of (transaction_id, page_id, account, timestamp_ms, content_hash).
+
+        Returns:
+            The number of rows processed.
+        """
+        params = [(database_id, *row) for row in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO written_records (database_id, transaction_id, page_id, account, timestamp_ms, content_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (database_id, transaction_id) DO UPDATE SET
+                    page_id = COALESCE(excluded.page_id, page_id),
+                    account = COALESCE(excluded.account, account),
+                    timestamp_ms = COALESCE(excluded.timestamp_ms, timestamp_ms),
+                    content_hash = COALESCE(excluded.content_hash, content_hash)
+                """,
+                params,
+            )
+        return len(params)
+
+    def get_meta(self, database_id: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE database_id = ? AND key = ?", (database_id, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, database_id: str, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (database_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (database_id, key) DO UPDATE SET value = excluded.value",
+                (database_id, key, value),
+            )
+
+    def get_backfill_run(self, database_id: str, account: str, endpoint: str) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        Returns the (start_ms, end_ms, min_first_fill_ms) of the account's unfinished backfill, or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_ms, end_ms, min_first_fill_ms FROM backfill_runs "
+                "WHERE database_id = ? AND account = ? AND endpoint = ?",
+                (database_id, account, endpoint),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def start_backfill_run(self, database_id: str, account: str, endpoint: str,
+                           start_ms: int, end_ms: int, min_first_fill_ms: Optional[int]):
+        """
+        Records the range of a new backfill, discarding the checkpoints of any previous one.
+        """
+        with self._lock, self._conn:
+            self._clear_backfill(database_id, account, endpoint)
+            self._conn.execute(
+                "INSERT INTO backfill_runs (database_id, account, endpoint, start_ms, end_ms, min_first_fill_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (database_id, account, endpoint, int(start_ms), int(end_ms), min_first_fill_ms),
+            )
+
+    def finish_backfill_run(self, database_id: str, account: str, endpoint: str):
+        """
+        Deletes the backfill range, window checkpoints and spooled pages once the backfill completed.
+        """
+        with self._lock, self._conn:
+            self._clear_backfill(database_id, account, endpoint)
+
+    def get_window_checkpoint(self, database_id: str, account: str, endpoint: str,
+                              window: Tuple[int, int]) -> Tuple[Optional[str], int, bool]:
+        """
+        Returns (next page cursor, pages spooled, complete) for one backfill window.
+        A window that was never started returns (None, 0, False).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor, pages, complete FROM backfill_windows WHERE database_id = ? AND account = ? "
+                "AND endpoint = ? AND window_start = ? AND window_end = ?",
+                (database_id, account, endpoint, int(window[0]), int(window[1])),
+            ).fetchone()
+        return (row[0], row[1], bool(row[2])) if row else (None, 0, False)
+
+    def get_spooled_page(self, database_id: str, account: str, endpoint: str,
+                         window: Tuple[int, int], page_number: int) -> List[Dict[str, Any]]:
+        """
+        Returns a page of records saved by `save_backfill_page`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT records FROM backfill_pages WHERE database_id = ? AND account = ? AND endpoint = ? "
+                "AND window_start = ? AND window_end = ? AND page_number = ?",
+                (database_id, account, endpoint, int(window[0]), int(window[1]), page_number),
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save_backfill_page(self, database_id: str, account: str, endpoint: str, window: Tuple[int, int],
+                           page_number: int, records: List[Dict[str, Any]], next_cursor: Optional[str]):
+        """
+        Spools a fetched page and moves the window's cursor past it in a single transaction,
+        so a resumed backfill never sees one without the other.
+        """
+        key = (database_id, account, endpoint, int(window[0]), int(window[1]))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backfill_pages "
+                "(database_id, account, endpoint, window_start, window_end, page_number, records) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, page_number, json.dumps(records)),
+            )
+            self._conn.execute(
+                """
+                INSERT INTO backfill_windows (database_id, account, endpoint, window_start, window_end, cursor, pages)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (database_id, account, endpoint, window_start, window_end)
+                DO UPDATE SET cursor = excluded.cursor, pages = excluded.pages
+                """,
+                (*key, next_cursor, page_number + 1),
+            )
+
+    def complete_backfill_window(self, database_id: str, account: str, endpoint: str, window: Tuple[int, int]):
+        """
+        Marks a window as fully fetched; a resumed backfill replays it from the spooled pages only.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO backfill_windows (database_id, account, endpoint, window_start, window_end, complete)
+                VALUES (?, ?, ?, ?, ?, 1)
+                ON CONFLICT (database_id, account, endpoint, window_start, window_end)
+                DO UPDATE SET cursor = NULL, complete = 1
+                """,
+                (database_id, account, endpoint, int(window[0]), int(window[1])),
+            )
+
+    def _clear_backfill(self, database_id: str, account: str, endpoint: str):
+        # Must be called with the lock held, inside a transaction
+        for table in ("backfill_runs", "backfill_windows", "backfill_pages"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE database_id = ? AND account = ? AND endpoint = ?",
+                (database_id, account, endpoint),
+            )
@@ -1,4 +1,5 @@
 # src/config.py
+import json
 import os
 from dotenv import load_dotenv
 # We can't use the logger here easily because it might not be configured yet
@@ -21,6 +22,36 @@ def load_config():
         "notion_token": os.getenv("NOTION_TOKEN"),
         "notion_db_id": os.getenv("NOTION_DB_ID"),
         "discord_webhook_url": os.getenv("DISCORD_WEBHOOK_URL"),
+        # Optional HTTP tuning for the Bybit adapter
+        "bybit_http_pool_size": int(os.getenv("BYBIT_HTTP_POOL_SIZE", "10")),
+        "bybit_http_max_retries": int(os.getenv("BYBIT_HTTP_MAX_RETRIES", "3")),
+        # Number of 7-day windows fetched concurrently during a sync
+        "sync_max_workers": int(os.getenv("SYNC_MAX_WORKERS", "4")),
+        # Local SQLite file holding the sync cursor and written Transaction IDs. Empty disables it.
+        "sync_state_db": os.getenv("SYNC_STATE_DB", "sync_state.db"),
+        # Local Parquet mirror of the Notion database used by reports. Empty disables it.
+        "report_cache_path": os.getenv("REPORT_CACHE_PATH", "notion_records.parquet"),
+        # Local Parquet store of Bybit fills used by reports with --report-source bybit
+        "report_bybit_cache_path": os.getenv("REPORT_BYBIT_CACHE_PATH", "bybit_fills.parquet"),
+        # API keys of sub-accounts to sync alongside the main account, as a JSON list
+        "bybit_subaccounts": _load_subaccounts(os.getenv("BYBIT_SUBACCOUNTS")),
+        # Number of accounts synced concurrently
+        "sync_max_accounts": int(os.getenv("SYNC_MAX_ACCOUNTS", "4")),
+        # WebSocket monitor: worker threads, queue size per worker, and what to do when it is full
+        "monitor_workers": int(os.getenv("MONITOR_WORKERS", "2")),
+        "monitor_queue_size": int(os.getenv("MONITOR_QUEUE_SIZE", "1000")),
+        "monitor_queue_policy": os.getenv("MONITOR_QUEUE_POLICY", "drop_oldest"),
+        # Write closing orders to Notion from the monitor's WebSocket streams as they complete
+        "monitor_live_sync": os.getenv("MONITOR_LIVE_SYNC", "false").lower() in ("1", "true", "yes"),
+        # Position updates are only sent on material changes, at most once per interval per position
+        "position_size_change_pct": float(os.getenv("POSITION_SIZE_CHANGE_PCT", "0")),
+        "position_entry_change_pct": float(os.getenv("POSITION_ENTRY_CHANGE_PCT", "0.1")),
+        "position_upnl_change": float(os.getenv("POSITION_UPNL_CHANGE", "10")),
+        "position_min_interval": float(os.getenv("POSITION_MIN_INTERVAL", "30")),
+        # Metrics written at the end of each sync run (JSON, or Prometheus text for .prom). Empty disables it.
+        "metrics_file": os.getenv("METRICS_FILE", ""),
+        # Port on which the monitor serves Prometheus metrics at /metrics. 0 disables it.
+        "metrics_port": int(os.getenv("METRICS_PORT", "0")),
     }
 
     # Validate that essential variables are set
@@ -30,10 +61,30 @@ def load_config():
     if missing_vars:
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
-    # The discord webhook is optional, so no validation for it.
+    # The discord webhook and HTTP tuning values are optional, so no validation for them.
     
     return config
 
+def _load_subaccounts(raw):
+    """
+    Parses the BYBIT_SUBACCOUNTS JSON list, e.g.
+    [{"name": "Scalping", "api_key": "...", "api_secret": "..."}].
+    Each entry may also carry the sub-member "uid" to match it when "name" is not its username.
+    """
+    if not raw:
+        return []
+    try:
+        accounts = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"BYBIT_SUBACCOUNTS is not valid JSON: {e}")
+    if not isinstance(accounts, list):
+        raise ValueError("BYBIT_SUBACCOUNTS must be a JSON list of accounts.")
+    for account in accounts:
+        missing = [key for key in ("name", "api_key", "api_secret") if not isinstance(account, dict) or not account.get(key)]
+        if missing:
+            raise ValueError(f"BYBIT_SUBACCOUNTS entry is missing: {', '.join(missing)}")
+    return accounts
+
 # Load configuration once when the module is imported
 try:
     settings = load_config()
@@ -1,18 +1,32 @@
 # src/main.py
+import argparse
+import asyncio
 import sys
 import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 # Adjust the Python path to include the project root
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.config import settings
 from src.adapters.bybit import BybitAdapter
+from src.adapters.bybit_async import AsyncBybitAdapter
 from src.clients.notion import NotionClient
-from src.services.sync import SyncService
+from src.clients.notion_async import AsyncNotionWriter
+from src.clients.record_cache import NotionRecordCache
+from src.clients.state_store import SyncStateStore
+from src.services.async_sync import sync_accounts
+from src.services.orchestrator import MultiAccountSyncOrchestrator
+from src.services.sync import ACCOUNT_NAME, SyncService
+from src.services.analytics import DIMENSIONS
+from src.services.bybit_record_cache import BybitRecordCache
 from src.services.reporter import ReporterService
 from src.utils.exceptions import ApiException, NotionApiException
 from src.utils.logger import log
 from src.utils.alerter import send_discord_alert
+from src.utils.metrics import metrics
 
 def main():
     """
@@ -24,31 +38,118 @@ def main():
         sys.exit(1)
 
     # 2. Argument parsing
-    if len(sys.argv) > 1 and (sys.argv[1] == '--report' or sys.argv[1] == '--report-excel'):
-        run_reporter(output_format='excel' if sys.argv[1] == '--report-excel' else 'csv')
+    args = parse_args()
+    if args.report or args.report_excel:
+        run_reporter(
+            output_format='excel' if args.report_excel else 'csv',
+            full_refresh=args.full_refresh,
+            start=args.date_from,
+            # --to is inclusive, the query bound is exclusive
+            end=args.date_to + timedelta(days=1) if args.date_to else None,
+            subaccount=args.subaccount,
+            dimensions=args.dimensions,
+            source=args.report_source
+        )
     else:
-        run_sync()
+        run_sync(streaming=args.stream, use_async=args.use_async)
+
+def parse_args() -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description="Sync Bybit trades to Notion or generate a PnL report.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--report', action='store_true', help="Generate a monthly PnL report in CSV format.")
+    mode.add_argument('--report-excel', action='store_true', help="Generate a monthly PnL report in Excel format.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write finished orders to Notion while later windows are still downloading.")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Run the sync for every account on a single asyncio event loop.")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Rebuild the local report cache from every Notion page before reporting.")
+    parser.add_argument('--from', dest='date_from', type=parse_date, metavar='YYYY-MM-DD',
+                        help="Only report records on or after this date (UTC).")
+    parser.add_argument('--to', dest='date_to', type=parse_date, metavar='YYYY-MM-DD',
+                        help="Only report records on or before this date (UTC).")
+    parser.add_argument('--subaccount', help="Only report records of this subaccount, e.g. 'Main Account'.")
+    parser.add_argument('--report-source', choices=('notion', 'bybit'), default='notion',
+                        help="Read report records from Notion (default) or straight from the Bybit transaction log.")
+    parser.add_argument('--dimensions', nargs='*', choices=sorted(DIMENSIONS), metavar='DIMENSION',
+                        help="Generate the PnL analytics report instead of the monthly one, broken down "
+                             f"by these dimensions ({', '.join(sorted(DIMENSIONS))}).")
+    # Ignore unknown arguments so wrappers (e.g. cron scripts, Lambda) can pass their own.
+    args, _ = parser.parse_known_args()
+    return args
+
+def parse_date(value: str) -> datetime:
+    """Parses a YYYY-MM-DD command line date as midnight UTC."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD.")
 
-def run_sync():
+def build_bybit_adapter(api_key: str, api_secret: str) -> BybitAdapter:
+    """Creates a Bybit adapter with its own rate-limit budget for one account."""
+    return BybitAdapter(
+        api_key=api_key,
+        api_secret=api_secret,
+        pool_size=settings["bybit_http_pool_size"],
+        max_retries=settings["bybit_http_max_retries"]
+    )
+
+def build_async_bybit_adapter(api_key: str, api_secret: str) -> AsyncBybitAdapter:
+    """Creates an asyncio Bybit adapter with its own rate-limit budget for one account."""
+    return AsyncBybitAdapter(
+        api_key=api_key,
+        api_secret=api_secret,
+        pool_size=settings["bybit_http_pool_size"],
+        max_retries=settings["bybit_http_max_retries"]
+    )
+
+def run_sync(streaming: bool = False, use_async: bool = False):
     """Runs the data synchronization process."""
     log.info("-----------------------------------------")
     log.info("--- Bybit to Notion Sync Service ---")
     log.info("-----------------------------------------")
+    started = time.perf_counter()
     try:
         log.info("Initializing Bybit and Notion clients for sync...")
-        bybit_adapter = BybitAdapter(
-            api_key=settings["bybit_api_key"],
-            api_secret=settings["bybit_api_secret"]
-        )
+        state_store = SyncStateStore(settings["sync_state_db"]) if settings["sync_state_db"] else None
         notion_client = NotionClient(
             token=settings["notion_token"],
-            database_id=settings["notion_db_id"]
+            database_id=settings["notion_db_id"],
+            state_store=state_store
         )
-        sync_service = SyncService(
-            exchange_adapter=bybit_adapter,
-            notion_client=notion_client
-        )
-        sync_service.run_sync()
+        if use_async:
+            # Async mode always writes finished orders while later windows download
+            accounts = [(ACCOUNT_NAME, settings["bybit_api_key"], settings["bybit_api_secret"])]
+            accounts += [(a["name"], a["api_key"], a["api_secret"]) for a in settings["bybit_subaccounts"]]
+            asyncio.run(sync_accounts(
+                [(name, build_async_bybit_adapter(key, secret)) for name, key, secret in accounts],
+                notion_client=notion_client,
+                notion_writer=AsyncNotionWriter(notion_client, token=settings["notion_token"]),
+                max_workers=settings["sync_max_workers"],
+                state_store=state_store
+            ))
+            return
+
+        bybit_adapter = build_bybit_adapter(settings["bybit_api_key"], settings["bybit_api_secret"])
+        if settings["bybit_subaccounts"]:
+            sync_service = MultiAccountSyncOrchestrator(
+                main_adapter=bybit_adapter,
+                notion_client=notion_client,
+                subaccounts=settings["bybit_subaccounts"],
+                adapter_factory=build_bybit_adapter,
+                max_accounts=settings["sync_max_accounts"],
+                max_workers=settings["sync_max_workers"],
+                state_store=state_store
+            )
+        else:
+            sync_service = SyncService(
+                exchange_adapter=bybit_adapter,
+                notion_client=notion_client,
+                max_workers=settings["sync_max_workers"],
+                state_store=state_store
+            )
+        sync_service.run_sync(streaming=streaming)
     except (ApiException, NotionApiException) as e:
         error_message = f"An API error occurred during synchronization: {e}"
         log.error(error_message)
@@ -59,26 +160,72 @@ def run_sync():
         log.critical(error_message, exc_info=True)
         send_discord_alert(settings.get("discord_webhook_url"), error_message)
         sys.exit(1)
+    finally:
+        metrics.observe("sync_run_seconds", time.perf_counter() - started)
+        export_metrics()
+
+def export_metrics():
+    """Logs where the run spent its time and writes the metrics file, if configured."""
+    metrics.log_summary()
+    if settings.get("metrics_file"):
+        try:
+            metrics.write(settings["metrics_file"])
+        except OSError as e:
+            log.error(f"Could not write metrics to {settings['metrics_file']}: {e}")
 
-def run_reporter(output_format: str):
+def run_reporter(output_format: str, full_refresh: bool = False, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, subaccount: Optional[str] = None,
+                 dimensions: Optional[List[str]] = None, source: str = 'notion'):
     """Runs the report generation process."""
     log.info("-----------------------------------------")
-    log.info("--- Notion PnL Report Generator ---")
+    log.info("--- PnL Report Generator ---")
     log.info("-----------------------------------------")
+    adapters = []
     try:
-        log.info("Initializing Notion client for reporting...")
-        notion_client = NotionClient(
-            token=settings["notion_token"],
-            database_id=settings["notion_db_id"]
+        if source == 'bybit':
+            log.info("Initializing Bybit clients for reporting...")
+            accounts = [(ACCOUNT_NAME, settings["bybit_api_key"], settings["bybit_api_secret"])]
+            accounts += [(a["name"], a["api_key"], a["api_secret"]) for a in settings["bybit_subaccounts"]]
+            adapters = [(name, build_bybit_adapter(key, secret)) for name, key, secret in accounts]
+            notion_client = None
+            record_cache = BybitRecordCache(adapters, path=settings["report_bybit_cache_path"],
+                                            max_workers=settings["sync_max_workers"])
+        else:
+            log.info("Initializing Notion client for reporting...")
+            notion_client = NotionClient(
+                token=settings["notion_token"],
+                database_id=settings["notion_db_id"]
+            )
+            record_cache = None
+            if settings["report_cache_path"]:
+                record_cache = NotionRecordCache(notion_client, path=settings["report_cache_path"])
+        reporter_service = ReporterService(notion_client=notion_client, record_cache=record_cache)
+        if dimensions is not None:
+            reporter_service.generate_analytics_report(
+                dimensions=dimensions,
+                output_format=output_format,
+                full_refresh=full_refresh,
+                start=start,
+                end=end,
+                subaccount=subaccount
+            )
+            return
+        reporter_service.generate_pnl_report(
+            output_format=output_format,
+            full_refresh=full_refresh,
+            start=start,
+            end=end,
+            subaccount=subaccount
         )
-        reporter_service = ReporterService(notion_client=notion_client)
-        reporter_service.generate_pnl_report(output_format=output_format)
-    except (NotionApiException) as e:
+    except (ApiException, NotionApiException) as e:
         log.error(f"An API error occurred during report generation: {e}")
         sys.exit(1)
     except Exception as e:
         log.critical(f"An unexpected error occurred during report generation: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        for _, adapter in adapters:
+            adapter.close()
 
 if __name__ == "__main__":
     main()
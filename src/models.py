@@ -0,0 +1,36 @@
+# src/models.py
+from dataclasses import dataclass, fields
+
+
+@dataclass(slots=True)
+class OrderRecord:
+    """
+    One closing order, aggregated from its fills. This is the record the sync
+    writes to Notion and the reports read back. Slots keep each instance
+    compact, which matters when a backfill holds hundreds of thousands of them.
+    """
+    symbol: str
+    side: str
+    size: float
+    price: float  # Size-weighted average fill price
+    fee: float
+    pnl: float
+    timestamp: int  # Time of the last fill, in milliseconds
+    subaccount: str
+    id: str  # Order ID, written as the Notion Transaction ID
+
+
+# Field names in declaration order, e.g. the columns of a table of records
+RECORD_FIELDS = tuple(field.name for field in fields(OrderRecord))
+
+# Record field -> record cache column the reports read
+REPORT_COLUMNS = {
+    "id": "page_id",
+    "timestamp": "Timestamp",
+    "symbol": "Symbol",
+    "side": "Side",
+    "size": "Size",
+    "fee": "Fee",
+    "pnl": "PnL",
+    "subaccount": "Subaccount",
+}
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional
+from ..utils.logger import log
+
+# What to do when a worker's queue is full
+DROP_OLDEST = "drop_oldest"    # Discard the oldest queued event to make room
+DROP_NEWEST = "drop_newest"    # Discard the incoming event
+MERGE = "merge"                # Replace a queued event with the same merge key, else drop the oldest
+POLICIES = (DROP_OLDEST, DROP_NEWEST, MERGE)
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 1000
+DROP_WARNING_INTERVAL = 10.0  # seconds between backpressure warnings
+
+class _Lane:
+    """A bounded FIFO of [topic, event, submitted_at, merge_key] slots served by one worker thread."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.slots = deque()
+        self.by_merge_key: Dict[Hashable, list] = {}
+        self.cond = threading.Condition()
+
+class EventDispatcher:
+    """
+    Hands WebSocket events to a pool of worker threads through bounded queues,
+    so the pybit callback thread never waits on formatting or network I/O.
+    Events with the same partition key (e.g. a symbol) go to the same worker
+    and are handled in order. When a queue is full, the configured policy
+    decides what is dropped or merged, and the counters in `stats()` record it.
+    """
+
+    def __init__(self, handler: Callable[[str, Dict[str, Any]], None], workers: int = DEFAULT_WORKERS,
+                 max_queue: int = DEFAULT_QUEUE_SIZE, policy: str = DROP_OLDEST):
+        """
+        Args:
+            handler: Called as handler(topic, event) on a worker thread.
+            workers: Number of worker threads.
+            max_queue: Maximum number of queued events per worker.
+            policy: One of DROP_OLDEST, DROP_NEWEST or MERGE.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of: {', '.join(POLICIES)}")
+        self.handler = handler
+        self.policy = policy
+        self._lanes = [_Lane(max(1, max_queue)) for _ in range(max(1, workers))]
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0, "processed": 0, "dropped": 0, "merged": 0, "errors": 0,
+            "max_depth": 0, "max_lag_ms": 0.0, "total_lag_ms": 0.0,
+        }
+        self._last_drop_warning = 0.0
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, args=(lane,), name=f"monitor-worker-{i}", daemon=True)
+            for i, lane in enumerate(self._lanes)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, topic: str, event: Dict[str, Any], key: Optional[Hashable] = None,
+               merge_key: Optional[Hashable] = None) -> bool:
+        """
+        Queues an event without blocking.
+
+        Args:
+            topic: Passed to the handler, e.g. 'order' or 'position'.
+            event: The event payload.
+            key: Partition key; events with the same key are handled in order.
+            merge_key: Under the MERGE policy, a queued event with the same merge key
+                is replaced by this one instead of both being handled.
+
+        Returns:
+            False if the event was dropped.
+        """
+        lane = self._lanes[hash(key) % len(self._lanes)] if key is not None else self._lanes[0]
+        dropped = merged = False
+        with lane.cond:
+            pending = lane.by_merge_key.get(merge_key) if self.policy == MERGE and merge_key is not None else None
+            if pending is not None:
+                pending[1] = event
+                merged = True
+            elif len(lane.slots) >= lane.maxsize and self.policy == DROP_NEWEST:
+                dropped = True
+            else:
+                if len(lane.slots) >= lane.maxsize:
+                    self._discard_oldest(lane)
+                    dropped = True
+                slot = [topic, event, time.monotonic(), merge_key]
+                lane.slots.append(slot)
+                if self.policy == MERGE and merge_key is not None:
+                    lane.by_merge_key[merge_key] = slot
+                lane.cond.notify()
+            depth = len(lane.slots)
+
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            self._stats["merged"] += merged
+            self._stats["dropped"] += dropped
+            self._stats["max_depth"] = max(self._stats["max_depth"], depth)
+        if dropped:
+            self._warn_backpressure()
+        return not (dropped and self.policy == DROP_NEWEST)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the backpressure counters: events submitted, processed, dropped and
+        merged, handler errors, the current and maximum queue depth, and the
+        average and maximum time events spent queued.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["depth"] = sum(len(lane.slots) for lane in self._lanes)
+        stats["avg_lag_ms"] = stats.pop("total_lag_ms") / stats["processed"] if stats["processed"] else 0.0
+        return stats
+
+    def close(self, timeout: float = 10.0):
+        """
+        Handles the events still queued and stops the workers.
+        """
+        self._stop.set()
+        for lane in self._lanes:
+            with lane.cond:
+                lane.cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    @staticmethod
+    def _discard_oldest(lane: _Lane):
+        slot = lane.slots.popleft()
+        if lane.by_merge_key.get(slot[3]) is slot:
+            del lane.by_merge_key[slot[3]]
+
+    def _warn_backpressure(self):
+        now = time.monotonic()
+        if now - self._last_drop_warning < DROP_WARNING_INTERVAL:
+            return
+        self._last_drop_warning = now
+        stats = self.stats()
+        log.warning(f"Monitor queue full ({self.policy}): {stats['dropped']} event(s) dropped so far, "
+                    f"{stats['depth']} queued, max wait {stats['max_lag_ms']:.0f}ms.")
+
+    def _run(self, lane: _Lane):
+        while True:
+            with lane.cond:
+                while not lane.slots and not self._stop.is_set():
+                    lane.cond.wait()
+                if not lane.slots:
+                    return
+                slot = lane.slots.popleft()
+                if lane.by_merge_key.get(slot[3]) is slot:
+                    del lane.by_merge_key[slot[3]]
+
+            topic, event, submitted_at, _ = slot
+            lag_ms = (time.monotonic() - submitted_at) * 1000
+            error = False
+            try:
+                self.handler(topic, event)
+            except Exception as e:
+                error = True
+                log.error(f"Error handling {topic} event: {e}")
+
+            with self._stats_lock:
+                self._stats["processed"] += 1
+                self._stats["errors"] += error
+                self._stats["total_lag_ms"] += lag_ms
+                self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], lag_ms)
@@ -1,29 +1,162 @@
+import queue
+import threading
+import time
 import requests
-import json
+from collections import deque
 from datetime import datetime
 from ..config import settings
 from ..utils.logger import log
+from ..utils.metrics import metrics
+
+# Discord accepts at most 10 embeds per webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+# Partial fills of the same order arriving within this window are sent as one embed
+FILL_COALESCE_SECONDS = 2.0
+# How long the worker waits for more embeds before sending a partly filled message
+BATCH_LINGER_SECONDS = 0.5
+MAX_SEND_RETRIES = 3
+DEFAULT_RETRY_AFTER = 1.0  # seconds, used when a 429 carries no retry_after
+REQUEST_TIMEOUT = 10  # seconds
+# Embeds waiting for delivery, and orders whose partial fills are being merged. When either
+# is full, the send_* calls wait, so a slow webhook backs up the monitor's bounded queues.
+# Fills are held for FILL_COALESCE_SECONDS even when Discord keeps up, so allow many more.
+MAX_QUEUED_EMBEDS = 5 * MAX_EMBEDS_PER_MESSAGE
+MAX_PENDING_FILLS = 10000
 
 class DiscordNotifier:
+    """
+    Sends monitor notifications to a Discord webhook from a background worker.
+    The send_* methods only queue an embed; they wait only while the queue is
+    full, i.e. while the webhook is slower than the events arrive. The worker
+    packs up to 10 embeds per webhook message and follows Discord's rate limit
+    headers. Partial fills of one order are merged into a single embed.
+    """
+
     def __init__(self):
         self.webhook_url = settings.get("discord_webhook_url")
+        self._queue = queue.Queue(maxsize=MAX_QUEUED_EMBEDS)
+        # orderId -> merged partial fills waiting for the coalescing window to close
+        self._fills = {}
+        self._fills_changed = threading.Condition()
+        # Fill embeds taken from self._fills and not sent yet; only used by the worker
+        self._ready_fills = deque()
+        self._blocked_until = 0.0  # Monotonic time before which no message may be sent
+        self._stop = threading.Event()
+        self._worker = None
         if not self.webhook_url:
             log.warning("No Discord Webhook URL found in config. Notifications will be disabled.")
-    
+            return
+
+        self._session = requests.Session()
+        self._worker = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+        self._worker.start()
+
+    def close(self, timeout: float = 10.0):
+        """
+        Sends everything still queued (including pending fills) and stops the worker.
+        """
+        if not self._worker:
+            return
+        self._stop.set()
+        self._worker.join(timeout)
+        self._session.close()
+
     def _send(self, payload: dict):
+        """
+        Queues the embeds of a payload for delivery.
+        """
         if not self.webhook_url:
             return
-        
-        try:
-            response = requests.post(
-                self.webhook_url,
-                data=json.dumps(payload),
-                headers={"Content-Type": "application/json"}
-            )
-            if response.status_code != 204:
+        for embed in payload.get("embeds", []):
+            self._queue.put(embed)
+
+    def _run(self):
+        while True:
+            stopping = self._stop.is_set()
+            # Fills stay in self._fills, and hold back new ones, until the previous ones are sent
+            if stopping or not self._ready_fills:
+                self._flush_fills(force=stopping)
+            embeds = self._next_batch()
+            if embeds:
+                self._post(embeds)
+            elif stopping:
+                return
+
+    def _next_batch(self) -> list:
+        """
+        Takes up to MAX_EMBEDS_PER_MESSAGE embeds from the queue, waiting briefly for more.
+        """
+        embeds = []
+        while self._ready_fills and len(embeds) < MAX_EMBEDS_PER_MESSAGE:
+            embeds.append(self._ready_fills.popleft())
+        deadline = time.monotonic() + BATCH_LINGER_SECONDS
+        while len(embeds) < MAX_EMBEDS_PER_MESSAGE:
+            timeout = deadline - time.monotonic()
+            try:
+                embeds.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return embeds
+
+    def _post(self, embeds: list):
+        """
+        Posts one webhook message, waiting out Discord's rate limit when needed.
+        """
+        for attempt in range(MAX_SEND_RETRIES + 1):
+            delay = self._blocked_until - time.monotonic()
+            if delay > 0:
+                metrics.inc("rate_limit_wait_seconds_total", delay, client="discord", endpoint="webhook")
+                time.sleep(delay)
+
+            try:
+                with metrics.timer("request_seconds", client="discord", endpoint="webhook"):
+                    response = self._session.post(self.webhook_url, json={"embeds": embeds}, timeout=REQUEST_TIMEOUT)
+            except requests.exceptions.RequestException as e:
+                log.error(f"Error sending Discord notification: {e}")
+                return
+
+            self._update_rate_limit(response)
+            if response.status_code == 429 and attempt < MAX_SEND_RETRIES:
+                continue
+            if response.status_code not in (200, 204):
                 log.error(f"Failed to send Discord notification: {response.status_code} - {response.text}")
-        except Exception as e:
-            log.error(f"Error sending Discord notification: {e}")
+            else:
+                metrics.inc("discord_embeds_sent_total", len(embeds))
+            return
+
+    def _update_rate_limit(self, response: requests.Response):
+        """
+        Pauses sending until the webhook's rate limit bucket resets, if it is exhausted.
+        """
+        reset_after = None
+        if response.status_code == 429:
+            metrics.inc("rate_limit_hits_total", client="discord")
+            try:
+                reset_after = float(response.json().get("retry_after", DEFAULT_RETRY_AFTER))
+            except (ValueError, AttributeError):
+                reset_after = DEFAULT_RETRY_AFTER
+            log.warning(f"Discord rate limit hit. Waiting {reset_after:.2f}s...")
+        elif response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(response.headers.get("X-RateLimit-Reset-After", DEFAULT_RETRY_AFTER))
+            except ValueError:
+                reset_after = DEFAULT_RETRY_AFTER
+        if reset_after is not None:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + reset_after)
+
+    def _flush_fills(self, force: bool = False):
+        """
+        Takes one embed per order whose coalescing window has closed or which is fully filled.
+        """
+        now = time.monotonic()
+        with self._fills_changed:
+            due = [order_id for order_id, fill in self._fills.items()
+                   if force or fill["done"] or now - fill["first_seen"] >= FILL_COALESCE_SECONDS]
+            fills = [self._fills.pop(order_id) for order_id in due]
+            if fills:
+                self._fills_changed.notify_all()
+        # Not put on self._queue: the worker is its only reader and must never wait on it
+        self._ready_fills.extend(self._fill_embed(fill) for fill in fills)
 
     def send_order_new(self, order_data: dict):
         """
@@ -57,25 +190,55 @@ class DiscordNotifier:
     def send_order_filled(self, trade_data: dict):
         """
         Triggered when an order is filled (Execution).
+        Partial fills of the same order are merged and sent once the order is
+        fully filled or FILL_COALESCE_SECONDS after its first fill. A fill of a
+        new order waits while MAX_PENDING_FILLS orders are already pending.
         """
-        symbol = trade_data.get("symbol")
-        side = trade_data.get("side")
-        price = trade_data.get("execPrice")
-        qty = trade_data.get("execQty")
-        
+        if not self.webhook_url:
+            return
+
+        qty = float(trade_data.get("execQty") or 0)
+        price = float(trade_data.get("execPrice") or 0)
+        order_id = trade_data.get("orderId") or trade_data.get("execId")
+
+        with self._fills_changed:
+            while order_id not in self._fills and len(self._fills) >= MAX_PENDING_FILLS:
+                self._fills_changed.wait()
+            fill = self._fills.get(order_id)
+            if fill is None:
+                fill = self._fills[order_id] = {
+                    "symbol": trade_data.get("symbol"),
+                    "side": trade_data.get("side"),
+                    "qty": 0.0,
+                    "value": 0.0,
+                    "count": 0,
+                    "first_seen": time.monotonic(),
+                    "done": False,
+                }
+            fill["qty"] += qty
+            fill["value"] += qty * price
+            fill["count"] += 1
+            fill["done"] = fill["done"] or trade_data.get("leavesQty") == "0"
+
+    @staticmethod
+    def _fill_embed(fill: dict) -> dict:
+        side = fill["side"]
+        avg_price = fill["value"] / fill["qty"] if fill["qty"] else 0.0
         color = 3066993 if side == "Buy" else 15158332
-        
-        embed = {
-            "title": f"⚡ [成交] {symbol} {side} 已進場/加倉",
+
+        fields = [
+            {"name": "成交價格", "value": _format_number(avg_price), "inline": True},
+            {"name": "成交數量", "value": _format_number(fill["qty"]), "inline": True},
+        ]
+        if fill["count"] > 1:
+            fields.append({"name": "成交筆數", "value": str(fill["count"]), "inline": True})
+
+        return {
+            "title": f"⚡ [成交] {fill['symbol']} {side} 已進場/加倉",
             "color": color,
-            "fields": [
-                {"name": "成交價格", "value": str(price), "inline": True},
-                {"name": "成交數量", "value": str(qty), "inline": True},
-            ],
+            "fields": fields,
             "footer": {"text": f"Bybit Monitor • {datetime.now().strftime('%H:%M:%S')}"}
         }
-        
-        self._send({"embeds": [embed]})
 
     def send_order_cancel(self, order_data: dict):
         """
@@ -96,7 +259,7 @@ class DiscordNotifier:
         
     def send_position_update(self, pos_data: dict):
         """
-        Sends snapshot of current position.
+        Sends snapshot of current position, or a closing notice once its size is 0.
         """
         symbol = pos_data.get("symbol")
         side = pos_data.get("side")
@@ -104,9 +267,15 @@ class DiscordNotifier:
         entry_price = pos_data.get("avgPrice")
         unrealized_pnl = float(pos_data.get("unrealisedPnl", 0))
         
-        if float(size) == 0:
-            # Position closed
-            return 
+        if float(size or 0) == 0:
+            # Position closed; Bybit clears the side of a flat position
+            embed = {
+                "title": f"🏁 [平倉] {symbol} 持倉已平倉",
+                "color": 9807270,
+                "footer": {"text": f"Bybit Monitor • {datetime.now().strftime('%H:%M:%S')}"}
+            }
+            self._send({"embeds": [embed]})
+            return
             
         emoji = "🟢" if unrealized_pnl >= 0 else "🔴"
         color = 3066993 if unrealized_pnl >= 0 else 15158332
@@ -123,3 +292,7 @@ class DiscordNotifier:
         }
         
         self._send({"embeds": [embed]})
+
+def _format_number(value: float) -> str:
+    """Formats a float without trailing zeros, e.g. 0.01 instead of 0.01000000."""
+    return f"{value:.8f}".rstrip("0").rstrip(".") or "0"
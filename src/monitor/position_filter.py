@@ -0,0 +1,95 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Defaults for what counts as a material position change
+DEFAULT_SIZE_CHANGE_PCT = 0.0      # Any change in size
+DEFAULT_ENTRY_CHANGE_PCT = 0.1     # Entry price moved by at least 0.1%
+DEFAULT_UPNL_CHANGE = 10.0         # Unrealised PnL moved by at least 10 USDT
+DEFAULT_MIN_INTERVAL = 30.0        # Seconds between notifications for one position
+
+class PositionChangeFilter:
+    """
+    Decides which position snapshots are worth a notification.
+    Bybit re-sends a position on every mark price move, so the last notified
+    state of every position is cached and a snapshot only passes when its size,
+    side, entry price or unrealised PnL changed materially since then. On top of
+    that, a position is notified at most once per `min_interval` seconds;
+    openings, closings and side flips always pass. A closing is only passed for
+    a position that was notified before, so the empty snapshots Bybit repeats
+    for flat positions are not sent.
+    """
+
+    def __init__(self, size_change_pct: float = DEFAULT_SIZE_CHANGE_PCT,
+                 entry_change_pct: float = DEFAULT_ENTRY_CHANGE_PCT,
+                 upnl_change: float = DEFAULT_UPNL_CHANGE,
+                 min_interval: float = DEFAULT_MIN_INTERVAL):
+        """
+        Args:
+            size_change_pct: Minimum size change, in percent of the last notified size.
+            entry_change_pct: Minimum entry price change, in percent.
+            upnl_change: Minimum absolute unrealised PnL change, in settlement currency.
+            min_interval: Minimum seconds between two notifications for the same position.
+        """
+        self.size_change_pct = size_change_pct
+        self.entry_change_pct = entry_change_pct
+        self.upnl_change = upnl_change
+        self.min_interval = min_interval
+        # (symbol, positionIdx) -> last notified state
+        self._positions: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.passed = 0
+        self.suppressed = 0
+
+    def should_notify(self, pos_data: Dict[str, Any]) -> bool:
+        """
+        Returns True if the snapshot should be sent, and remembers it as the last notified state.
+        A closed position (size 0) is sent once and its cached state cleared.
+        """
+        key = (pos_data.get("symbol"), pos_data.get("positionIdx"))
+        size = _to_float(pos_data.get("size"))
+        state = {
+            "side": pos_data.get("side"),
+            "size": size,
+            "entry": _to_float(pos_data.get("avgPrice")),
+            "upnl": _to_float(pos_data.get("unrealisedPnl")),
+            "at": time.monotonic(),
+        }
+
+        with self._lock:
+            last = self._positions.get(key)
+            if size == 0:
+                # Only a position that was reported gets a closing notification
+                notify = self._positions.pop(key, None) is not None
+            elif last is None or last["side"] != state["side"]:
+                notify = True
+            elif state["at"] - last["at"] < self.min_interval:
+                notify = False
+            else:
+                notify = self._changed(last, state)
+
+            if notify:
+                if size != 0:
+                    self._positions[key] = state
+                self.passed += 1
+            else:
+                self.suppressed += 1
+        return notify
+
+    def _changed(self, last: Dict[str, Any], state: Dict[str, Any]) -> bool:
+        if _pct_change(last["size"], state["size"]) > self.size_change_pct:
+            return True
+        if _pct_change(last["entry"], state["entry"]) >= self.entry_change_pct and state["entry"] != last["entry"]:
+            return True
+        return abs(state["upnl"] - last["upnl"]) >= self.upnl_change
+
+def _to_float(value: Optional[Any]) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _pct_change(old: float, new: float) -> float:
+    if old == 0:
+        return 0.0 if new == 0 else float("inf")
+    return abs(new - old) / abs(old) * 100
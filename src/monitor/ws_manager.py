@@ -1,33 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
 from pybit.unified_trading import WebSocket
 from time import sleep
+from .dispatcher import EventDispatcher
 from .notifier import DiscordNotifier
+from .position_filter import PositionChangeFilter
+from ..adapters.bybit import BybitAdapter
+from ..clients.notion import NotionClient
+from ..clients.state_store import SyncStateStore
 from ..config import settings
+from ..services.live_sync import LiveSyncService
+from ..utils.exceptions import ApiException
 from ..utils.logger import log
+from ..utils.metrics import metrics
+
+CONNECTION_CHECK_SECONDS = 5       # How often the socket is checked for a disconnect or reconnect
+STATS_INTERVAL_SECONDS = 60
+SEEN_EXEC_IDS_KEPT = 10000         # Execution IDs remembered to drop duplicates after a backfill
+EXECUTION_CATEGORY = "linear"
+MAX_BACKFILL_MS = 7 * 24 * 60 * 60 * 1000  # Longest range the execution list accepts
 
 class BybitMonitor:
     def __init__(self):
         self.notifier = DiscordNotifier()
-        self.ws = WebSocket(
-            testnet=False,
-            channel_type="private",
-            api_key=settings["bybit_api_key"],
-            api_secret=settings["bybit_api_secret"],
+        self.position_filter = PositionChangeFilter(
+            size_change_pct=settings.get("position_size_change_pct", 0.0),
+            entry_change_pct=settings.get("position_entry_change_pct", 0.1),
+            upnl_change=settings.get("position_upnl_change", 10.0),
+            min_interval=settings.get("position_min_interval", 30.0),
+        )
+        # Callbacks only enqueue; formatting and delivery run on the dispatcher's workers
+        self.dispatcher = EventDispatcher(
+            self._handle_event,
+            workers=settings.get("monitor_workers", 2),
+            max_queue=settings.get("monitor_queue_size", 1000),
+            policy=settings.get("monitor_queue_policy", "drop_oldest"),
         )
+        # Optionally write closing orders to Notion as they complete
+        self.live_sync = None
+        if settings.get("monitor_live_sync"):
+            state_store = SyncStateStore(settings["sync_state_db"]) if settings["sync_state_db"] else None
+            notion_client = NotionClient(
+                token=settings["notion_token"],
+                database_id=settings["notion_db_id"],
+                state_store=state_store
+            )
+            self.live_sync = LiveSyncService(notion_client)
+        # REST client used to backfill executions missed while the socket was down
+        self.adapter = BybitAdapter(api_key=settings["bybit_api_key"], api_secret=settings["bybit_api_secret"])
+        self._seen_exec_ids = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._last_healthy_ms = int(time.time() * 1000)
+        self._disconnected = False
+        self._socket = None
+        # Created by start(); constructing it opens the connection
+        self.ws = None
 
     def _on_order_update(self, message):
         """
         Callback for order stream.
         """
         data = message.get("data", [])
+        if self.live_sync:
+            self.live_sync.on_orders(data)
         for order in data:
             status = order.get("orderStatus")
             
             # log.debug(f"Order Update: {order.get('symbol')} - {status}")
             
-            if status == "New":
-                self.notifier.send_order_new(order)
-            elif status == "Cancelled":
-                self.notifier.send_order_cancel(order)
+            if status in ("New", "Cancelled"):
+                self.dispatcher.submit("order", order, key=order.get("symbol"))
             # We handle 'Filled' via execution stream for better detail, 
             # though 'Filled' order updates also come here.
             # To avoid double notification, we might ignore Filled here 
@@ -38,10 +81,74 @@ class BybitMonitor:
         """
         Callback for execution stream (trades).
         """
-        data = message.get("data", [])
+        self._handle_executions(self._unseen_executions(message.get("data", [])))
+
+    def _handle_executions(self, data):
+        if self.live_sync:
+            # Only queued here; aggregation and Notion writes happen on the live sync thread
+            self.live_sync.on_executions(data)
         for trade in data:
             # log.debug(f"Execution: {trade.get('symbol')} - {trade.get('execQty')} @ {trade.get('execPrice')}")
-            self.notifier.send_order_filled(trade)
+            self.dispatcher.submit("execution", trade, key=trade.get("symbol"))
+
+    def _unseen_executions(self, executions):
+        # Both the stream and a backfill can deliver the same execution; only the first one counts
+        unseen = []
+        with self._seen_lock:
+            for trade in executions:
+                exec_id = trade.get("execId")
+                if exec_id is not None:
+                    if exec_id in self._seen_exec_ids:
+                        continue
+                    self._seen_exec_ids[exec_id] = None
+                unseen.append(trade)
+            while len(self._seen_exec_ids) > SEEN_EXEC_IDS_KEPT:
+                self._seen_exec_ids.popitem(last=False)
+        return unseen
+
+    def _check_connection(self):
+        """
+        Detects disconnects and reconnects of the private socket and backfills the gap.
+        pybit reconnects on its own, but events sent while it was down are never replayed.
+        """
+        now_ms = int(time.time() * 1000)
+        if not self.ws.is_connected():
+            if not self._disconnected:
+                log.warning("Bybit WebSocket disconnected. Missed executions will be recovered after it reconnects.")
+            self._disconnected = True
+            return
+
+        # A reconnect that happened between two checks shows up as a new underlying socket
+        socket = getattr(self.ws, "ws", None)
+        if self._disconnected or socket is not self._socket:
+            # Start a little before the last healthy check; duplicates are dropped by exec ID
+            if not self._reconcile(self._last_healthy_ms - CONNECTION_CHECK_SECONDS * 1000, now_ms):
+                return
+            self._disconnected = False
+            self._socket = socket
+        self._last_healthy_ms = now_ms
+
+    def _reconcile(self, start_ms, end_ms):
+        """
+        Fetches the executions between start_ms and end_ms over REST and handles the
+        ones the socket never delivered. Order new/cancel updates cannot be recovered.
+
+        Returns:
+            False if the backfill failed and should be retried on the next check.
+        """
+        start_ms = max(start_ms, end_ms - MAX_BACKFILL_MS)
+        log.info(f"Bybit WebSocket reconnected. Backfilling executions from the last {(end_ms - start_ms) // 1000}s...")
+        try:
+            executions = self.adapter.fetch_executions(EXECUTION_CATEGORY, start_ms, end_ms)
+        except ApiException as e:
+            log.error(f"Could not backfill missed executions: {e}. Retrying on the next check.")
+            return False
+
+        executions.sort(key=lambda e: int(e.get("execTime") or 0))
+        missed = self._unseen_executions(executions)
+        self._handle_executions(missed)
+        log.info(f"Recovered {len(missed)} missed execution(s) ({len(executions) - len(missed)} already seen).")
+        return True
 
     def _on_position_update(self, message):
         """
@@ -49,21 +156,70 @@ class BybitMonitor:
         """
         data = message.get("data", [])
         for pos in data:
-            # Filter out empty updates if needed, though Bybit usually sends relevant changes
-            self.notifier.send_position_update(pos)
+            # Most snapshots are mark-price noise; only material changes are sent
+            if not self.position_filter.should_notify(pos):
+                continue
+            # Only the latest snapshot of a position matters, so queued ones can be merged
+            symbol = pos.get("symbol")
+            self.dispatcher.submit("position", pos, key=symbol, merge_key=(symbol, pos.get("positionIdx")))
+
+    def _handle_event(self, topic, event):
+        """
+        Formats and queues the notification for one event. Runs on a dispatcher worker.
+        It waits while the notifier's queue is full, so when Discord is slow the backlog
+        builds up in the dispatcher's bounded queues and their policy decides what is dropped.
+        """
+        if topic == "order":
+            if event.get("orderStatus") == "New":
+                self.notifier.send_order_new(event)
+            else:
+                self.notifier.send_order_cancel(event)
+        elif topic == "execution":
+            self.notifier.send_order_filled(event)
+        elif topic == "position":
+            self.notifier.send_position_update(event)
 
     def start(self):
         log.info("Connecting to Bybit Private WebSocket...")
+        self.ws = WebSocket(
+            testnet=False,
+            channel_type="private",
+            api_key=settings["bybit_api_key"],
+            api_secret=settings["bybit_api_secret"],
+        )
         
         self.ws.order_stream(callback=self._on_order_update)
         self.ws.execution_stream(callback=self._on_execution_update)
         self.ws.position_stream(callback=self._on_position_update)
+        self._socket = getattr(self.ws, "ws", None)
         
         log.info("Bybit Monitor started! Listening for events...")
+        if settings.get("metrics_port"):
+            metrics.serve(settings["metrics_port"])
         
         # Determine if we want to run a status loop here or just keep the script alive
-        while True:
-            sleep(60)
+        try:
+            last_stats = time.monotonic()
+            while True:
+                sleep(CONNECTION_CHECK_SECONDS)
+                self._check_connection()
+                if time.monotonic() - last_stats < STATS_INTERVAL_SECONDS:
+                    continue
+                last_stats = time.monotonic()
+                stats = self.dispatcher.stats()
+                log.info(f"Monitor queue: {stats['processed']}/{stats['submitted']} events handled, "
+                         f"{stats['dropped']} dropped, {stats['merged']} merged, {stats['depth']} queued, "
+                         f"avg wait {stats['avg_lag_ms']:.0f}ms (max {stats['max_lag_ms']:.0f}ms). "
+                         f"Position updates: {self.position_filter.passed} sent, {self.position_filter.suppressed} suppressed.")
+        finally:
+            # Deliver notifications still queued or waiting to be coalesced
+            self.dispatcher.close()
+            self.notifier.close()
+            if self.live_sync:
+                self.live_sync.close()
+            metrics.log_summary()
+            if settings.get("metrics_file"):
+                metrics.write(settings["metrics_file"])
 
 if __name__ == "__main__":
     monitor = BybitMonitor()
@@ -0,0 +1,310 @@
+# src/services/aggregator.py
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models import RECORD_FIELDS, OrderRecord
+from ..utils.metrics import metrics
+
+# Aggregated orders whose absolute PnL is below this are not written to Notion.
+PNL_THRESHOLD = 0.5
+
+# Transaction-log fields used by the aggregation
+GROUP_KEY = ["orderId", "symbol", "side"]
+NUMERIC_FIELDS = ["qty", "tradePrice", "change", "fee"]
+RAW_COLUMNS = ["type", "transactionTime"] + GROUP_KEY + NUMERIC_FIELDS
+
+
+class OrderAggregator:
+    """
+    Incrementally aggregates transaction-log fills into one record per order.
+    Each batch of fills is parsed into typed columns once and reduced with a
+    single vectorized group-by; only the per-order partial sums are merged in
+    Python. Fills can be added in any order and in as many batches as needed;
+    orders are handed out once the caller expects no more fills for them.
+
+    The sums of handed-out orders are kept, so fills that still arrive for one
+    (e.g. a resting limit order filling over hours) reopen it with its full
+    total instead of starting a partial aggregate that would overwrite it.
+    """
+
+    def __init__(self, subaccount: str = "Main Account", pnl_threshold: float = PNL_THRESHOLD,
+                 min_first_fill_ms: Optional[int] = None, popped_kept: Optional[int] = None):
+        """
+        Args:
+            subaccount: Value written to the Subaccount field of every record.
+            pnl_threshold: Orders with an absolute aggregated PnL below this are dropped.
+            min_first_fill_ms: Orders whose first seen fill is older than this are dropped,
+                since earlier fills may lie before the fetched range and the aggregate
+                would be incomplete.
+            popped_kept: Number of handed-out orders whose sums are kept for late
+                fills, oldest forgotten first; None keeps all of them.
+        """
+        self.subaccount = subaccount
+        self.pnl_threshold = pnl_threshold
+        self.min_first_fill_ms = min_first_fill_ms
+        self._open: Dict[Tuple[str, str, str], _OpenOrder] = {}
+        self.popped_kept = popped_kept
+        self._popped: "OrderedDict[Tuple[str, str, str], _OpenOrder]" = OrderedDict()
+        # orderId -> keys of its open aggregates
+        self._open_keys: Dict[str, List[Tuple[str, str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def add(self, transactions: Iterable[Dict[str, Any]]):
+        """
+        Adds a batch of raw transaction-log rows. Non-trade rows are ignored.
+        """
+        # Bybit Transaction Log 'tradeId' is unique for each fill. 'orderId' is unique for the order.
+        # A single closing order might have multiple fills, so we aggregate the fills
+        # that belong to the same "Closing Event" by Order ID + Symbol + Side.
+        with metrics.timer("aggregate_seconds", stage="filter"):
+            trades = [tx for tx in transactions if tx.get("type") == "TRADE"]
+        if not trades:
+            return
+        metrics.inc("fills_aggregated_total", len(trades))
+        with metrics.timer("aggregate_seconds", stage="frame"):
+            # Plain object columns let numpy parse the numeric strings directly
+            raw = pd.DataFrame({name: [tx.get(name) for tx in trades] for name in RAW_COLUMNS}, dtype=object)
+        with metrics.timer("aggregate_seconds", stage="group"):
+            grouped = self.aggregate_fills(raw)
+        with metrics.timer("aggregate_seconds", stage="merge"):
+            self._merge(grouped)
+
+    def _merge(self, grouped: pd.DataFrame):
+        """
+        Adds the per-order partial sums of a batch to the open orders.
+        """
+        for key, size, total_value, fee, pnl, last_ms, first_ms, count in zip(
+            grouped.index, grouped["size"], grouped["total_value"], grouped["fee"], grouped["pnl"],
+            grouped["timestamp"], grouped["first_timestamp"], grouped["count"],
+        ):
+            agg = self._open.get(key)
+            if agg is None and key in self._popped:
+                # A late fill of an order already handed out: continue from its sums
+                agg = self._open[key] = self._popped.pop(key)
+                self._open_keys.setdefault(key[0], []).append(key)
+            if agg is None:
+                self._open[key] = _OpenOrder(
+                    size=size, total_value=total_value, fee=fee, pnl=pnl,
+                    timestamp=int(last_ms), first_timestamp=int(first_ms), count=int(count),
+                )
+                self._open_keys.setdefault(key[0], []).append(key)
+                continue
+
+            agg.size += size
+            agg.total_value += total_value
+            agg.fee += fee
+            agg.pnl += pnl
+            # Keep the latest and earliest fill times of the group
+            agg.timestamp = max(agg.timestamp, int(last_ms))
+            agg.first_timestamp = min(agg.first_timestamp, int(first_ms))
+            agg.count += int(count)
+
+    @staticmethod
+    def aggregate_fills(raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reduces raw transaction-log rows to per-order partial sums.
+
+        Args:
+            raw: A DataFrame with (at least) the RAW_COLUMNS of the transaction log.
+
+        Returns:
+            A DataFrame indexed by (orderId, symbol, side) with size, total_value,
+            fee, pnl, timestamp (last fill), first_timestamp and count columns.
+        """
+        trades = raw[raw["type"] == "TRADE"]
+        if trades.empty:
+            return pd.DataFrame(columns=["size", "total_value", "fee", "pnl", "timestamp", "first_timestamp", "count"])
+
+        # Factorizing each key column and combining the integer codes is far
+        # cheaper than grouping on three string columns directly.
+        # Missing keys group together, like the original "None" key string did.
+        group_codes = np.zeros(len(trades), dtype=np.int64)
+        for name in GROUP_KEY:
+            codes, uniques = pd.factorize(trades[name].fillna(""))
+            group_codes = group_codes * len(uniques) + codes
+        group_codes, _ = pd.factorize(group_codes)
+
+        qty = _to_float(trades["qty"])
+        price = _to_float(trades["tradePrice"])
+        fee = _to_float(trades["fee"])
+        change = _to_float(trades["change"])
+        timestamps = trades["transactionTime"].to_numpy().astype(np.int64)
+
+        grouped = pd.DataFrame({
+            "size": qty,
+            "total_value": qty * price,
+            "fee": fee,
+            "pnl": change + fee,
+            "timestamp": timestamps,
+        }).groupby(group_codes, sort=True).agg(
+            size=("size", "sum"),
+            total_value=("total_value", "sum"),
+            fee=("fee", "sum"),
+            pnl=("pnl", "sum"),
+            timestamp=("timestamp", "max"),
+            first_timestamp=("timestamp", "min"),
+            count=("timestamp", "size"),
+        )
+
+        # Group codes follow first appearance, so the first row of each group carries its key
+        _, first_rows = np.unique(group_codes, return_index=True)
+        keys = trades[GROUP_KEY].fillna("").iloc[first_rows]
+        grouped.index = pd.MultiIndex.from_frame(keys)
+        return grouped
+
+    def aggregate_frame(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregates a complete set of fills in one vectorized pass, with the same
+        rules as the records handed out by the pop methods. Use it when every
+        fill is already at hand, e.g. in a local store.
+
+        Args:
+            raw: A DataFrame with (at least) the RAW_COLUMNS of the transaction log.
+
+        Returns:
+            One row per order above the PnL threshold, sorted by timestamp, with
+            the OrderRecord fields as columns.
+        """
+        grouped = self.aggregate_fills(raw)
+        if self.min_first_fill_ms is not None:
+            grouped = grouped[grouped["first_timestamp"] >= self.min_first_fill_ms]
+        grouped = grouped[grouped["pnl"].abs() >= self.pnl_threshold]
+
+        size = grouped["size"].astype(np.float64)
+        keys = grouped.index.to_frame(index=False)
+        records = pd.DataFrame({
+            "symbol": keys["symbol"],
+            "side": keys["side"],
+            "size": size.to_numpy(),
+            "price": np.where(size > 0, grouped["total_value"] / size.where(size > 0, 1.0), 0.0),
+            "fee": grouped["fee"].to_numpy(dtype=np.float64),
+            "pnl": grouped["pnl"].to_numpy(dtype=np.float64),
+            "timestamp": grouped["timestamp"].to_numpy(dtype=np.int64),
+            "subaccount": self.subaccount,
+            "id": keys["orderId"],
+        }, columns=list(RECORD_FIELDS))
+        return records.sort_values("timestamp", kind="stable", ignore_index=True)
+
+    def pop_settled(self, before_ms: int) -> List[OrderRecord]:
+        """
+        Removes and returns the records of orders whose last fill is older than `before_ms`.
+
+        Returns:
+            Records above the PnL threshold, sorted by timestamp.
+        """
+        settled_keys = [key for key, agg in self._open.items() if agg.timestamp < before_ms]
+        return self._pop(settled_keys)
+
+    def forget_popped(self, before_ms: int):
+        """
+        Forgets the sums of handed-out orders whose last fill is older than `before_ms`,
+        once no more late fills are expected for them. A fill that still arrives for
+        one of them starts a new aggregate.
+        """
+        # Orders are handed out roughly in fill order, so checking from the oldest is enough
+        while self._popped and next(iter(self._popped.values())).timestamp < before_ms:
+            self._popped.popitem(last=False)
+
+    def filled_qty(self, order_id: str) -> float:
+        """
+        Returns the quantity aggregated so far for an order (0 if it is unknown).
+        """
+        return sum(float(self._open[key].size) for key in self._open_keys.get(order_id, ()))
+
+    def pop_orders(self, order_ids: Iterable[str]) -> List[OrderRecord]:
+        """
+        Removes and returns the records of the given orders, e.g. once they are known to be complete.
+
+        Returns:
+            Records above the PnL threshold, sorted by timestamp.
+        """
+        return self._pop([key for order_id in set(order_ids) for key in self._open_keys.get(order_id, ())])
+
+    def pop_all(self) -> List[OrderRecord]:
+        """
+        Removes and returns the records of every open order.
+
+        Returns:
+            Records above the PnL threshold, sorted by timestamp.
+        """
+        return self._pop(list(self._open))
+
+    def _pop(self, keys: List[Tuple[str, str, str]]) -> List[OrderRecord]:
+        with metrics.timer("aggregate_seconds", stage="pop"):
+            records = []
+            for key in keys:
+                agg = self._open.pop(key)
+                order_keys = self._open_keys[key[0]]
+                order_keys.remove(key)
+                if not order_keys:
+                    del self._open_keys[key[0]]
+                self._popped[key] = agg
+                record = self._to_record(key, agg)
+                if record:
+                    agg.handed_out = True
+                    records.append(record)
+            if self.popped_kept is not None:
+                while len(self._popped) > self.popped_kept:
+                    self._popped.popitem(last=False)
+            records.sort(key=lambda r: r.timestamp)
+        return records
+
+    def _to_record(self, key: Tuple[str, str, str], agg: "_OpenOrder") -> Optional[OrderRecord]:
+        if self.min_first_fill_ms is not None and agg.first_timestamp < self.min_first_fill_ms:
+            return None
+
+        final_pnl = float(agg.pnl)
+
+        # Apply threshold filter on the AGGREGATED PnL, so split fills that
+        # only sum up to more than the threshold are still caught.
+        # An order handed out before is handed out again, so its written total is corrected.
+        if abs(final_pnl) < self.pnl_threshold and not agg.handed_out:
+            return None
+
+        size = float(agg.size)
+        avg_price = float(agg.total_value) / size if size > 0 else 0.0
+
+        order_id, symbol, side = key
+        return OrderRecord(
+            symbol=symbol,
+            side=side,
+            size=size,
+            price=avg_price,
+            fee=float(agg.fee),
+            pnl=final_pnl,
+            timestamp=agg.timestamp,
+            subaccount=self.subaccount,
+            id=order_id, # Use Order ID as the unique ID for Notion
+        )
+
+
+@dataclass(slots=True)
+class _OpenOrder:
+    """
+    Running sums of an order whose fills may still arrive; its key holds the order ID, symbol and side.
+    """
+    size: float
+    total_value: float  # for weighted avg price
+    fee: float
+    pnl: float
+    timestamp: int  # last fill
+    first_timestamp: int
+    count: int
+    handed_out: bool = False  # A record was handed out for it before
+
+
+def _to_float(values: pd.Series) -> np.ndarray:
+    """
+    Parses a column of numeric strings, treating missing or malformed values as 0.
+    """
+    try:
+        parsed = values.to_numpy().astype(np.float64)
+    except (TypeError, ValueError):
+        parsed = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.nan_to_num(parsed, nan=0.0)
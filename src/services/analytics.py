@@ -0,0 +1,119 @@
+# src/services/analytics.py
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..utils.metrics import metrics
+
+# CLI name -> record column the breakdown can be grouped by
+DIMENSIONS = {"symbol": "Symbol", "side": "Side", "subaccount": "Subaccount"}
+# Rollup table name -> pandas resample frequency
+ROLLUPS = {"daily": "D", "weekly": "W", "monthly": "ME"}
+# Record columns the analytics read
+ANALYTICS_COLUMNS = ("Timestamp", "Symbol", "Side", "Subaccount", "Fee", "PnL")
+UNKNOWN_DIMENSION = "Unknown"
+
+
+def compute_analytics(records: pd.DataFrame, dimensions: Sequence[str] = ()) -> Dict[str, pd.DataFrame]:
+    """
+    Computes PnL statistics over closed-order records. Every table is built with
+    grouped, vectorized pandas operations, so hundreds of thousands of records
+    take well under a second.
+
+    Args:
+        records: One row per record with the ANALYTICS_COLUMNS and a tz-aware Timestamp.
+        dimensions: Keys of DIMENSIONS the breakdown is grouped by, together
+            (e.g. symbol and side gives one row per symbol/side pair).
+
+    Returns:
+        Tables by name: 'summary' (one row), 'breakdown' (only when dimensions are
+        given) and 'daily', 'weekly' and 'monthly' rollups with an equity curve.
+    """
+    with metrics.timer("analytics_seconds", stage="prepare"):
+        df = _prepare(records)
+
+    tables: Dict[str, pd.DataFrame] = {}
+    with metrics.timer("analytics_seconds", stage="summary"):
+        tables["summary"] = _statistics(df.assign(Scope="All"), ["Scope"])
+        tables["summary"]["first_trade"] = df["Timestamp"].min()
+        tables["summary"]["last_trade"] = df["Timestamp"].max()
+
+    if dimensions:
+        with metrics.timer("analytics_seconds", stage="breakdown"):
+            tables["breakdown"] = _statistics(df, [DIMENSIONS[name] for name in dimensions])
+
+    for name, freq in ROLLUPS.items():
+        with metrics.timer("analytics_seconds", stage=name):
+            tables[name] = _rollup(df, freq)
+    return tables
+
+
+def _prepare(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sorts the records by time and adds the win/loss helper columns the aggregations use.
+    """
+    df = records.loc[records["PnL"].notna() & records["Timestamp"].notna()].sort_values("Timestamp", kind="stable")
+    df = df.reset_index(drop=True)
+    for column in DIMENSIONS.values():
+        df[column] = df[column].fillna(UNKNOWN_DIMENSION) if column in df else UNKNOWN_DIMENSION
+    df["Fee"] = df["Fee"].fillna(0.0) if "Fee" in df else 0.0
+
+    pnl = df["PnL"]
+    df["_win"] = pnl > 0
+    df["_loss"] = pnl < 0
+    # NaN outside wins/losses, so sums and means skip them
+    df["_win_pnl"] = pnl.where(df["_win"])
+    df["_loss_pnl"] = pnl.where(df["_loss"])
+    return df
+
+
+def _statistics(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Returns trade statistics for every group of `keys`.
+    """
+    stats = df.groupby(keys, sort=True).agg(
+        trades=("PnL", "size"),
+        pnl=("PnL", "sum"),
+        fees=("Fee", "sum"),
+        wins=("_win", "sum"),
+        losses=("_loss", "sum"),
+        gross_profit=("_win_pnl", "sum"),
+        gross_loss=("_loss_pnl", "sum"),
+        avg_win=("_win_pnl", "mean"),
+        avg_loss=("_loss_pnl", "mean"),
+        best=("PnL", "max"),
+        worst=("PnL", "min"),
+    )
+    stats["win_rate"] = stats["wins"] / stats["trades"]
+    stats["profit_factor"] = np.where(stats["gross_loss"] < 0, stats["gross_profit"] / -stats["gross_loss"], np.inf)
+    stats["max_drawdown"] = _max_drawdown(df, keys)
+    return stats
+
+
+def _max_drawdown(df: pd.DataFrame, keys: List[str]) -> pd.Series:
+    """
+    Returns the largest peak-to-trough fall of each group's cumulative PnL,
+    trade by trade, starting from zero equity.
+    """
+    groups = [df[key] for key in keys]
+    equity = df["PnL"].groupby(groups).cumsum()
+    peak = equity.groupby(groups).cummax().clip(lower=0.0)
+    return (peak - equity).groupby(groups).max()
+
+
+def _rollup(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """
+    Returns per-period totals with the equity curve and its drawdown at each period end.
+    Periods without trades are kept, so the curve has no gaps.
+    """
+    rollup = df.set_index("Timestamp").resample(freq).agg(
+        trades=("PnL", "size"),
+        pnl=("PnL", "sum"),
+        fees=("Fee", "sum"),
+        wins=("_win", "sum"),
+    )
+    rollup["win_rate"] = (rollup["wins"] / rollup["trades"]).where(rollup["trades"] > 0)
+    rollup["equity"] = rollup["pnl"].cumsum()
+    rollup["drawdown"] = rollup["equity"].cummax().clip(lower=0.0) - rollup["equity"]
+    return rollup
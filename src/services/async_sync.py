@@ -0,0 +1,182 @@
+# src/services/async_sync.py
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..adapters.async_base import AsyncExchangeAdapter
+from ..clients.notion import NotionClient
+from ..clients.notion_async import AsyncNotionWriter
+from ..clients.state_store import SyncStateStore
+from ..utils.exceptions import ApiException
+from ..utils.logger import log
+from ..utils.metrics import COUNT_BUCKETS, metrics
+from .aggregator import OrderAggregator
+from .sync import ACCOUNT_NAME, ACCOUNT_TYPE, CATEGORY, ORDER_SETTLE_MS, SyncService
+from .window_planner import DEFAULT_MAX_WORKERS, STREAM_QUEUE_PAGES_PER_WORKER, format_window, plan_windows
+
+# Attempts per window; a retry skips the pages the failed attempt already delivered.
+WINDOW_ATTEMPTS = 2
+
+
+class AsyncSyncService(SyncService):
+    """
+    Runs the sync on an asyncio event loop.
+    Window downloads, aggregation and Notion writes are separate tasks joined
+    by queues, so fetching, aggregating and writing overlap without threads.
+    Cursor planning and bookkeeping are shared with SyncService.
+    """
+
+    def __init__(self, exchange_adapter: AsyncExchangeAdapter, notion_client: NotionClient,
+                 notion_writer: AsyncNotionWriter, max_workers: int = DEFAULT_MAX_WORKERS,
+                 state_store: Optional[SyncStateStore] = None, account_name: str = ACCOUNT_NAME):
+        """
+        Args:
+            exchange_adapter: Async adapter authenticated as the account to sync.
+            notion_client: Client used for the sync cursor and dedup index.
+            notion_writer: Writer used for the page writes.
+            max_workers: Number of 7-day windows downloaded concurrently.
+            state_store: Optional local store holding the sync cursor.
+            account_name: Written to the Subaccount field; each account keeps its own cursor.
+        """
+        super().__init__(exchange_adapter, notion_client, max_workers=max_workers,
+                         state_store=state_store, account_name=account_name)
+        self.notion_writer = notion_writer
+
+    async def run_sync_async(self):
+        """
+        Fetches, aggregates and writes the account's new transactions.
+        Finished orders are written while later windows are still downloading.
+        """
+        log.info(f"Starting asynchronous synchronization process for {self.account_name}...")
+
+        # Without a state store this is a Notion query through the blocking client
+        start_time_ms, end_time_ms, min_first_fill_ms = await asyncio.to_thread(self._plan_range)
+        windows = plan_windows(start_time_ms, end_time_ms)
+        log.info(f"Fetching {len(windows)} chunk(s) with up to {self.max_workers} concurrent downloads.")
+
+        aggregator = OrderAggregator(subaccount=self.account_name, min_first_fill_ms=min_first_fill_ms)
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.max_workers * STREAM_QUEUE_PAGES_PER_WORKER)
+        batches: asyncio.Queue = asyncio.Queue()
+        # Windows start in order because the semaphore wakes its waiters first in, first out
+        downloads = asyncio.Semaphore(self.max_workers)
+
+        async def fetch_window(index: int):
+            delivered = 0
+            async with downloads:
+                for attempt in range(1, WINDOW_ATTEMPTS + 1):
+                    try:
+                        page_number = 0
+                        async for page in self.exchange.iter_transaction_log(
+                            account_type=ACCOUNT_TYPE, category=CATEGORY,
+                            start_time=int(windows[index][0]), end_time=int(windows[index][1]),
+                        ):
+                            if page_number >= delivered:
+                                await pages.put(("page", index, page))
+                                delivered += 1
+                            page_number += 1
+                        metrics.observe("window_pages", page_number, buckets=COUNT_BUCKETS, account=self.account_name)
+                        await pages.put(("done", index, None))
+                        return
+                    except Exception as e:
+                        log.error(f"Error fetching chunk {format_window(windows[index])} (attempt {attempt}): {e}")
+            await pages.put(("failed", index, None))
+
+        async def write_batches():
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    return
+                # Batches are written one after another so the cursor never skips a failure
+                self._record_results(batch, await self.notion_writer.upsert_records(batch))
+
+        writer = asyncio.create_task(write_batches())
+        fetchers = [asyncio.create_task(fetch_window(index)) for index in range(len(windows))]
+
+        retrieved = 0
+        written = 0
+        finished = [False] * len(windows)
+        gap_index = None
+        next_pending = 0  # Index of the first window that has not finished yet
+        outstanding = len(windows)
+        try:
+            while outstanding and not writer.done():
+                kind, index, page = await pages.get()
+                if kind == "page":
+                    aggregator.add(page)
+                    retrieved += len(page)
+                    metrics.inc("records_retrieved_total", len(page), account=self.account_name)
+                    continue
+
+                outstanding -= 1
+                finished[index] = True
+                if kind == "failed" and (gap_index is None or index < gap_index):
+                    gap_index = index
+
+                advanced = False
+                while next_pending < len(windows) and finished[next_pending] and next_pending != gap_index:
+                    next_pending += 1
+                    advanced = True
+                if advanced:
+                    settled = aggregator.pop_settled(int(windows[next_pending - 1][1]) - ORDER_SETTLE_MS)
+                    if settled:
+                        log.info(f"Flushing {len(settled)} finished order(s) to Notion ({len(aggregator)} still open).")
+                        await batches.put(settled)
+                        written += len(settled)
+
+            if not writer.done():
+                if gap_index is not None:
+                    log.error(f"Could not fetch chunk {format_window(windows[gap_index])}. Only transactions before it will be synced.")
+                    remaining = aggregator.pop_settled(int(windows[gap_index][0]))
+                else:
+                    remaining = aggregator.pop_all()
+                if remaining:
+                    await batches.put(remaining)
+                    written += len(remaining)
+                await batches.put(None)
+            await writer
+        finally:
+            for task in fetchers + [writer]:
+                task.cancel()
+
+        log.info(f"Total transactions retrieved: {retrieved}. Processed {written} records (PnL > {aggregator.pnl_threshold}).")
+        log.info(f"Synchronization process for {self.account_name} completed successfully.")
+
+
+async def sync_accounts(accounts: List[Tuple[str, AsyncExchangeAdapter]], notion_client: NotionClient,
+                        notion_writer: AsyncNotionWriter, max_workers: int = DEFAULT_MAX_WORKERS,
+                        state_store: Optional[SyncStateStore] = None):
+    """
+    Syncs several accounts on the current event loop, each with its own adapter
+    (and Bybit rate budget) and cursor, all sharing one Notion writer. Adapters
+    and the writer are closed afterwards.
+
+    Args:
+        accounts: (account name, adapter) pairs.
+        notion_client: Client used for the sync cursors and dedup index.
+        notion_writer: Writer shared by every account.
+        max_workers: Number of windows downloaded concurrently per account.
+        state_store: Optional local store holding the sync cursors.
+
+    Raises:
+        ApiException: If any account failed to sync.
+    """
+    services = [
+        AsyncSyncService(adapter, notion_client, notion_writer, max_workers=max_workers,
+                         state_store=state_store, account_name=name)
+        for name, adapter in accounts
+    ]
+    try:
+        results: List[Any] = await asyncio.gather(
+            *(service.run_sync_async() for service in services), return_exceptions=True
+        )
+    finally:
+        for _, adapter in accounts:
+            await adapter.aclose()
+        await notion_writer.aclose()
+
+    failed: Dict[str, BaseException] = {
+        name: result for (name, _), result in zip(accounts, results) if isinstance(result, BaseException)
+    }
+    for name, error in failed.items():
+        log.error(f"Sync failed for account {name}: {error}")
+    if failed:
+        raise ApiException(f"Sync failed for {len(failed)} of {len(accounts)} account(s): {', '.join(failed)}")
@@ -0,0 +1,185 @@
+# src/services/bybit_record_cache.py
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..adapters.base import BaseExchangeAdapter
+from ..clients.rollup_store import DailyRollupStore
+from ..models import RECORD_FIELDS, REPORT_COLUMNS
+from ..utils.logger import log
+from .aggregator import OrderAggregator, RAW_COLUMNS
+from .sync import ACCOUNT_TYPE, BACKFILL_START_MS, CATEGORY
+from .window_planner import DEFAULT_MAX_WORKERS, WindowFetcher, format_window, plan_windows
+
+DEFAULT_CACHE_PATH = "bybit_fills.parquet"
+FILL_COLUMNS = ["account", "id"] + RAW_COLUMNS
+FLOAT_COLUMNS = ["qty", "tradePrice", "change", "fee"]
+
+
+class BybitRecordCache:
+    """
+    A local Parquet store of every fill in the Bybit transaction log, used as
+    a report source that bypasses Notion. Each refresh fetches only the fills
+    since the newest one stored per account. Reports then aggregate the fills
+    into closing-order records with the same rules as the Notion sync.
+
+    It offers the same interface as NotionRecordCache, so ReporterService can
+    read from either.
+    """
+
+    def __init__(self, accounts: Sequence[Tuple[str, BaseExchangeAdapter]], path: str = DEFAULT_CACHE_PATH,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            accounts: (name, adapter) of every account to report on; the name
+                is used as the Subaccount of its records.
+            path: Location of the Parquet file.
+            max_workers: Number of 7-day windows fetched concurrently per account.
+        """
+        self.accounts = list(accounts)
+        self.path = path
+        self.max_workers = max_workers
+        self.rollups = DailyRollupStore(f"{os.path.splitext(path)[0]}_daily.parquet")
+
+    def load_fills(self) -> pd.DataFrame:
+        """
+        Returns the stored fills without contacting Bybit.
+        """
+        if not os.path.exists(self.path):
+            return _fills_frame([])
+        return pd.read_parquet(self.path)
+
+    def load(self) -> pd.DataFrame:
+        """
+        Returns the records aggregated from the stored fills without contacting Bybit.
+        """
+        return self._to_records(self.load_fills())
+
+    def refresh(self, full: bool = False) -> pd.DataFrame:
+        """
+        Fetches the fills since the newest stored one of each account, saves
+        them, and returns the records of every closing order.
+
+        Args:
+            full: If True, every fill since the backfill start is fetched again.
+
+        Returns:
+            The records, with the same columns as the Notion record cache.
+        """
+        stored = _fills_frame([]) if full else self.load_fills()
+        fetched = []
+        for name, adapter in self.accounts:
+            account_fills = stored.loc[stored["account"] == name, "transactionTime"]
+            # Start at the newest stored fill itself, so fills sharing its millisecond are not missed
+            start_ms = int(account_fills.max()) if not account_fills.empty else BACKFILL_START_MS
+            fetched.append(self._fetch(name, adapter, start_ms))
+
+        fresh = pd.concat(fetched, ignore_index=True) if fetched else _fills_frame([])
+        merged = stored if fresh.empty else pd.concat([stored, fresh], ignore_index=True)
+        merged = merged.drop_duplicates(subset=["account", "id"], keep="last")
+        new_fills = len(merged) - len(stored)
+        # Each refresh re-fetches the newest stored fills, so only fills with an unknown ID are new
+        fresh = fresh.loc[~_keys(fresh, "id").isin(_keys(stored, "id"))]
+        if new_fills or full or not os.path.exists(self.path):
+            merged = merged.sort_values("transactionTime", kind="stable", ignore_index=True)
+            # Write to a temporary file first so an interrupted run never leaves a corrupt store
+            tmp_path = f"{self.path}.tmp"
+            merged.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        log.info(f"Bybit fill store {self.path} refreshed with {new_fills} new fills ({len(merged)} total).")
+
+        records = self._to_records(merged)
+        self._materialize(records, stored, fresh, _watermark(merged), full)
+        return records
+
+    def _materialize(self, records: pd.DataFrame, stored: pd.DataFrame, fresh: pd.DataFrame,
+                     watermark: Optional[str], full: bool):
+        """
+        Brings the daily rollups up to date with the records. If they were
+        materialized from the fills stored before this refresh, only the days
+        of orders with new fills are recomputed; otherwise they are rebuilt.
+        """
+        materialized = self.rollups.watermark()
+        if full or materialized != _watermark(stored):
+            self.rollups.rebuild(records, watermark)
+        elif not fresh.empty:
+            # Old and new versions of every order with new fills, so days an order moved away from are recomputed
+            orders = _keys(fresh, "orderId")
+            previous = self._to_records(stored.loc[_keys(stored, "orderId").isin(orders)])
+            updated = records.loc[pd.MultiIndex.from_arrays([records["Subaccount"], records["page_id"]]).isin(orders)]
+            self.rollups.update(records, pd.concat([previous, updated], ignore_index=True), watermark)
+
+    def _fetch(self, name: str, adapter: BaseExchangeAdapter, start_ms: int) -> pd.DataFrame:
+        """
+        Fetches one account's fills from `start_ms` until now, several 7-day windows at a time.
+        """
+        end_ms = int(time.time() * 1000)
+        windows = plan_windows(start_ms, end_ms)
+        log.info(f"Fetching {len(windows)} chunk(s) of {name} fills from Bybit.")
+
+        def fetch_pages(window_start: int, window_end: int):
+            return adapter.iter_transaction_log(
+                account_type=ACCOUNT_TYPE, category=CATEGORY, start_time=window_start, end_time=window_end
+            )
+
+        fetcher = WindowFetcher(fetch_pages, max_workers=self.max_workers)
+        transactions, gap = fetcher.fetch(windows, sort_key=lambda tx: int(tx.get("transactionTime", 0)))
+        if gap:
+            # The fetched windows end before the gap, so the next refresh starts over from there
+            log.error(f"Could not fetch chunk {format_window(gap)} for {name}. Only fills before it were stored.")
+        return _fills_frame([dict(tx, account=name) for tx in transactions if tx.get("type") == "TRADE"])
+
+    def _to_records(self, fills: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aggregates each account's fills into closing-order records.
+        """
+        frames = []
+        for name, account_fills in fills.groupby("account", sort=False):
+            frames.append(OrderAggregator(subaccount=name).aggregate_frame(account_fills))
+        if not frames:
+            return _records_frame(pd.DataFrame(columns=list(RECORD_FIELDS)))
+        return _records_frame(pd.concat(frames, ignore_index=True))
+
+
+def _fills_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Builds a typed fills table from transaction-log rows.
+    """
+    df = pd.DataFrame({name: [row.get(name) for row in rows] for name in FILL_COLUMNS}, dtype=object)
+    for name in FLOAT_COLUMNS:
+        df[name] = pd.to_numeric(df[name], errors="coerce").astype(np.float64)
+    df["transactionTime"] = pd.to_numeric(df["transactionTime"], errors="coerce").fillna(0).astype(np.int64)
+    for name in ("account", "id", "type", "orderId", "symbol", "side"):
+        df[name] = df[name].astype("string")
+    return df
+
+
+def _keys(fills: pd.DataFrame, column: str) -> pd.MultiIndex:
+    """
+    Returns (account, `column`) of every fill, e.g. to match fills or orders across accounts.
+    """
+    # Missing order IDs group together, as in the aggregation
+    return pd.MultiIndex.from_arrays([fills["account"], fills[column].fillna("")])
+
+
+def _watermark(fills: pd.DataFrame) -> Optional[str]:
+    """
+    Returns the newest transaction time of the fills as the rollup watermark, or None if there are none.
+    """
+    return str(int(fills["transactionTime"].max())) if not fills.empty else None
+
+
+def _records_frame(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renames aggregated records to the record cache columns the reports read.
+    """
+    df = records[list(REPORT_COLUMNS)].rename(columns=REPORT_COLUMNS)
+    df["Timestamp"] = pd.to_datetime(records["timestamp"].astype(np.int64), unit="ms", utc=True)
+    for name in ("page_id", "Symbol", "Side", "Subaccount"):
+        df[name] = df[name].astype("string")
+    for name in ("Size", "Fee", "PnL"):
+        df[name] = df[name].astype(np.float64)
+    return df.sort_values("Timestamp", kind="stable", ignore_index=True)
@@ -0,0 +1,102 @@
+# src/services/checkpoint.py
+import itertools
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..clients.state_store import SyncStateStore
+from ..utils.exceptions import ApiException
+from ..utils.logger import log
+from .window_planner import Window, format_window
+
+Page = List[Dict[str, Any]]
+# Called with a saved cursor (or None for the first page); yields (page, next cursor)
+PageSource = Callable[[Optional[str]], Iterator[Tuple[Page, Optional[str]]]]
+
+
+class BackfillCheckpoint:
+    """
+    Durable checkpoints for one account's backfill, kept in the SyncStateStore.
+    The planned range is saved when the backfill starts, and every fetched page
+    is spooled together with the cursor of the page after it. An interrupted
+    run therefore re-plans the same windows, replays the pages it already has
+    from disk and continues each window from its saved cursor: the restart cost
+    is the page that was in flight, not the whole history.
+    """
+
+    def __init__(self, state_store: SyncStateStore, database_id: str, account: str, endpoint: str):
+        """
+        Args:
+            state_store: Store holding the checkpoints.
+            database_id: The Notion database the backfill writes to.
+            account: The account being backfilled.
+            endpoint: The paginated endpoint, e.g. '/v5/account/transaction-log'.
+        """
+        self.store = state_store
+        self._key = (database_id, account, endpoint)
+
+    def resume(self) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        Returns the (start_ms, end_ms, min_first_fill_ms) of an unfinished backfill, or None.
+        """
+        return self.store.get_backfill_run(*self._key)
+
+    def begin(self, start_ms: int, end_ms: int, min_first_fill_ms: Optional[int]):
+        """
+        Records the range of a new backfill.
+        """
+        self.store.start_backfill_run(*self._key, start_ms, end_ms, min_first_fill_ms)
+
+    def finish(self):
+        """
+        Drops the checkpoints once every window was fetched and written.
+        """
+        self.store.finish_backfill_run(*self._key)
+
+    def pages(self, window: Window, fetch_pages: PageSource) -> Iterator[Page]:
+        """
+        Yields the pages of one window: first the spooled ones, then the rest
+        fetched from the saved cursor and spooled as they arrive.
+        Pages are yielded in the same order on every call, so callers that count
+        pages to skip on a retry keep working.
+
+        Args:
+            window: The (start, end) window in ms.
+            fetch_pages: Fetches the window from a cursor, yielding (page, next cursor).
+        """
+        cursor, page_count, complete = self.store.get_window_checkpoint(*self._key, window)
+        for page_number in range(page_count):
+            yield self.store.get_spooled_page(*self._key, window, page_number)
+        if complete:
+            return
+
+        if page_count and cursor is None:
+            # No resume point: the window's history is immutable and always paged
+            # in the same order, so fetch it again and skip the spooled pages
+            source = itertools.islice(fetch_pages(None), page_count, None)
+        elif cursor is not None:
+            log.info(f"Resuming chunk {format_window(window)} after {page_count} saved page(s).")
+            source = self._from_cursor(window, fetch_pages, cursor, page_count)
+        else:
+            source = fetch_pages(None)
+
+        for page, next_cursor in source:
+            self.store.save_backfill_page(*self._key, window, page_count, page, next_cursor)
+            page_count += 1
+            yield page
+        self.store.complete_backfill_window(*self._key, window)
+
+    @staticmethod
+    def _from_cursor(window: Window, fetch_pages: PageSource, cursor: str,
+                     page_count: int) -> Iterator[Tuple[Page, Optional[str]]]:
+        pages = fetch_pages(cursor)
+        try:
+            first = next(pages)
+        except StopIteration:
+            return
+        except ApiException as e:
+            # Cursors can expire; fall back to re-fetching the window
+            log.warning(f"Saved cursor for chunk {format_window(window)} was rejected ({e}). "
+                        f"Fetching the chunk again and skipping {page_count} saved page(s).")
+            yield from itertools.islice(fetch_pages(None), page_count, None)
+            return
+        yield first
+        yield from pages
@@ -0,0 +1,204 @@
+# src/services/live_sync.py
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from ..clients.notion import NotionClient
+from ..models import OrderRecord
+from ..utils.exceptions import NotionApiException
+from ..utils.logger import log
+from ..utils.metrics import metrics
+from .aggregator import OrderAggregator
+from .sync import ACCOUNT_NAME
+
+# Order statuses after which no more executions arrive for an order
+TERMINAL_ORDER_STATUSES = ("Filled", "Cancelled", "PartiallyFilledCanceled", "Rejected", "Deactivated")
+# Orders that saw no terminal status are written anyway once their last fill is this old
+LIVE_SETTLE_MS = 60 * 60 * 1000
+# How often the writer checks for such stale orders
+STALE_CHECK_SECONDS = 60.0
+# Written orders remembered so late or repeated executions cannot re-open them
+FINISHED_ORDERS_KEPT = 10000
+
+
+def execution_to_transaction(execution: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Maps a WebSocket execution onto the shape of a transaction-log row, so live
+    fills aggregate exactly like the fills SyncService reads over REST.
+    In the transaction log, `change` is the realised PnL net of the fee.
+    """
+    exec_fee = float(execution.get("execFee") or 0)
+    exec_pnl = float(execution.get("execPnl") or 0)
+    return {
+        "type": "TRADE" if execution.get("execType") == "Trade" else execution.get("execType"),
+        "transactionTime": execution.get("execTime"),
+        "orderId": execution.get("orderId"),
+        "symbol": execution.get("symbol"),
+        "side": execution.get("side"),
+        "qty": execution.get("execQty"),
+        "tradePrice": execution.get("execPrice"),
+        "fee": exec_fee,
+        "change": exec_pnl - exec_fee,
+    }
+
+
+class LiveSyncService:
+    """
+    Writes closing orders to Notion as they complete, fed by the private
+    WebSocket execution and order streams instead of REST polling.
+    The WebSocket callbacks only queue the raw events. A dedicated thread
+    aggregates the executions per order and writes an order once it is fully
+    filled or reaches a terminal status, so the callbacks never wait on the
+    aggregation or on Notion.
+
+    Records use the same aggregation and Transaction ID (the order ID) as
+    SyncService, so a later REST sync upserts over them without duplicates.
+    Executions that arrive after their order was written are merged into its
+    aggregate and the full total is written again.
+    The REST sync cursor is deliberately not advanced: a dropped WebSocket
+    message must still be picked up by the next REST reconciliation.
+    """
+
+    def __init__(self, notion_client: NotionClient, account_name: str = ACCOUNT_NAME):
+        """
+        Args:
+            notion_client: Client used to upsert the finished orders.
+            account_name: Written to the Subaccount field.
+        """
+        self.notion = notion_client
+        self.account_name = account_name
+        # Only the writer thread touches the aggregator and the order bookkeeping below
+        self._aggregator = OrderAggregator(subaccount=account_name, popped_kept=FINISHED_ORDERS_KEPT)
+        # orderId -> cumExecQty reported by a terminal order update whose fills have not all arrived
+        self._terminal_orders: Dict[str, float] = {}
+        # Orders written after a terminal status; a late execution rewrites them right away
+        self._finished_orders: "OrderedDict[str, None]" = OrderedDict()
+        # ("executions" or "orders", events) batches queued by the WebSocket callbacks
+        self._events: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self.written = 0
+        self.failed = 0
+        self.errors = 0  # Event batches that could not be handled
+        self._writer = threading.Thread(target=self._run, name="live-sync-writer", daemon=True)
+        self._writer.start()
+
+    def on_executions(self, executions: Iterable[Dict[str, Any]]):
+        """
+        Queues executions from the execution stream for the writer thread.
+        """
+        self._events.put(("executions", list(executions)))
+
+    def on_orders(self, orders: Iterable[Dict[str, Any]]):
+        """
+        Queues order stream updates for the writer thread.
+        """
+        self._events.put(("orders", list(orders)))
+
+    def close(self, timeout: float = 30.0):
+        """
+        Writes every order still in memory and stops the writer thread.
+        """
+        self._stop.set()
+        self._writer.join(timeout)
+
+    def _add_executions(self, executions: List[Dict[str, Any]]) -> List[OrderRecord]:
+        """
+        Aggregates executions and returns the records of orders with nothing left to fill.
+        """
+        self._aggregator.add(execution_to_transaction(e) for e in executions)
+        done = [e.get("orderId") for e in executions
+                if e.get("orderId") in self._finished_orders
+                or (e.get("execType") == "Trade" and e.get("leavesQty") == "0")]
+        done += [order_id for order_id, qty in self._terminal_orders.items()
+                 if self._aggregator.filled_qty(order_id) >= qty]
+        return self._finish(done)
+
+    def _add_orders(self, orders: List[Dict[str, Any]]) -> List[OrderRecord]:
+        """
+        Returns the records of orders in a terminal status once all of their
+        executions (cumExecQty) have arrived; the others are finished by later executions.
+        """
+        done = []
+        for order in orders:
+            if order.get("orderStatus") not in TERMINAL_ORDER_STATUSES:
+                continue
+            order_id = order.get("orderId")
+            if order_id in self._finished_orders:
+                continue
+            cum_exec_qty = float(order.get("cumExecQty") or 0)
+            if cum_exec_qty == 0 or self._aggregator.filled_qty(order_id) >= cum_exec_qty:
+                done.append(order_id)
+            else:
+                self._terminal_orders[order_id] = cum_exec_qty
+        return self._finish(done)
+
+    def _finish(self, order_ids: List[str]) -> List[OrderRecord]:
+        if not order_ids:
+            return []
+        for order_id in order_ids:
+            self._terminal_orders.pop(order_id, None)
+            self._finished_orders[order_id] = None
+            self._finished_orders.move_to_end(order_id)
+        while len(self._finished_orders) > FINISHED_ORDERS_KEPT:
+            self._finished_orders.popitem(last=False)
+        return self._aggregator.pop_orders(order_ids)
+
+    def _run(self):
+        last_stale_check = time.monotonic()
+        while True:
+            # Events queued before close() are still handled
+            stopping = self._stop.is_set()
+            try:
+                events = [self._events.get(block=not stopping, timeout=1.0)]
+            except queue.Empty:
+                events = []
+            # Handle whatever else arrived in the meantime in the same batch
+            while True:
+                try:
+                    events.append(self._events.get_nowait())
+                except queue.Empty:
+                    break
+
+            check_stale = not stopping and time.monotonic() - last_stale_check >= STALE_CHECK_SECONDS
+            if check_stale:
+                last_stale_check = time.monotonic()
+            try:
+                self._handle(events, stopping, check_stale)
+            except Exception as e:
+                # A malformed event or a failing store must not stop the thread
+                self.errors += 1
+                metrics.inc("live_sync_errors_total")
+                log.error(f"Live sync failed to handle {len(events)} event batch(es): {e}. "
+                          f"The next REST sync will pick up the affected orders.", exc_info=True)
+            if stopping:
+                return
+
+    def _handle(self, events: List[Tuple[str, List[Dict[str, Any]]]], stopping: bool, check_stale: bool):
+        """
+        Aggregates one batch of queued events and writes the orders it finishes.
+        """
+        records = []
+        for kind, data in events:
+            records += self._add_executions(data) if kind == "executions" else self._add_orders(data)
+        if stopping:
+            records += self._aggregator.pop_all()
+        elif check_stale:
+            records += self._aggregator.pop_settled(int(time.time() * 1000) - LIVE_SETTLE_MS)
+
+        if records:
+            # An order finished twice in one batch is written once, with its latest total
+            self._write(list({record.id: record for record in records}.values()))
+
+    def _write(self, records: List[OrderRecord]):
+        try:
+            results = self.notion.upsert_records(records)
+        except NotionApiException as e:
+            self.failed += len(records)
+            log.error(f"Live sync failed to write {len(records)} order(s) to Notion: {e}. The next REST sync will pick them up.")
+            return
+        failed = sum(1 for result in results if result["error"])
+        self.written += len(results) - failed
+        self.failed += failed
+        log.info(f"Live sync wrote {len(results) - failed} order(s) to Notion ({failed} failed).")
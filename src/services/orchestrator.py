@@ -0,0 +1,117 @@
+# src/services/orchestrator.py
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..adapters.base import BaseExchangeAdapter
+from ..clients.notion import NotionClient
+from ..clients.state_store import SyncStateStore
+from ..utils.exceptions import ApiException
+from ..utils.logger import log
+from .sync import ACCOUNT_NAME, SyncService
+from .window_planner import DEFAULT_MAX_WORKERS
+
+DEFAULT_MAX_ACCOUNTS = 4
+
+# Builds an adapter for one account from its (api_key, api_secret)
+AdapterFactory = Callable[[str, str], BaseExchangeAdapter]
+
+
+class MultiAccountSyncOrchestrator:
+    """
+    Syncs the main account and its sub-accounts to Notion concurrently.
+    Bybit rate limits are counted per UID, so every account gets its own adapter
+    (and with it its own rate-limit budget and connection pool) and its own sync
+    cursor. The Notion client is shared, since Notion limits the integration as a whole.
+    """
+
+    def __init__(self, main_adapter: BaseExchangeAdapter, notion_client: NotionClient,
+                 subaccounts: List[Dict[str, Any]], adapter_factory: AdapterFactory,
+                 max_accounts: int = DEFAULT_MAX_ACCOUNTS, max_workers: int = DEFAULT_MAX_WORKERS,
+                 state_store: Optional[SyncStateStore] = None):
+        """
+        Args:
+            main_adapter: Adapter authenticated with the master API key.
+            notion_client: Client for the target Notion database.
+            subaccounts: Configured sub-accounts, each a dict with "name", "api_key",
+                "api_secret" and optionally "uid".
+            adapter_factory: Builds the adapter for a sub-account from its credentials.
+            max_accounts: Number of accounts synced at the same time.
+            max_workers: Number of 7-day windows fetched concurrently per account.
+            state_store: Optional local store holding each account's sync cursor.
+        """
+        self.main_adapter = main_adapter
+        self.notion = notion_client
+        self.subaccounts = subaccounts
+        self.adapter_factory = adapter_factory
+        self.max_accounts = max(1, max_accounts)
+        self.max_workers = max_workers
+        self.state_store = state_store
+
+    def run_sync(self, streaming: bool = False):
+        """
+        Syncs every account, continuing with the others when one fails.
+
+        Args:
+            streaming: Passed on to each account's SyncService.
+
+        Raises:
+            ApiException: If any account failed to sync.
+        """
+        accounts = [(ACCOUNT_NAME, self.main_adapter)] + self._resolve_subaccounts()
+        log.info(f"Syncing {len(accounts)} account(s), up to {self.max_accounts} at a time.")
+
+        with ThreadPoolExecutor(max_workers=min(self.max_accounts, len(accounts))) as executor:
+            futures = {
+                name: executor.submit(self._sync_account, name, adapter, streaming)
+                for name, adapter in accounts
+            }
+
+        failed = []
+        for name, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                log.error(f"Sync failed for account {name}: {e}")
+                failed.append(name)
+
+        for name, adapter in accounts[1:]:
+            if hasattr(adapter, "close"):
+                adapter.close()
+
+        if failed:
+            raise ApiException(f"Sync failed for {len(failed)} of {len(accounts)} account(s): {', '.join(failed)}")
+        log.info(f"All {len(accounts)} account(s) synced successfully.")
+
+    def _sync_account(self, name: str, adapter: BaseExchangeAdapter, streaming: bool):
+        sync_service = SyncService(
+            exchange_adapter=adapter,
+            notion_client=self.notion,
+            max_workers=self.max_workers,
+            state_store=self.state_store,
+            account_name=name,
+        )
+        sync_service.run_sync(streaming=streaming)
+
+    def _resolve_subaccounts(self) -> List[Tuple[str, BaseExchangeAdapter]]:
+        """
+        Matches the configured sub-accounts against the sub-members listed by Bybit
+        and builds an adapter for each one that has credentials.
+        """
+        members = self.main_adapter.fetch_subaccounts()
+        listed_uids = {str(member.get("uid")) for member in members}
+        listed_names = {member.get("username") for member in members}
+
+        configured = set()
+        accounts = []
+        for account in self.subaccounts:
+            name = account["name"]
+            uid = str(account.get("uid", ""))
+            configured.update((name, uid))
+            if members and uid not in listed_uids and name not in listed_names:
+                log.warning(f"Sub-account {name} is not listed under the main account; syncing it anyway.")
+            accounts.append((name, self.adapter_factory(account["api_key"], account["api_secret"])))
+
+        for member in members:
+            if member.get("username") not in configured and str(member.get("uid")) not in configured:
+                log.warning(f"Skipping sub-account {member.get('username')} ({member.get('uid')}): no API key configured.")
+        return accounts
@@ -1,89 +1,220 @@
 # src/services/reporter.py
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Dict, Optional, Sequence, Union
 
 from ..clients.notion import NotionClient
+from ..clients.record_cache import NotionRecordCache
 from ..utils.logger import log
+from .analytics import ANALYTICS_COLUMNS, compute_analytics
+from .bybit_record_cache import BybitRecordCache
+
+# The only properties a PnL report reads
+REPORT_PROPERTIES = ("Timestamp", "PnL")
 
 class ReporterService:
     """
     Service for generating reports from data stored in Notion.
     """
 
-    def __init__(self, notion_client: NotionClient):
+    def __init__(self, notion_client: Optional[NotionClient],
+                 record_cache: Optional[Union[NotionRecordCache, BybitRecordCache]] = None):
+        """
+        Args:
+            notion_client: Client for the Notion trade database. Only needed without a record cache.
+            record_cache: Optional local store; when set, reports read from it after
+                an incremental refresh instead of querying every page. Either the
+                mirror of the Notion database or a BybitRecordCache, which reads
+                the transaction log straight from Bybit and bypasses Notion.
+        """
         self.notion = notion_client
+        self.record_cache = record_cache
 
-    def generate_pnl_report(self, output_format: str = 'csv'):
+    def generate_pnl_report(self, output_format: str = 'csv', full_refresh: bool = False,
+                            start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            subaccount: Optional[str] = None):
         """
         Generates a monthly PnL report from the Notion database.
 
         Args:
             output_format: The desired output format ('csv' or 'excel').
+            full_refresh: Rebuild the local record cache from scratch before reporting.
+            start: Only include records at or after this time.
+            end: Only include records before this time.
+            subaccount: Only include records of this subaccount.
         """
         log.info("Starting PnL report generation...")
         
-        # 1. Fetch all data from Notion
-        all_records = self.notion.query_all_records()
-        if not all_records:
-            log.warning("No records found in Notion. Cannot generate report.")
-            return
-
-        # 2. Parse records into a list of dicts
-        parsed_records = self._parse_notion_results(all_records)
-        if not parsed_records:
-            log.warning("Could not parse any valid records from Notion data.")
+        # 1-3. Load the records (or their daily totals) into a DataFrame
+        if self.record_cache and _on_day_boundaries(start, end):
+            df = self._load_rollups(full_refresh, start, end, subaccount)
+        elif self.record_cache:
+            df = self._load_records(full_refresh, start, end, subaccount)
+        else:
+            df = self._query_records(start, end, subaccount)
+        if df is None:
             return
-            
-        # 3. Create a Pandas DataFrame
-        df = pd.DataFrame(parsed_records)
 
         # 4. Data processing
-        # Convert timestamp to datetime objects
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
         # Set Timestamp as the index
         df.set_index('Timestamp', inplace=True)
         
         # 5. Group by month and sum PnL
-        # 'M' is a frequency string for month-end frequency
-        monthly_pnl = df['PnL'].resample('M').sum()
+        # 'ME' is the month-end frequency (pandas 3 no longer accepts 'M')
+        monthly_pnl = df['PnL'].resample('ME').sum()
         
         log.info("Monthly PnL aggregated:")
         log.info(monthly_pnl)
 
         # 6. Save the report
         current_year = datetime.now().year
-        file_name = f"tax_report_{current_year}"
-        
+        self._save({"Monthly PnL": monthly_pnl}, f"tax_report_{current_year}", output_format)
+
+    def generate_analytics_report(self, dimensions: Sequence[str] = (), output_format: str = 'csv',
+                                  full_refresh: bool = False, start: Optional[datetime] = None,
+                                  end: Optional[datetime] = None, subaccount: Optional[str] = None):
+        """
+        Generates PnL analytics: overall statistics (PnL, fees, win rate, average
+        win/loss, max drawdown), an optional breakdown by dimension, and daily,
+        weekly and monthly rollups with the equity curve.
+
+        Args:
+            dimensions: Keys of analytics.DIMENSIONS to break the statistics down by.
+            output_format: 'csv' (one file per table) or 'excel' (one sheet per table).
+            full_refresh: Rebuild the local record cache from scratch before reporting.
+            start: Only include records at or after this time.
+            end: Only include records before this time.
+            subaccount: Only include records of this subaccount.
+        """
+        log.info(f"Starting PnL analytics generation (breakdown by {', '.join(dimensions) or 'nothing'})...")
+
+        if self.record_cache:
+            df = self._load_records(full_refresh, start, end, subaccount, properties=ANALYTICS_COLUMNS)
+        else:
+            df = self._query_records(start, end, subaccount, properties=ANALYTICS_COLUMNS)
+        if df is None:
+            return
+
+        tables = compute_analytics(df, dimensions)
+        summary = tables["summary"].iloc[0]
+        log.info(f"{summary['trades']} trades: PnL {summary['pnl']:.2f}, fees {summary['fees']:.2f}, "
+                 f"win rate {summary['win_rate']:.1%}, max drawdown {summary['max_drawdown']:.2f}")
+
+        current_year = datetime.now().year
+        self._save(tables, f"pnl_analytics_{current_year}", output_format)
+
+    @staticmethod
+    def _save(tables: Dict[str, Union[pd.DataFrame, pd.Series]], file_name: str, output_format: str):
+        """
+        Saves report tables: a single table to `<file_name>.csv`, several to
+        `<file_name>_<table>.csv`, or all of them as sheets of `<file_name>.xlsx`.
+        """
         if output_format == 'csv':
-            file_path = f"{file_name}.csv"
-            monthly_pnl.to_csv(file_path)
-            log.info(f"Successfully saved report to {file_path}")
+            for name, table in tables.items():
+                suffix = "" if len(tables) == 1 else "_" + name.lower().replace(" ", "_")
+                file_path = f"{file_name}{suffix}.csv"
+                table.to_csv(file_path)
+                log.info(f"Successfully saved report to {file_path}")
         elif output_format == 'excel':
             file_path = f"{file_name}.xlsx"
-            monthly_pnl.to_excel(file_path, sheet_name='Monthly PnL')
+            with pd.ExcelWriter(file_path) as writer:
+                for name, table in tables.items():
+                    # Excel cannot store timezones; every timestamp here is UTC
+                    _without_timezone(table).to_excel(writer, sheet_name=name)
             log.info(f"Successfully saved report to {file_path}")
         else:
             log.error(f"Unsupported report format: {output_format}")
 
-    def _parse_notion_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _load_rollups(self, full_refresh: bool, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      subaccount: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Refreshes the local record cache and returns the daily PnL totals in
+        range as Timestamp and PnL columns. The refresh only recomputes the
+        days touched by changed records, so the report does not re-aggregate
+        every record.
         """
-        Parses the raw list of Notion page objects into a simpler list of dictionaries.
+        self.record_cache.refresh(full=full_refresh)
+        rollups = self.record_cache.rollups.load()
+        mask = pd.Series(True, index=rollups.index)
+        if start:
+            mask &= rollups['Day'] >= pd.Timestamp(start)
+        if end:
+            mask &= rollups['Day'] < pd.Timestamp(end)
+        if subaccount:
+            mask &= rollups['Subaccount'] == subaccount
+        df = rollups.loc[mask, ['Day', 'pnl']].rename(columns={'Day': 'Timestamp', 'pnl': 'PnL'})
+        if df.empty:
+            log.warning("No records found in the record cache. Cannot generate report.")
+            return None
+        return df
+
+    def _load_records(self, full_refresh: bool, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      subaccount: Optional[str] = None,
+                      properties: Sequence[str] = REPORT_PROPERTIES) -> Optional[pd.DataFrame]:
         """
-        parsed = []
-        for page in results:
-            try:
-                properties = page["properties"]
-                record = {
-                    "Timestamp": properties["Timestamp"]["date"]["start"],
-                    "PnL": properties["PnL"]["number"],
-                    # Add other fields if needed for more complex reports
-                }
-                # Filter out records with no PnL value
-                if record["PnL"] is not None:
-                    parsed.append(record)
-            except (KeyError, TypeError) as e:
-                page_id = page.get('id', 'N/A')
-                log.warning(f"Skipping record {page_id} due to parsing error: {e}. Check if schema matches.")
-                continue
-        return parsed
+        Refreshes the local record cache and returns the given columns of the
+        records in range. The mirror always holds every record, so the filters
+        are applied locally.
+        """
+        records = self.record_cache.refresh(full=full_refresh)
+        mask = records['PnL'].notna() & records['Timestamp'].notna()
+        if start:
+            mask &= records['Timestamp'] >= pd.Timestamp(start)
+        if end:
+            mask &= records['Timestamp'] < pd.Timestamp(end)
+        if subaccount:
+            mask &= records['Subaccount'] == subaccount
+        df = records.loc[mask, list(properties)].copy()
+        if df.empty:
+            log.warning("No records found in the record cache. Cannot generate report.")
+            return None
+        return df
+
+    def _query_records(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       subaccount: Optional[str] = None,
+                       properties: Sequence[str] = REPORT_PROPERTIES) -> Optional[pd.DataFrame]:
+        """
+        Fetches and parses the records in range straight from Notion.
+        Notion applies the filters and returns only the given properties.
+        """
+        # 1. Fetch the matching records from Notion
+        all_records = self.notion.query_records(start=start, end=end, subaccount=subaccount,
+                                                property_names=properties)
+        if not all_records:
+            log.warning("No records found in Notion. Cannot generate report.")
+            return None
+
+        # 2. Parse records into typed columns, dropping those without a PnL value
+        records = NotionRecordCache.parse_pages(all_records)
+        df = records.loc[records['PnL'].notna() & records['Timestamp'].notna(), list(properties)]
+        if df.empty:
+            log.warning("Could not parse any valid records from Notion data.")
+            return None
+        return df.reset_index(drop=True)
+
+
+def _on_day_boundaries(*bounds: Optional[datetime]) -> bool:
+    """
+    Returns True if every given bound is a UTC midnight, so daily rollups can answer the query.
+    """
+    for bound in bounds:
+        if bound is None:
+            continue
+        utc = pd.Timestamp(bound).tz_convert("UTC")
+        if utc != utc.floor("D"):
+            return False
+    return True
+
+
+def _without_timezone(table: Union[pd.DataFrame, pd.Series]) -> Union[pd.DataFrame, pd.Series]:
+    """
+    Returns a copy of the table with tz-aware index and columns converted to naive UTC.
+    """
+    table = table.copy()
+    if isinstance(table.index, pd.DatetimeIndex) and table.index.tz is not None:
+        table.index = table.index.tz_convert("UTC").tz_localize(None)
+    if isinstance(table, pd.DataFrame):
+        for column in table.columns:
+            if isinstance(table[column].dtype, pd.DatetimeTZDtype):
+                table[column] = table[column].dt.tz_convert("UTC").dt.tz_localize(None)
+    return table
@@ -1,158 +1,276 @@
 # src/services/sync.py
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from ..adapters.base import BaseExchangeAdapter
 from ..clients.notion import NotionClient
+from ..clients.state_store import SyncStateStore
+from ..models import OrderRecord
+from ..utils.exceptions import NotionApiException
 from ..utils.logger import log
+from ..utils.metrics import COUNT_BUCKETS, metrics
+from .aggregator import OrderAggregator
+from .checkpoint import BackfillCheckpoint
+from .window_planner import DEFAULT_MAX_WORKERS, Window, WindowFetcher, format_window, plan_windows
+
+# In streaming mode an order is considered finished once the data fetched so far
+# extends this far past its last fill, so fills straddling a window edge stay together.
+ORDER_SETTLE_MS = 60 * 60 * 1000
+
+# Each run re-fetches this much history before the cursor, so orders whose fills
+# were split across two runs are re-aggregated in full and upserted. Orders first
+# seen in the earliest part of that overlap may be missing older fills and are left alone.
+RESYNC_LOOKBACK_MS = 24 * 60 * 60 * 1000
+RESYNC_WARMUP_MS = 12 * 60 * 60 * 1000
+
+# Default start date of the first backfill
+BACKFILL_START_MS = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+
+ACCOUNT_NAME = "Main Account"
+ACCOUNT_TYPE = "UNIFIED"
+CATEGORY = "linear"
+TRANSACTION_LOG_ENDPOINT = "/v5/account/transaction-log"
 
 class SyncService:
     """
     Orchestrates the synchronization process between an exchange and Notion.
     """
 
-    def __init__(self, exchange_adapter: BaseExchangeAdapter, notion_client: NotionClient):
+    def __init__(self, exchange_adapter: BaseExchangeAdapter, notion_client: NotionClient,
+                 max_workers: int = DEFAULT_MAX_WORKERS, state_store: Optional[SyncStateStore] = None,
+                 account_name: str = ACCOUNT_NAME):
+        """
+        Args:
+            exchange_adapter: Adapter authenticated as the account to sync.
+            notion_client: Client for the target Notion database.
+            max_workers: Number of 7-day windows fetched concurrently.
+            state_store: Optional local store holding the sync cursor.
+            account_name: Written to the Subaccount field; each account keeps its own cursor.
+        """
         self.exchange = exchange_adapter
+        self.account_name = account_name
         self.notion = notion_client
+        self.max_workers = max_workers
+        self.state_store = state_store
+        self._checkpoint: Optional[BackfillCheckpoint] = None
 
-    def run_sync(self):
+    def run_sync(self, streaming: bool = False):
         """
         Runs the main synchronization logic with support for multi-window fetching.
+
+        Args:
+            streaming: If True, finished orders are written to Notion while later
+                windows are still downloading, instead of after the whole backfill.
         """
-        log.info("Starting synchronization process...")
+        log.info(f"Starting synchronization process for {self.account_name}...")
         
-        # 1. Determine the time window
-        last_sync_ms = self.notion.get_last_sync_timestamp()
+        # 1. Determine the time window, resuming an interrupted backfill if there is one
+        start_time_ms, end_time_ms, min_first_fill_ms = self._open_checkpoint()
+
+        # 2. Fetch data from Bybit in 7-day chunks (API limit), several chunks at a time
+        windows = plan_windows(start_time_ms, end_time_ms)
+        log.info(f"Fetching {len(windows)} chunk(s) with up to {self.max_workers} concurrent workers.")
+
+        fetcher = WindowFetcher(self._fetch_window_pages, max_workers=self.max_workers)
+        aggregator = OrderAggregator(subaccount=self.account_name, min_first_fill_ms=min_first_fill_ms)
+
+        if streaming:
+            self._run_streaming(fetcher, windows, aggregator)
+            self._close_checkpoint(fetcher.gap)
+            return
+
+        all_transactions, gap = fetcher.fetch(windows, sort_key=lambda tx: int(tx.get("transactionTime", 0)))
+        if gap:
+            log.error(f"Could not fetch chunk {format_window(gap)}. Only transactions before it will be synced.")
+
+        log.info(f"Total transactions retrieved: {len(all_transactions)}")
+        metrics.inc("records_retrieved_total", len(all_transactions), account=self.account_name)
+
+        # 3. Aggregate split fills into one record per closing order
+        aggregator.add(all_transactions)
+        notion_records = aggregator.pop_all()
+
+        if not notion_records:
+            log.info("No records matching the filter were found.")
+            self._close_checkpoint(gap)
+            return
+
+        log.info(f"Processed {len(notion_records)} records (PnL > {aggregator.pnl_threshold}) to be written to Notion.")
+
+        # 4. Write to Notion
+        self._write_records(notion_records)
+        self._close_checkpoint(gap)
+        log.info("Synchronization process completed successfully.")
+
+    def _open_checkpoint(self) -> Tuple[int, int, Optional[int]]:
+        """
+        Plans the range to fetch. With a state store, the range is checkpointed
+        so an interrupted run is resumed over the same windows, replaying the
+        pages it already fetched instead of starting over.
+        """
+        if not self.state_store:
+            return self._plan_range()
+
+        self._checkpoint = BackfillCheckpoint(self.state_store, self.notion.database_id,
+                                              self.account_name, TRANSACTION_LOG_ENDPOINT)
+        unfinished = self._checkpoint.resume()
+        if unfinished:
+            start_time_ms, end_time_ms, _ = unfinished
+            log.info(f"Resuming the interrupted sync of {datetime.fromtimestamp(start_time_ms/1000, tz=timezone.utc)} "
+                     f"to {datetime.fromtimestamp(end_time_ms/1000, tz=timezone.utc)}. Newer transactions follow on the next run.")
+            return unfinished
+
+        planned = self._plan_range()
+        self._checkpoint.begin(*planned)
+        return planned
+
+    def _close_checkpoint(self, gap: Optional[Window]):
+        """
+        Drops the checkpoint once the whole range was fetched and written.
+        After a gap it is kept, so the next run resumes the same range.
+        """
+        if self._checkpoint and not gap:
+            self._checkpoint.finish()
+
+    def _plan_range(self) -> Tuple[int, int, Optional[int]]:
+        """
+        Works out the time range to fetch from the sync cursor.
+
+        Returns:
+            (start_time_ms, end_time_ms, min_first_fill_ms), where orders first filled
+            before `min_first_fill_ms` may be incomplete and must not be written.
+        """
+        last_sync_ms = self._get_last_sync_timestamp()
         
         # Default start date (e.g., for backfill)
-        backfill_start_ms = int(datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        backfill_start_ms = BACKFILL_START_MS
         
+        min_first_fill_ms = None
         if last_sync_ms:
-            # Start from the second after the last sync to avoid duplicates
-            start_time_ms = max(last_sync_ms + 1, backfill_start_ms)
+            # Overlap with the previous run; upserts make the re-synced records idempotent
+            start_time_ms = max(last_sync_ms - RESYNC_LOOKBACK_MS, backfill_start_ms)
+            if start_time_ms > backfill_start_ms:
+                min_first_fill_ms = start_time_ms + RESYNC_WARMUP_MS
             log.info(f"Last sync found at {datetime.fromtimestamp(last_sync_ms/1000, tz=timezone.utc)}. Starting from {datetime.fromtimestamp(start_time_ms/1000, tz=timezone.utc)}")
         else:
             start_time_ms = backfill_start_ms
             log.info(f"No previous sync found. Forcing start date to: {datetime.fromtimestamp(start_time_ms/1000, tz=timezone.utc)}")
         
         end_time_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        return start_time_ms, end_time_ms, min_first_fill_ms
 
-        # 2. Skip subaccount notice for brevity
-        log.warning("Note: Syncing main account only.")
+    def _run_streaming(self, fetcher: WindowFetcher, windows: List[Window], aggregator: OrderAggregator):
+        """
+        Aggregates pages as they arrive and flushes settled orders to Notion
+        while later windows are still downloading. Only orders that are still
+        open, and the sums of written orders that could still get late fills,
+        are held in memory.
+        """
+        retrieved = 0
+        written = 0
+        last_watermark = None
 
-        # 3. Fetch data from Bybit in 7-day chunks (API limit)
-        all_transactions = []
-        current_start = start_time_ms
-        
-        while current_start < end_time_ms:
-            # 7 days max per request
-            current_end = min(current_start + (7 * 24 * 60 * 60 * 1000) - 1, end_time_ms)
-            
-            log.info(f"Fetching chunk from {datetime.fromtimestamp(current_start/1000, tz=timezone.utc)} to {datetime.fromtimestamp(current_end/1000, tz=timezone.utc)}")
-            
-            try:
-                chunk_txs = self.exchange.fetch_transaction_log(
-                    account_type="UNIFIED", 
-                    category="linear", 
-                    start_time=int(current_start), 
-                    end_time=int(current_end)
-                )
-                all_transactions.extend(chunk_txs)
-            except Exception as e:
-                log.error(f"Error fetching chunk: {e}")
-                break
-                
-            current_start = current_end + 1
+        for page, watermark in fetcher.stream(windows):
+            aggregator.add(page)
+            retrieved += len(page)
+            metrics.inc("records_retrieved_total", len(page), account=self.account_name)
 
-        log.info(f"Total transactions retrieved: {len(all_transactions)}")
+            if watermark == last_watermark:
+                continue
+            last_watermark = watermark
 
-        # 4. Process and Aggregation
-        # Group by (symbol, side, tradeId_prefix) or just tradeId if available to merge split fills.
-        # Bybit Transaction Log 'tradeId' is unique for each fill. 'orderId' is unique for the order.
-        # However, a single closing order might have multiple fills.
-        # We want to aggregate fills that belong to the same "Closing Event".
-        # Simplest approach: Aggregate by 'orderId' if it exists and side/symbol match.
-        
-        aggregated_data = {}
+            settled = aggregator.pop_settled(watermark - ORDER_SETTLE_MS)
+            if settled:
+                log.info(f"Flushing {len(settled)} finished order(s) to Notion ({len(aggregator)} still open).")
+                self._write_records(settled)
+                written += len(settled)
+            # Orders this far behind the fetched data will not see late fills any more
+            aggregator.forget_popped(watermark - ORDER_SETTLE_MS - RESYNC_LOOKBACK_MS)
 
-        for tx_record in all_transactions:
-            if tx_record.get("type") != "TRADE":
-                continue
-                
-            change = float(tx_record.get("change", 0.0))
-            fee = float(tx_record.get("fee", 0.0))
-            pnl = change + fee
-            
-            # Filter non-zero and above threshold at the individual level? 
-            # Or aggregate first then filter? Usually better to aggregate first to catch split fills that sum up to > threshold.
-            
-            order_id = tx_record.get("orderId")
-            symbol = tx_record.get("symbol")
-            side = tx_record.get("side")
-            
-            # Key for aggregation: Order ID + Symbol + Side
-            key = f"{order_id}_{symbol}_{side}"
-            
-            if key not in aggregated_data:
-                aggregated_data[key] = {
-                    "symbol": symbol,
-                    "side": side,
-                    "size": 0.0,
-                    "total_value": 0.0, # for weighted avg price
-                    "fee": 0.0,
-                    "pnl": 0.0,
-                    "timestamp": int(tx_record.get("transactionTime")),
-                    "id": order_id, # Use Order ID as the unique ID for Notion
-                    "count": 0
-                }
-            
-            agg = aggregated_data[key]
-            qty = float(tx_record.get("qty", 0.0))
-            price = float(tx_record.get("tradePrice", 0.0))
-            
-            agg["size"] += qty
-            agg["total_value"] += (qty * price)
-            agg["fee"] += fee
-            agg["pnl"] += pnl
-            # Update timestamp to the latest one in the group
-            agg["timestamp"] = max(agg["timestamp"], int(tx_record.get("transactionTime")))
-            agg["count"] += 1
-
-        notion_records = []
-        pnl_threshold = 0.5 
-
-        for key, agg in aggregated_data.items():
-            final_pnl = agg["pnl"]
-            
-            # Apply threshold filter on the AGGREGATED PnL
-            if abs(final_pnl) < pnl_threshold:
-                continue
-                
-            avg_price = agg["total_value"] / agg["size"] if agg["size"] > 0 else 0.0
-            
-            record = {
-                "symbol": agg["symbol"],
-                "side": agg["side"],
-                "size": agg["size"],
-                "price": avg_price,
-                "fee": agg["fee"],
-                "pnl": final_pnl,
-                "timestamp": agg["timestamp"],
-                "subaccount": "Main Account",
-                "id": agg["id"] 
-            }
-            notion_records.append(record)
-
-        # Sort all records by timestamp
-        notion_records.sort(key=lambda r: r['timestamp'])
-        
-        if not notion_records:
-            log.info("No records matching the filter were found.")
-            return
+        if fetcher.gap:
+            log.error(f"Could not fetch chunk {format_window(fetcher.gap)}. Only transactions before it will be synced.")
+            remaining = aggregator.pop_settled(fetcher.gap[0])
+        else:
+            remaining = aggregator.pop_all()
 
-        log.info(f"Processed {len(notion_records)} records (PnL > {pnl_threshold}) to be written to Notion.")
-        
-        # 5. Write to Notion
-        self.notion.create_records(notion_records)
+        if remaining:
+            self._write_records(remaining)
+            written += len(remaining)
+
+        log.info(f"Total transactions retrieved: {retrieved}. Processed {written} records (PnL > {aggregator.pnl_threshold}).")
         log.info("Synchronization process completed successfully.")
+
+    def _get_last_sync_timestamp(self) -> Optional[int]:
+        """
+        Returns the sync cursor from the local state store, falling back to
+        (and seeding the store from) the newest Notion row.
+        """
+        if self.state_store:
+            high_water_ms = self.state_store.get_high_water_mark(self.notion.database_id, self.account_name, CATEGORY)
+            if high_water_ms is not None:
+                return high_water_ms
+
+        last_sync_ms = self.notion.get_last_sync_timestamp(subaccount=self.account_name)
+        if self.state_store and last_sync_ms:
+            self.state_store.advance_high_water_mark(self.notion.database_id, self.account_name, CATEGORY, last_sync_ms)
+        return last_sync_ms
+
+    def _write_records(self, records: List[OrderRecord]):
+        """
+        Upserts records into Notion and advances the local sync cursor past them.
+        If any record fails, the cursor stops before the earliest failure and the
+        sync is aborted, so the next run picks the failed records up again.
+        """
+        self._record_results(records, self.notion.upsert_records(records))
+
+    def _record_results(self, records: List[OrderRecord], results: List[Dict[str, Any]]):
+        """
+        Advances the sync cursor past the written records, stopping before the
+        earliest failure, and raises if any record failed.
+        """
+        failed_ids = {result["id"] for result in results if result["error"]}
+        failed_timestamps = [record.timestamp for record in records if record.id in failed_ids]
+        cutoff_ms = min(failed_timestamps) if failed_timestamps else None
+
+        metrics.inc("records_written_total", len(records) - len(failed_ids), account=self.account_name)
+        if self.state_store:
+            written = [record.timestamp for record in records
+                       if record.id not in failed_ids and (cutoff_ms is None or record.timestamp < cutoff_ms)]
+            if written:
+                self.state_store.advance_high_water_mark(self.notion.database_id, self.account_name, CATEGORY, max(written))
+
+        if failed_ids:
+            raise NotionApiException(f"Failed to write {len(failed_ids)} of {len(records)} records to Notion.")
+
+    def _fetch_window_pages(self, start_time_ms: int, end_time_ms: int) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields the linear transaction log of the account's unified wallet for one window, page by page.
+        With a checkpoint, pages are spooled as they arrive and replayed on a resumed run.
+        """
+        if self._checkpoint:
+            pages = self._checkpoint.pages(
+                (start_time_ms, end_time_ms),
+                lambda cursor: self.exchange.iter_transaction_log_pages(
+                    account_type=ACCOUNT_TYPE, category=CATEGORY,
+                    start_time=start_time_ms, end_time=end_time_ms, cursor=cursor
+                ),
+            )
+        else:
+            pages = self.exchange.iter_transaction_log(
+                account_type=ACCOUNT_TYPE,
+                category=CATEGORY,
+                start_time=start_time_ms,
+                end_time=end_time_ms
+            )
+        return self._count_window_pages(pages)
+
+    def _count_window_pages(self, pages: Iterable[List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Passes a window's pages through and records how many it had once it is exhausted.
+        """
+        count = 0
+        for page in pages:
+            count += 1
+            yield page
+        metrics.observe("window_pages", count, buckets=COUNT_BUCKETS, account=self.account_name)
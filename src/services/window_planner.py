@@ -0,0 +1,195 @@
+# src/services/window_planner.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.logger import log
+
+# Bybit returns at most 7 days of transaction log per query
+WINDOW_SPAN_MS = 7 * 24 * 60 * 60 * 1000
+DEFAULT_MAX_WORKERS = 4
+# Pages buffered between the fetch workers and a streaming consumer, per worker
+STREAM_QUEUE_PAGES_PER_WORKER = 2
+
+Window = Tuple[int, int]
+Page = List[Dict[str, Any]]
+
+
+def plan_windows(start_ms: int, end_ms: int, span_ms: int = WINDOW_SPAN_MS) -> List[Window]:
+    """
+    Splits [start_ms, end_ms] into consecutive, non-overlapping windows.
+
+    Args:
+        start_ms: The start timestamp in milliseconds.
+        end_ms: The end timestamp in milliseconds.
+        span_ms: The maximum length of a window in milliseconds.
+
+    Returns:
+        A list of (start, end) tuples in chronological order.
+    """
+    windows = []
+    current_start = start_ms
+    while current_start < end_ms:
+        current_end = min(current_start + span_ms - 1, end_ms)
+        windows.append((current_start, current_end))
+        current_start = current_end + 1
+    return windows
+
+
+def format_window(window: Window) -> str:
+    start, end = window
+    return f"{datetime.fromtimestamp(start/1000, tz=timezone.utc)} to {datetime.fromtimestamp(end/1000, tz=timezone.utc)}"
+
+
+class WindowFetcher:
+    """
+    Fetches independent time windows on a bounded worker pool.
+    All workers call into the same exchange adapter, so they draw from its
+    shared rate limiter rather than each getting a budget of their own.
+    """
+
+    def __init__(self, fetch_pages: Callable[[int, int], Iterable[Page]], max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            fetch_pages: Callable yielding the pages of records between two timestamps (ms).
+            max_workers: Maximum number of windows fetched at the same time.
+        """
+        self.fetch_pages = fetch_pages
+        self.max_workers = max(1, max_workers)
+        # Set by stream() once it is exhausted: the first window that could not be fetched.
+        self.gap: Optional[Window] = None
+
+    def _fetch_one(self, window: Window) -> Page:
+        log.info(f"Fetching chunk from {format_window(window)}")
+        return [record for page in self.fetch_pages(int(window[0]), int(window[1])) for record in page]
+
+    def fetch(self, windows: List[Window], sort_key: Callable[[Dict[str, Any]], Any]) -> Tuple[Page, Optional[Window]]:
+        """
+        Fetches every window concurrently and merges the results.
+        Windows that fail are retried one at a time once the pool has drained.
+        If a window still fails, only the windows before it are returned, so the
+        caller's sync cursor never skips over a gap.
+
+        Args:
+            windows: The windows to fetch, in chronological order.
+            sort_key: Key used to merge the records into timestamp order.
+
+        Returns:
+            A tuple of (merged records, first window that could not be fetched or None).
+        """
+        results: List[Optional[Page]] = [None] * len(windows)
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._fetch_one, window) for window in windows]
+            for index, future in enumerate(futures):
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    log.warning(f"Error fetching chunk {format_window(windows[index])}: {e}. Will retry.")
+                    failed.append(index)
+
+        first_gap = None
+        for index in failed:
+            try:
+                results[index] = self._fetch_one(windows[index])
+            except Exception as e:
+                log.error(f"Error fetching chunk {format_window(windows[index])} on retry: {e}")
+                first_gap = index
+                break
+
+        complete = results if first_gap is None else results[:first_gap]
+        merged = [record for chunk in complete for record in chunk]
+        merged.sort(key=sort_key)
+        return merged, (windows[first_gap] if first_gap is not None else None)
+
+    def stream(self, windows: List[Window]) -> Iterator[Tuple[Page, int]]:
+        """
+        Fetches every window concurrently and yields pages as soon as they arrive.
+        Pages are not in timestamp order. Alongside each page the generator yields
+        a watermark: every record at or before it has already been yielded.
+        A bounded queue between the workers and the consumer keeps memory flat.
+
+        Windows that fail are retried one at a time after the pool has drained.
+        A window's history is immutable and always paged in the same order, so the
+        retry skips the pages already yielded by the failed attempt.
+        If a window still fails, the watermark stops before it and `self.gap` is set.
+
+        Args:
+            windows: The windows to fetch, in chronological order.
+
+        Yields:
+            Tuples of (page of records, watermark in ms). The page may be empty
+            when only the watermark advanced.
+        """
+        self.gap = None
+        if not windows:
+            return
+
+        pages: queue.Queue = queue.Queue(maxsize=self.max_workers * STREAM_QUEUE_PAGES_PER_WORKER)
+        stop = threading.Event()
+        done = [False] * len(windows)
+        yielded_pages = [0] * len(windows)
+        failed = []
+        next_pending = 0  # Index of the first window that is not done yet
+
+        def worker(index: int, window: Window):
+            if stop.is_set():
+                return
+            log.info(f"Fetching chunk from {format_window(window)}")
+            try:
+                for page in self.fetch_pages(int(window[0]), int(window[1])):
+                    pages.put(("page", index, page))
+                    if stop.is_set():
+                        return
+                pages.put(("done", index, None))
+            except Exception as e:
+                pages.put(("error", index, e))
+
+        def advance_watermark() -> int:
+            nonlocal next_pending
+            while next_pending < len(windows) and done[next_pending]:
+                next_pending += 1
+            return windows[next_pending - 1][1] if next_pending else windows[0][0] - 1
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for index, window in enumerate(windows):
+                executor.submit(worker, index, window)
+
+            outstanding = len(windows)
+            while outstanding:
+                kind, index, payload = pages.get()
+                if kind == "page":
+                    yielded_pages[index] += 1
+                    yield payload, advance_watermark()
+                    continue
+
+                outstanding -= 1
+                if kind == "done":
+                    done[index] = True
+                    yield [], advance_watermark()
+                else:
+                    log.warning(f"Error fetching chunk {format_window(windows[index])}: {payload}. Will retry.")
+                    failed.append(index)
+        finally:
+            # Unblock workers if the consumer stopped early
+            stop.set()
+            while not pages.empty():
+                pages.get_nowait()
+            executor.shutdown(wait=False)
+
+        for index in sorted(failed):
+            log.info(f"Retrying chunk {format_window(windows[index])}")
+            try:
+                for page_number, page in enumerate(self.fetch_pages(int(windows[index][0]), int(windows[index][1]))):
+                    if page_number >= yielded_pages[index]:
+                        yield page, advance_watermark()
+            except Exception as e:
+                log.error(f"Error fetching chunk {format_window(windows[index])} on retry: {e}")
+                self.gap = windows[index]
+                return
+            done[index] = True
+            yield [], advance_watermark()
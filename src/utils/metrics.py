@@ -0,0 +1,217 @@
+# src/utils/metrics.py
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .logger import log
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Upper bounds of histograms that count things, e.g. pages per window
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+PROMETHEUS_PREFIX = "bybit_notion_"
+SUMMARY_TOP_STAGES = 10  # Histograms listed in the end-of-run log summary
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    """Cumulative-bucket histogram, as exported by Prometheus."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the maximum for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms for profiling sync and monitor runs.
+    Every metric is keyed by name and a set of labels (e.g. the endpoint), is
+    thread-safe, and can be exported as Prometheus text or a JSON summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._started = time.time()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any):
+        """
+        Adds `value` to a counter.
+        """
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: Any):
+        """
+        Records a value in a histogram. The buckets are fixed by the first observation.
+        """
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """
+        Records the duration of the `with` block in seconds, even if it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns every metric as plain data. Counters also carry their average
+        rate per second since the registry was (re)started, e.g. records/sec.
+        """
+        with self._lock:
+            elapsed = max(time.time() - self._started, 1e-9)
+            counters = [
+                {"name": name, "labels": dict(key), "value": value, "per_second": value / elapsed}
+                for name, series in sorted(self._counters.items()) for key, value in series.items()
+            ]
+            histograms = [
+                {
+                    "name": name, "labels": dict(key), "count": h.count, "sum": h.sum,
+                    "avg": h.sum / h.count if h.count else 0.0, "max": h.max,
+                    "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+                }
+                for name, series in sorted(self._histograms.items()) for key, h in series.items()
+            ]
+        return {"elapsed_seconds": elapsed, "counters": counters, "histograms": histograms}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} counter")
+                for key, value in series.items():
+                    lines.append(f"{PROMETHEUS_PREFIX}{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(float(bound))
+                        lines.append(f"{PROMETHEUS_PREFIX}{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{PROMETHEUS_PREFIX}{name}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{PROMETHEUS_PREFIX}{name}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes the metrics to `path`: Prometheus text for a '.prom' or '.txt' file, JSON otherwise.
+        """
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.summary(), indent=2)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        log.info(f"Metrics written to {path}.")
+
+    def log_summary(self, top: int = SUMMARY_TOP_STAGES):
+        """
+        Logs the stages that took the most total time, to show where a run spent it.
+        """
+        histograms = [h for h in self.summary()["histograms"] if h["name"].endswith("_seconds")]
+        histograms.sort(key=lambda h: h["sum"], reverse=True)
+        for h in histograms[:top]:
+            labels = ",".join(f"{k}={v}" for k, v in h["labels"].items())
+            log.info(f"Metrics: {h['name']}{{{labels}}} {h['count']} call(s), {h['sum']:.2f}s total, "
+                     f"avg {h['avg'] * 1000:.0f}ms, p95 {h['p95'] * 1000:.0f}ms, max {h['max'] * 1000:.0f}ms")
+
+    def serve(self, port: int, host: str = "0.0.0.0"):
+        """
+        Serves the metrics over HTTP on a background thread: Prometheus text at
+        /metrics and the JSON summary at /metrics.json.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, content_type = registry.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, content_type = json.dumps(registry.summary()), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would flood the log
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        log.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def stop_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in key)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(key, escaped)) + "}"
+
+
+# Shared registry, imported like the logger
+metrics = MetricsRegistry()
@@ -0,0 +1,161 @@
+# src/utils/rate_limiter.py
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """
+    Returns a "full jitter" exponential backoff delay for the given retry attempt (1-based).
+
+    Args:
+        attempt: The retry attempt number, starting at 1.
+        base: Delay ceiling for the first attempt in seconds; doubled on every attempt.
+        cap: Maximum delay ceiling in seconds.
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+    Tokens refill continuously at `rate` per second up to `capacity`, so callers
+    can burst while quota is left and are paced evenly once it runs out.
+    The bucket can be re-synced with the quota reported by the server.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Number of tokens added per second.
+            capacity: Maximum number of tokens the bucket can hold (the burst size).
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0  # Monotonic time before which no token is handed out
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def _try_take(self) -> float:
+        """
+        Takes one token if available.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one may be available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """
+        Takes one token, blocking until one is available.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_take()
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self) -> float:
+        """
+        Takes one token, yielding to the event loop until one is available.
+        Sync and async callers can share the same bucket.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            delay = self._try_take()
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def update(self, remaining: Optional[int] = None, limit: Optional[int] = None, window_seconds: float = 1.0):
+        """
+        Syncs the bucket with the quota reported by the server.
+
+        Args:
+            remaining: Requests left in the current window.
+            limit: Total requests allowed per window.
+            window_seconds: Length of the server's rate limit window.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.capacity = float(limit)
+                self.rate = float(limit) / window_seconds
+            if remaining is not None:
+                # Requests still in flight were already deducted locally, so never raise the count.
+                self._tokens = min(self._tokens, float(remaining))
+
+    def set_rate(self, rate: float):
+        """
+        Changes the refill rate, keeping the tokens accumulated so far.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def block_until(self, reset_at: float):
+        """
+        Drains the bucket and hands out no tokens until the given wall-clock time.
+
+        Args:
+            reset_at: Unix timestamp (seconds) at which the quota resets.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + max(0.0, reset_at - time.time()))
+            self._tokens = 0.0
+            self._last_refill = max(now, self._blocked_until)
+
+
+class RateLimiter:
+    """
+    A collection of token buckets keyed by name (e.g. one per API endpoint).
+    A single instance can be shared between threads and clients so they draw
+    from one common budget.
+    """
+
+    def __init__(self, default_rate: float, default_capacity: float):
+        """
+        Args:
+            default_rate: Refill rate for buckets created on first use.
+            default_capacity: Burst size for buckets created on first use.
+        """
+        self.default_rate = default_rate
+        self.default_capacity = default_capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str) -> TokenBucket:
+        """
+        Returns the bucket for the given key, creating it if needed.
+        """
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self.default_rate, self.default_capacity)
+            return self._buckets[key]